@@ -1,117 +1,7 @@
 import streamlit as st
 import uuid
-from graphql import (GraphQLObjectType, GraphQLString, GraphQLSchema, 
-                     GraphQLField, GraphQLList, GraphQLArgument, execute)
-from graphql.language import parse
-from datetime import datetime
-import pytz
-
-class TodoManager:
-    def __init__(self):
-        self.todos = []
-
-    def add_todo(self, title, description, priority, due_date):
-        """Add a new todo with more detailed information"""
-        todo = {
-            'id': str(uuid.uuid4()),  # Use UUID for unique IDs
-            'title': title,
-            'description': description,
-            'priority': priority,
-            'due_date': due_date,
-            'created_at': datetime.now(pytz.UTC).isoformat(),
-            'completed': False
-        }
-        self.todos.append(todo)
-        return todo
-
-    def get_todos(self, filter_completed=None, sort_by=None):
-        """Retrieve todos with optional filtering and sorting"""
-        filtered_todos = self.todos
-        
-        if filter_completed is not None:
-            filtered_todos = [todo for todo in filtered_todos if todo['completed'] == filter_completed]
-        
-        if sort_by == 'priority':
-            filtered_todos.sort(key=lambda x: ['low', 'medium', 'high'].index(x['priority']))
-        elif sort_by == 'due_date':
-            filtered_todos.sort(key=lambda x: x['due_date'])
-        
-        return filtered_todos
-
-    def update_todo_status(self, todo_id, completed):
-        """Update the completion status of a todo"""
-        for todo in self.todos:
-            if todo['id'] == todo_id:
-                todo['completed'] = completed
-                return todo
-        return None
-
-    def delete_todo(self, todo_id):
-        """Delete a todo by its ID"""
-        self.todos = [todo for todo in self.todos if todo['id'] != todo_id]
-        return "Deleted"
-
-def get_graphql_schema(todo_manager):
-    TodoType = GraphQLObjectType(
-        name='Todo',
-        fields={
-            'id': GraphQLField(GraphQLString),
-            'title': GraphQLField(GraphQLString),
-            'description': GraphQLField(GraphQLString),
-            'priority': GraphQLField(GraphQLString),
-            'due_date': GraphQLField(GraphQLString),
-            'created_at': GraphQLField(GraphQLString),
-            'completed': GraphQLField(GraphQLString)
-        }
-    )
-
-    QueryType = GraphQLObjectType(
-        name='Query',
-        fields={
-            'getTodos': GraphQLField(
-                GraphQLList(TodoType),
-                resolve=lambda obj, info: todo_manager.get_todos()
-            )
-        }
-    )
-
-    MutationType = GraphQLObjectType(
-        name='Mutation',
-        fields={
-            'addTodo': GraphQLField(
-                TodoType,
-                args={
-                    'title': GraphQLArgument(GraphQLString),
-                    'description': GraphQLArgument(GraphQLString),
-                    'priority': GraphQLArgument(GraphQLString),
-                    'due_date': GraphQLArgument(GraphQLString),
-                },
-                resolve=lambda obj, info, **kwargs: 
-                    todo_manager.add_todo(
-                        kwargs['title'], 
-                        kwargs['description'], 
-                        kwargs.get('priority', 'medium'),
-                        kwargs.get('due_date', datetime.now(pytz.UTC).isoformat())
-                    )
-            ),
-            'deleteTodo': GraphQLField(
-                GraphQLString,
-                args={'id': GraphQLArgument(GraphQLString)},
-                resolve=lambda obj, info, id: todo_manager.delete_todo(id)
-            ),
-            'updateTodoStatus': GraphQLField(
-                TodoType,
-                args={
-                    'id': GraphQLArgument(GraphQLString),
-                    'completed': GraphQLArgument(GraphQLString)
-                },
-                resolve=lambda obj, info, id, completed: 
-                    todo_manager.update_todo_status(id, completed == 'true')
-            )
-        }
-    )
-
-    return GraphQLSchema(query=QueryType, mutation=MutationType)
+from todo_graphql import execute_operation
+from todo_manager import TodoManager
 
 def authenticate(username, password):
     """Enhanced authentication with more robust checks"""
@@ -179,9 +69,6 @@ def main():
         ["Default", "Priority", "Due Date"]
     )
 
-    # Create GraphQL schema
-    schema = get_graphql_schema(st.session_state.todo_manager)
-
     # Add Todo Form
     with st.expander("➕ Add New Todo", expanded=True):
         col1, col2, col3 = st.columns(3)
@@ -197,21 +84,14 @@ def main():
         
         if st.button("Add Todo"):
             if title:
-                mutation = parse(f"""
-                mutation {{
-                    addTodo(
-                        title: "{title}", 
-                        description: "{description}", 
-                        priority: "{priority}",
-                        due_date: "{due_date}"
-                    ) {{
-                        id
-                        title
-                        description
-                    }}
-                }}
-                """)
-                execute(schema, mutation)
+                execute_operation(
+                    st.session_state.todo_manager,
+                    'AddTodo',
+                    title=title,
+                    description=description,
+                    priority=priority,
+                    due_date=str(due_date)
+                )
                 st.success("Todo added successfully!")
 
     # Display Todos
@@ -248,27 +128,16 @@ def main():
                         key=f"complete_{todo['id']}"
                     )
                     if completed != todo['completed']:
-                        mutation = parse(f"""
-                        mutation {{
-                            updateTodoStatus(
-                                id: "{todo['id']}", 
-                                completed: "{str(completed).lower()}"
-                            ) {{
-                                id
-                                completed
-                            }}
-                        }}
-                        """)
-                        execute(schema, mutation)
+                        execute_operation(
+                            st.session_state.todo_manager,
+                            'UpdateTodoStatus',
+                            id=todo['id'],
+                            completed=str(completed).lower()
+                        )
                 
                 with col3:
                     if st.button(f"Delete {todo['title']}", key=f"delete_{todo['id']}"):
-                        mutation = parse(f"""
-                        mutation {{
-                            deleteTodo(id: "{todo['id']}")
-                        }}
-                        """)
-                        execute(schema, mutation)
+                        execute_operation(st.session_state.todo_manager, 'DeleteTodo', id=todo['id'])
                         st.experimental_rerun()
                 
                 st.markdown("---")
@@ -0,0 +1,69 @@
+"""Concurrency benchmark for a shared VehicleModelMatcher.
+
+Runs the same workload with one matcher shared by every thread and with one
+matcher per thread, checks both give the single-threaded answers, and prints
+throughput for each.
+
+    python benchmarks/bench_concurrency.py [--threads N] [--rows N]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vehicle_match import DEFAULT_DATABASE_NAMES, VehicleModelMatcher, test_cases  # noqa: E402
+
+
+def make_workload(rows, seed=0):
+    rng = random.Random(seed)
+    inputs = list(test_cases)
+    for name in DEFAULT_DATABASE_NAMES:
+        brand, model = name.split('_', 1)
+        inputs.append(f"{brand.upper()} MOTORS-{model.upper().replace('_', ' ')} 1.2 MT")
+    return [rng.choice(inputs) for _ in range(rows)]
+
+
+def run(matchers, workload, threads):
+    chunks = [workload[i::threads] for i in range(threads)]
+
+    def worker(index):
+        matcher = matchers[index % len(matchers)]
+        return [matcher.get_best_match(value) for value in chunks[index]]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(worker, range(threads)))
+    return time.perf_counter() - start, chunks, results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--rows', type=int, default=20000)
+    args = parser.parse_args(argv)
+
+    workload = make_workload(args.rows)
+    reference = VehicleModelMatcher(DEFAULT_DATABASE_NAMES, cache_size=0)
+    expected = {value: reference.get_best_match(value) for value in set(workload)}
+
+    shared = VehicleModelMatcher(DEFAULT_DATABASE_NAMES)
+    per_thread = [VehicleModelMatcher(DEFAULT_DATABASE_NAMES) for _ in range(args.threads)]
+
+    for label, matchers in (('shared', [shared]), ('per-thread', per_thread)):
+        elapsed, chunks, results = run(matchers, workload, args.threads)
+        for chunk, chunk_results in zip(chunks, results):
+            for value, result in zip(chunk, chunk_results):
+                if result != expected[value]:
+                    print(f"FAIL: {label} matcher returned {result} for {value!r}, expected {expected[value]}")
+                    return 1
+        print(f"{label:>10}: {args.rows / elapsed:,.0f} rows/s with {args.threads} threads "
+              f"({len(matchers)} matcher instance(s))")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""Load benchmark for the HTTP GraphQL server.
+
+Starts the server in-process on a free port, seeds it with todos, then has
+many concurrent keep-alive clients send a mix of reads and writes. Prints
+throughput and latency percentiles; fails if any request errors.
+
+    python benchmarks/bench_graphql_server.py [--clients N] [--requests N] [--todos N]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from graphql_server import GraphQLServer  # noqa: E402
+from todo_manager import TodoManager  # noqa: E402
+
+READ_QUERY = "query Page($first: Int) { todos(first: $first, sort_by: \"priority\") { edges { node { id title priority } } } }"
+ADD_MUTATION = "mutation Add($title: String!) { addTodo(title: $title, priority: \"high\") { id } }"
+
+
+async def request(reader, writer, payload):
+    body = json.dumps(payload).encode('utf-8')
+    writer.write(
+        b"POST /graphql HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+        + f"Content-Length: {len(body)}\r\n\r\n".encode('latin-1') + body
+    )
+    await writer.drain()
+    head = await reader.readuntil(b'\r\n\r\n')
+    status = int(head.split(b' ', 2)[1])
+    length = next(int(line.split(b':', 1)[1]) for line in head.split(b'\r\n')
+                  if line.lower().startswith(b'content-length:'))
+    response = json.loads(await reader.readexactly(length))
+    if status != 200 or response.get('errors'):
+        raise RuntimeError(f"Request failed with {status}: {response}")
+
+
+async def client(port, requests, write_ratio, rng, latencies):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        for i in range(requests):
+            if rng.random() < write_ratio:
+                payload = {'query': ADD_MUTATION, 'variables': {'title': f"bench {i}"}}
+            else:
+                payload = {'query': READ_QUERY, 'variables': {'first': 20}}
+            start = time.perf_counter()
+            await request(reader, writer, payload)
+            latencies.append(time.perf_counter() - start)
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+
+async def run(args):
+    todo_manager = TodoManager()
+    for i in range(args.todos):
+        todo_manager.add_todo(f"todo {i}", "", random.choice(['low', 'medium', 'high']), "2030-01-01", 'Other')
+
+    server = await GraphQLServer(todo_manager, port=0).start()
+    rng = random.Random(0)
+    latencies = []
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(
+            client(server.port, args.requests, args.write_ratio, random.Random(rng.random()), latencies)
+            for _ in range(args.clients)
+        ))
+    finally:
+        await server.close()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    total = len(latencies)
+    print(f"{total} requests from {args.clients} clients in {elapsed:.2f}s: {total / elapsed:,.0f} req/s")
+    print(f"latency p50 {statistics.median(latencies) * 1000:.2f} ms, "
+          f"p99 {latencies[int(total * 0.99) - 1] * 1000:.2f} ms, "
+          f"over {server.stats['connections']} connections")
+    cache = server.response_cache.stats
+    print(f"response cache: {cache['hits']} hits, {cache['misses']} misses, {cache['evictions']} evictions")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=100, help="requests per client")
+    parser.add_argument('--todos', type=int, default=2000, help="todos seeded before the run")
+    parser.add_argument('--write-ratio', type=float, default=0.1,
+                        help="share of requests that are mutations (each one invalidates the response cache)")
+    args = parser.parse_args(argv)
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
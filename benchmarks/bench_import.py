@@ -0,0 +1,59 @@
+"""Startup-time benchmark for vehicle_match.
+
+Imports the module in fresh interpreters and fails when the median import
+time goes over the budget, so import-time side effects don't creep back in.
+
+    python benchmarks/bench_import.py [--runs N] [--budget-ms MS]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# time only the import itself, not interpreter startup
+IMPORT_SNIPPET = (
+    "import sys, time\n"
+    "start = time.perf_counter()\n"
+    "import vehicle_match\n"
+    "elapsed = time.perf_counter() - start\n"
+    "heavy = [m for m in ('fuzzywuzzy', 'difflib') if m in sys.modules]\n"
+    "print(elapsed * 1000, ','.join(heavy))\n"
+)
+
+
+def time_import():
+    output = subprocess.run(
+        [sys.executable, '-c', IMPORT_SNIPPET],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    ).stdout.split()
+    return float(output[0]), output[1] if len(output) > 1 else ''
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--budget-ms', type=float, default=20.0)
+    args = parser.parse_args(argv)
+
+    timings = []
+    for _ in range(args.runs):
+        elapsed_ms, heavy = time_import()
+        if heavy:
+            print(f"FAIL: heavy modules loaded at import time: {heavy}")
+            return 1
+        timings.append(elapsed_ms)
+
+    median = statistics.median(timings)
+    print(f"import vehicle_match: median {median:.2f} ms, "
+          f"min {min(timings):.2f} ms, max {max(timings):.2f} ms ({args.runs} runs)")
+    if median > args.budget_ms:
+        print(f"FAIL: median import time over budget of {args.budget_ms} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
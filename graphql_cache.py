@@ -0,0 +1,62 @@
+import json
+import threading
+from collections import OrderedDict
+
+
+class ResponseCache:
+    """LRU cache of serialized GraphQL responses.
+
+    Keys include the todo manager's epoch and version, so any mutation makes
+    every older entry unreachable; those then age out of the LRU order rather
+    than being invalidated one by one. Memory is bounded by max_entries and
+    max_bytes of cached response bodies.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'entries': 0, 'bytes': 0}
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(normalized_query, operation_name, variables, epoch, version):
+        """Cache key for a query printed from its AST, so whitespace and comments don't matter"""
+        return (
+            normalized_query,
+            operation_name,
+            json.dumps(variables, sort_keys=True, separators=(',', ':')) if variables else None,
+            epoch,
+            version
+        )
+
+    def get(self, key):
+        with self._lock:
+            body = self._entries.get(key)
+            if body is None:
+                self.stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return body
+
+    def put(self, key, body):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.stats['bytes'] -= len(previous)
+            self._entries[key] = body
+            self.stats['bytes'] += len(body)
+            while len(self._entries) > self.max_entries or self.stats['bytes'] > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.stats['bytes'] -= len(evicted)
+                self.stats['evictions'] += 1
+            self.stats['entries'] = len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.stats['entries'] = 0
+            self.stats['bytes'] = 0
@@ -0,0 +1,454 @@
+"""Standalone HTTP GraphQL endpoint for the todo schema.
+
+Serves the same schema as the Streamlit app over HTTP/1.1 with keep-alive,
+using asyncio for connections and graphql-core's async execution. Root
+resolvers touch the store, so they run on a thread pool and never block
+the event loop.
+
+    python graphql_server.py [--host HOST] [--port PORT] [--backend sqlite|journal --path PATH]
+
+POST /graphql takes {"query", "variables", "operationName"} as JSON;
+GET /graphql?query=... runs read-only queries. GET /events is a
+server-sent event stream of todo changes (added, updated, deleted),
+including other processes' changes to a SQLite store, and due reminders. GET /stats and GET /metrics dump server, cache and
+resolver timing metrics as JSON and in the Prometheus text format.
+"""
+import argparse
+import asyncio
+import functools
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+from graphql import GraphQLError, OperationType, execute, get_operation_ast, parse, print_ast, validate
+
+from graphql_cache import ResponseCache
+from graphql_tracing import Tracer, check_query_cost, trace_logger
+
+from todo_events import TodoEventBroker
+from todo_graphql import get_graphql_schema
+from todo_manager import create_todo_manager
+
+logger = logging.getLogger(__name__)
+
+MAX_BODY_SIZE = 1024 * 1024
+MAX_HEADER_SIZE = 64 * 1024
+# default limits on how deep and how expensive a single operation may be
+MAX_QUERY_DEPTH = 10
+MAX_QUERY_COMPLEXITY = 10000
+# comment lines sent to idle event streams, so proxies and clients notice dead connections
+EVENT_HEARTBEAT_INTERVAL = 15.0
+# parsed queries kept, and the longest query kept; longer ones are parsed on
+# every request, so the cache holds a few megabytes at most
+PARSE_CACHE_SIZE = 256
+MAX_CACHED_QUERY_SIZE = 8 * 1024
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message=None):
+        super().__init__(message or status.phrase)
+        self.status = status
+
+
+def parse_and_validate(query):
+    """(document, validation errors, normalized query text) for a query string.
+
+    Cached by the query text, unless it is over MAX_CACHED_QUERY_SIZE.
+    """
+    if len(query) > MAX_CACHED_QUERY_SIZE:
+        return _parse_and_validate(query)
+    return _cached_parse_and_validate(query)
+
+
+def _parse_and_validate(query):
+    try:
+        document = parse(query)
+    except GraphQLError as e:
+        return None, (e,), None
+    return document, tuple(validate(get_graphql_schema(), document)), print_ast(document)
+
+
+_cached_parse_and_validate = functools.lru_cache(maxsize=PARSE_CACHE_SIZE)(_parse_and_validate)
+
+
+def _operation_name(operation):
+    return operation.name.value if operation is not None and operation.name else None
+
+
+def _offload_root_fields(executor):
+    """Middleware running root Query/Mutation resolvers on executor.
+
+    Nested fields only read the dicts the root resolvers returned, so they
+    stay on the event loop.
+    """
+    def middleware(next_, root, info, **args):
+        # a plain function, so nested fields don't each pay for a coroutine
+        if info.path.prev is not None:
+            return next_(root, info, **args)
+        loop = asyncio.get_running_loop()
+        return loop.run_in_executor(executor, functools.partial(next_, root, info, **args))
+
+    return middleware
+
+
+class GraphQLServer:
+    """Asyncio HTTP server executing GraphQL requests against one todo manager"""
+
+    def __init__(self, todo_manager, host='127.0.0.1', port=8000, workers=8, idle_timeout=30.0,
+                 reminder_service=None, response_cache=None, tracer=None, max_depth=MAX_QUERY_DEPTH,
+                 max_complexity=MAX_QUERY_COMPLEXITY):
+        self.todo_manager = todo_manager
+        self.reminder_service = reminder_service
+        self.host = host
+        self.port = port
+        self.idle_timeout = idle_timeout
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='graphql-resolver')
+        self.tracer = tracer if tracer is not None else Tracer()
+        self.max_depth = max_depth
+        self.max_complexity = max_complexity
+        # the last middleware is outermost, so timings include the thread pool hop
+        self.middleware = [_offload_root_fields(self.executor), self.tracer.middleware()]
+        self.stats = {'connections': 0, 'requests': 0, 'errors': 0, 'event_streams': 0}
+        # responses to read queries, until the next mutation
+        self.response_cache = response_cache if response_cache is not None else ResponseCache()
+        self.events = None
+        self._server = None
+        self._writers = set()
+
+    async def start(self):
+        """Start listening; port 0 picks a free port, available as self.port afterwards"""
+        self.events = TodoEventBroker(self.todo_manager, asyncio.get_running_loop(), self.reminder_service)
+        self._server = await asyncio.start_server(
+            self._handle_connection, self.host, self.port, limit=MAX_HEADER_SIZE
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self.events is not None:
+            # ends every event stream
+            self.events.close()
+            self.events = None
+        # idle keep-alive connections see end of stream and finish
+        for writer in list(self._writers):
+            writer.close()
+        self.executor.shutdown(wait=False)
+
+    async def execute(self, query, variables=None, operation_name=None, allow_mutations=True):
+        """Run a GraphQL request and return the response dict"""
+        document, errors, _ = parse_and_validate(query)
+        if errors:
+            return {'errors': [error.formatted for error in errors]}
+        self._check_operation(document, operation_name, allow_mutations)
+        self._check_cost(document, operation_name, variables)
+        return await self._execute_document(document, variables, operation_name)
+
+    async def respond(self, query, variables=None, operation_name=None, allow_mutations=True):
+        """Run a GraphQL request and return (HTTP status, JSON body bytes).
+
+        Successful queries are served from the response cache until the todo
+        manager's version changes, which for a shared SQLite store includes
+        writes from other processes.
+        """
+        document, errors, normalized_query = parse_and_validate(query)
+        if errors:
+            # requests that fail validation never reach execution
+            return HTTPStatus.BAD_REQUEST, json.dumps({'errors': [error.formatted for error in errors]}).encode('utf-8')
+        operation = self._check_operation(document, operation_name, allow_mutations)
+
+        key = None
+        if operation is not None and operation.operation == OperationType.QUERY:
+            trace = self.tracer.start(_operation_name(operation))
+            version = await self._version()
+            key = self.response_cache.make_key(
+                normalized_query, operation_name, variables, self.todo_manager.epoch, version
+            )
+            body = self.response_cache.get(key)
+            if body is not None:
+                self.tracer.finish(trace, cached=True)
+                return HTTPStatus.OK, body
+
+        self._check_cost(document, operation_name, variables)
+        response = await self._execute_document(document, variables, operation_name)
+        body = json.dumps(response).encode('utf-8')
+        # skip results that may have seen a mutation made while they ran
+        if key is not None and 'errors' not in response and await self._version() == version:
+            self.response_cache.put(key, body)
+        return HTTPStatus.OK, body
+
+    async def _version(self):
+        # a shared store reads it from the database, which may wait on the store lock
+        if getattr(self.todo_manager.store, 'shared', False):
+            return await asyncio.get_running_loop().run_in_executor(self.executor, lambda: self.todo_manager.version)
+        return self.todo_manager.version
+
+    @staticmethod
+    def _check_operation(document, operation_name, allow_mutations):
+        operation = get_operation_ast(document, operation_name)
+        if not allow_mutations and operation is not None and operation.operation != OperationType.QUERY:
+            raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, "Only queries are allowed over GET")
+        return operation
+
+    def _check_cost(self, document, operation_name, variables):
+        errors = check_query_cost(document, operation_name, variables, self.max_depth, self.max_complexity)
+        if errors:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, '; '.join(error.message for error in errors))
+
+    async def _execute_document(self, document, variables, operation_name):
+        operation = get_operation_ast(document, operation_name)
+        trace = self.tracer.start(_operation_name(operation))
+        result = execute(
+            get_graphql_schema(),
+            document,
+            operation_name=operation_name,
+            variable_values=variables,
+            context_value={'todo_manager': self.todo_manager, 'trace': trace},
+            middleware=self.middleware
+        )
+        if asyncio.iscoroutine(result) or isinstance(result, asyncio.Future):
+            result = await result
+        self.tracer.finish(trace, result.errors)
+
+        response = {'data': result.data}
+        if result.errors:
+            self.stats['errors'] += 1
+            response['errors'] = [error.formatted for error in result.errors]
+        return response
+
+    async def _handle_connection(self, reader, writer):
+        self.stats['connections'] += 1
+        self._writers.add(writer)
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(self._read_request(reader), self.idle_timeout)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except HTTPError as e:
+                    await self._write_response(writer, e.status, {'errors': [{'message': str(e)}]}, keep_alive=False)
+                    break
+                if request is None:
+                    break
+
+                method, target, headers, body = request
+                if method == 'GET' and urlsplit(target).path == '/events':
+                    await self._stream_events(reader, writer)
+                    break
+                keep_alive = self._keep_alive(headers)
+                status, payload = await self._dispatch(method, target, body)
+                await self._write_response(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        except Exception:
+            logger.exception("GraphQL connection failed")
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _read_request(self, reader):
+        """(method, target, headers, body) of the next request, or None at end of stream"""
+        try:
+            head = await reader.readuntil(b'\r\n\r\n')
+        except asyncio.IncompleteReadError as e:
+            if not e.partial:
+                return None
+            raise
+        except asyncio.LimitOverrunError:
+            raise HTTPError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE)
+
+        lines = head.decode('latin-1').split('\r\n')
+        try:
+            method, target, version = lines[0].split(' ', 2)
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Malformed request line")
+        headers = {'version': version}
+        for line in lines[1:]:
+            if ':' in line:
+                name, value = line.split(':', 1)
+                headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get('content-length') or 0)
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length")
+        if length > MAX_BODY_SIZE:
+            raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+        body = await reader.readexactly(length) if length else b''
+        return method.upper(), target, headers, body
+
+    async def _stream_events(self, reader, writer):
+        """Send todo events to the client until it disconnects or falls too far behind"""
+        self.stats['event_streams'] += 1
+        events = self.events
+        queue = events.subscribe()
+        # clients don't send anything on an event stream; a read only returns on disconnect
+        disconnected = asyncio.ensure_future(reader.read(1))
+        try:
+            writer.write(
+                b"HTTP/1.1 200 OK\r\n"
+                b"Content-Type: text/event-stream\r\n"
+                b"Cache-Control: no-cache\r\n"
+                b"Connection: close\r\n"
+                b"\r\n"
+                b"retry: 1000\n\n"
+            )
+            await writer.drain()
+            while True:
+                next_event = asyncio.ensure_future(queue.get())
+                done, _ = await asyncio.wait(
+                    {next_event, disconnected},
+                    timeout=EVENT_HEARTBEAT_INTERVAL,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                if next_event not in done:
+                    next_event.cancel()
+                    if disconnected in done:
+                        return
+                    writer.write(b": heartbeat\n\n")
+                else:
+                    item = next_event.result()
+                    if item is None:
+                        return
+                    event_id, event, data = item
+                    writer.write(f"id: {event_id}\nevent: {event}\ndata: {data}\n\n".encode('utf-8'))
+                await writer.drain()
+        finally:
+            disconnected.cancel()
+            events.unsubscribe(queue)
+
+    @staticmethod
+    def _keep_alive(headers):
+        connection = headers.get('connection', '').lower()
+        if headers['version'] == 'HTTP/1.0':
+            return connection == 'keep-alive'
+        return connection != 'close'
+
+    async def _dispatch(self, method, target, body):
+        self.stats['requests'] += 1
+        url = urlsplit(target)
+        if url.path == '/health':
+            return HTTPStatus.OK, {'status': 'ok'}
+        if url.path == '/stats':
+            return HTTPStatus.OK, {
+                'server': self.stats,
+                'response_cache': self.response_cache.stats,
+                'tracing': self.tracer.metrics()
+            }
+        if url.path == '/metrics':
+            return HTTPStatus.OK, self.tracer.metrics_text()
+        if url.path != '/graphql':
+            return HTTPStatus.NOT_FOUND, {'errors': [{'message': "Not found"}]}
+
+        try:
+            if method == 'POST':
+                params = json.loads(body or b'{}')
+                if not isinstance(params, dict):
+                    raise ValueError("Request body must be a JSON object")
+                allow_mutations = True
+            elif method == 'GET':
+                params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+                if 'variables' in params:
+                    params['variables'] = json.loads(params['variables'])
+                allow_mutations = False
+            else:
+                return HTTPStatus.METHOD_NOT_ALLOWED, {'errors': [{'message': "Use GET or POST"}]}
+
+            if not params.get('query'):
+                return HTTPStatus.BAD_REQUEST, {'errors': [{'message': "Missing query"}]}
+            return await self.respond(
+                params['query'],
+                params.get('variables'),
+                params.get('operationName'),
+                allow_mutations=allow_mutations
+            )
+        except ValueError as e:
+            return HTTPStatus.BAD_REQUEST, {'errors': [{'message': f"Invalid request: {e}"}]}
+        except HTTPError as e:
+            return e.status, {'errors': [{'message': str(e)}]}
+
+    @staticmethod
+    async def _write_response(writer, status, payload, keep_alive):
+        # JSON bodies come as dicts or, from the response cache, already encoded
+        if isinstance(payload, str):
+            body, content_type = payload.encode('utf-8'), 'text/plain; version=0.0.4'
+        else:
+            body = payload if isinstance(payload, bytes) else json.dumps(payload).encode('utf-8')
+            content_type = 'application/json'
+        head = (
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+            "\r\n"
+        )
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the todo GraphQL schema over HTTP")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--backend', choices=['sqlite', 'journal'],
+                        help="persistent store to serve (defaults to TODO_DB_PATH / TODO_JOURNAL_DIR, else in memory)")
+    parser.add_argument('--path', help="SQLite file or journal directory for --backend")
+    parser.add_argument('--workers', type=int, default=8, help="threads running store resolvers")
+    parser.add_argument('--max-depth', type=int, default=MAX_QUERY_DEPTH, help="deepest selection allowed")
+    parser.add_argument('--max-complexity', type=int, default=MAX_QUERY_COMPLEXITY,
+                        help="most fields an operation may resolve, counting list fields by their page size")
+    parser.add_argument('--trace-log', action='store_true', help="log every operation's trace as a JSON line")
+    args = parser.parse_args(argv)
+
+    backend, path = args.backend, args.path
+    if backend is None:
+        if os.environ.get('TODO_DB_PATH'):
+            backend, path = 'sqlite', os.environ['TODO_DB_PATH']
+        elif os.environ.get('TODO_JOURNAL_DIR'):
+            backend, path = 'journal', os.environ['TODO_JOURNAL_DIR']
+
+    logging.basicConfig(level=logging.INFO)
+    trace_logger.setLevel(logging.INFO if args.trace_log else logging.WARNING)
+    todo_manager = create_todo_manager(backend, path)
+    server = GraphQLServer(
+        todo_manager, args.host, args.port, workers=args.workers,
+        max_depth=args.max_depth, max_complexity=args.max_complexity
+    )
+
+    async def run():
+        await server.start()
+        logger.info("Serving GraphQL on http://%s:%s/graphql", server.host, server.port)
+        try:
+            await server.serve_forever()
+        finally:
+            # stops the event feed before the store it reads is closed
+            await server.close()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        todo_manager.store.close()
+
+
+if __name__ == "__main__":
+    main()
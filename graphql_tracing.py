@@ -0,0 +1,234 @@
+import bisect
+import inspect
+import json
+import logging
+import threading
+import time
+
+from graphql import FieldNode, FragmentSpreadNode, GraphQLError, OperationDefinitionNode
+
+from todo_graphql import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+
+trace_logger = logging.getLogger('graphql.trace')
+
+# upper bounds, in milliseconds, of the operation latency histogram buckets
+LATENCY_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# items assumed for list fields called without first; an unpaged getTodos
+# returns every todo and is costed as the largest page
+LIST_FIELD_SIZES = {'todos': DEFAULT_PAGE_SIZE, 'searchTodos': DEFAULT_PAGE_SIZE, 'getTodos': MAX_PAGE_SIZE}
+
+
+def _argument_value(node, name, variables):
+    for argument in node.arguments or ():
+        if argument.name.value == name:
+            value = argument.value
+            if value.kind == 'variable':
+                return (variables or {}).get(value.name.value)
+            return getattr(value, 'value', None)
+    return None
+
+
+def query_cost(document, operation_name=None, variables=None):
+    """(depth, complexity) of an operation, estimated from the document alone.
+
+    Every field costs 1; paged list fields multiply the cost of their
+    selections by first, or by LIST_FIELD_SIZES when first is not given.
+    """
+    fragments = {}
+    operation = None
+    for definition in document.definitions:
+        if isinstance(definition, OperationDefinitionNode):
+            if operation_name is None or (definition.name and definition.name.value == operation_name):
+                operation = operation or definition
+        else:
+            fragments[definition.name.value] = definition
+    if operation is None:
+        return 0, 0
+
+    def measure(selection_set, visited):
+        depth = complexity = 0
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                if selection.selection_set is None:
+                    child_depth, child_complexity = 0, 0
+                else:
+                    child_depth, child_complexity = measure(selection.selection_set, visited)
+                first = _argument_value(selection, 'first', variables)
+                if first is not None:
+                    # a negative first must not cancel out the cost of other fields
+                    multiplier = max(int(first), 0)
+                else:
+                    multiplier = LIST_FIELD_SIZES.get(selection.name.value, 1)
+                depth = max(depth, child_depth + 1)
+                complexity += 1 + multiplier * child_complexity
+            else:
+                if isinstance(selection, FragmentSpreadNode):
+                    name = selection.name.value
+                    if name in visited or name not in fragments:
+                        continue
+                    inner, inner_visited = fragments[name].selection_set, visited | {name}
+                else:
+                    inner, inner_visited = selection.selection_set, visited
+                child_depth, child_complexity = measure(inner, inner_visited)
+                depth = max(depth, child_depth)
+                complexity += child_complexity
+        return depth, complexity
+
+    return measure(operation.selection_set, frozenset())
+
+
+def check_query_cost(document, operation_name=None, variables=None, max_depth=None, max_complexity=None):
+    """Errors for an operation exceeding max_depth or max_complexity, empty if it is allowed"""
+    if max_depth is None and max_complexity is None:
+        return []
+    try:
+        depth, complexity = query_cost(document, operation_name, variables)
+    except (TypeError, ValueError):
+        # a malformed first argument; execution reports it properly
+        return []
+    errors = []
+    if max_depth is not None and depth > max_depth:
+        errors.append(GraphQLError(f"Query depth {depth} exceeds the limit of {max_depth}"))
+    if max_complexity is not None and complexity > max_complexity:
+        errors.append(GraphQLError(f"Query complexity {complexity} exceeds the limit of {max_complexity}"))
+    return errors
+
+
+class Tracer:
+    """Records resolver timings and operation latencies for GraphQL requests.
+
+    Use middleware() as execution middleware and pass the dict returned by
+    start() in the execution context; finish() then folds that request's
+    field timings into the running totals and, if trace_logger is enabled
+    for INFO, logs the trace as one JSON line. Fields using the default
+    resolver are not timed unless trace_default_resolvers is set. Operation
+    names come from clients, so only the first max_operations are tracked
+    separately and the rest are totalled as 'other'.
+    """
+
+    def __init__(self, trace_default_resolvers=False, slow_fields_logged=10, max_operations=100):
+        self.trace_default_resolvers = trace_default_resolvers
+        self.slow_fields_logged = slow_fields_logged
+        self.max_operations = max_operations
+        self._lock = threading.Lock()
+        # 'Type.field' -> [count, total seconds, max seconds]
+        self._fields = {}
+        # operation name -> {'count', 'errors', 'total', 'buckets'}
+        self._operations = {}
+
+    def start(self, operation_name=None):
+        """Per-request trace state, to be stored in the execution context as 'trace'"""
+        return {'operation': operation_name or 'anonymous', 'start': time.perf_counter(), 'fields': []}
+
+    def middleware(self):
+        trace_default_resolvers = self.trace_default_resolvers
+
+        def middleware(next_, root, info, **args):
+            trace = info.context.get('trace') if isinstance(info.context, dict) else None
+            if trace is None or not (trace_default_resolvers
+                                     or info.parent_type.fields[info.field_name].resolve is not None):
+                return next_(root, info, **args)
+
+            name = f"{info.parent_type.name}.{info.field_name}"
+            start = time.perf_counter()
+            try:
+                result = next_(root, info, **args)
+            except Exception:
+                # failing resolvers are timed too
+                trace['fields'].append((name, info.path.as_list(), time.perf_counter() - start))
+                raise
+            if not inspect.isawaitable(result):
+                trace['fields'].append((name, info.path.as_list(), time.perf_counter() - start))
+                return result
+
+            async def timed():
+                try:
+                    return await result
+                finally:
+                    trace['fields'].append((name, info.path.as_list(), time.perf_counter() - start))
+
+            return timed()
+
+        return middleware
+
+    def finish(self, trace, errors=None, cached=False):
+        """Fold a request into the totals; cached requests were answered without executing"""
+        duration = time.perf_counter() - trace['start']
+        with self._lock:
+            for name, _, elapsed in trace['fields']:
+                stats = self._fields.get(name)
+                if stats is None:
+                    self._fields[name] = [1, elapsed, elapsed]
+                else:
+                    stats[0] += 1
+                    stats[1] += elapsed
+                    stats[2] = max(stats[2], elapsed)
+
+            name = trace['operation']
+            if name not in self._operations and len(self._operations) >= self.max_operations:
+                name = 'other'
+            operation = self._operations.get(name)
+            if operation is None:
+                operation = self._operations[name] = {
+                    'count': 0, 'errors': 0, 'total': 0.0, 'buckets': [0] * (len(LATENCY_BUCKETS_MS) + 1)
+                }
+            operation['count'] += 1
+            operation['errors'] += 1 if errors else 0
+            operation['total'] += duration
+            operation['buckets'][bisect.bisect_left(LATENCY_BUCKETS_MS, duration * 1000)] += 1
+
+        if trace_logger.isEnabledFor(logging.INFO):
+            slowest = sorted(trace['fields'], key=lambda field: field[2], reverse=True)[:self.slow_fields_logged]
+            trace_logger.info(json.dumps({
+                'operation': trace['operation'],
+                'duration_ms': round(duration * 1000, 3),
+                'cached': cached,
+                'errors': len(errors or ()),
+                'fields': [
+                    {'field': name, 'path': path, 'duration_ms': round(elapsed * 1000, 3)}
+                    for name, path, elapsed in slowest
+                ]
+            }))
+        return duration
+
+    def metrics(self):
+        """Totals so far, as a JSON-friendly dict"""
+        with self._lock:
+            return {
+                'operations': {
+                    name: {
+                        'count': stats['count'],
+                        'errors': stats['errors'],
+                        'total_ms': round(stats['total'] * 1000, 3),
+                        'latency_buckets_ms': dict(zip([str(bound) for bound in LATENCY_BUCKETS_MS] + ['+Inf'],
+                                                       stats['buckets']))
+                    }
+                    for name, stats in self._operations.items()
+                },
+                'fields': {
+                    name: {'count': count, 'total_ms': round(total * 1000, 3), 'max_ms': round(longest * 1000, 3)}
+                    for name, (count, total, longest) in self._fields.items()
+                }
+            }
+
+    def metrics_text(self):
+        """Totals so far in the Prometheus text format"""
+        lines = []
+        with self._lock:
+            for name, stats in sorted(self._operations.items()):
+                labels = f'operation="{name}"'
+                cumulative = 0
+                for bound, count in zip(list(LATENCY_BUCKETS_MS) + ['+Inf'], stats['buckets']):
+                    cumulative += count
+                    upper = bound if bound == '+Inf' else bound / 1000
+                    lines.append(f'graphql_operation_seconds_bucket{{{labels},le="{upper}"}} {cumulative}')
+                lines.append(f'graphql_operation_seconds_sum{{{labels}}} {stats["total"]:.6f}')
+                lines.append(f'graphql_operation_seconds_count{{{labels}}} {stats["count"]}')
+                lines.append(f'graphql_operation_errors_total{{{labels}}} {stats["errors"]}')
+            for name, (count, total, longest) in sorted(self._fields.items()):
+                labels = f'field="{name}"'
+                lines.append(f'graphql_resolver_seconds_sum{{{labels}}} {total:.6f}')
+                lines.append(f'graphql_resolver_seconds_count{{{labels}}} {count}')
+                lines.append(f'graphql_resolver_seconds_max{{{labels}}} {longest:.6f}')
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,207 @@
+import heapq
+import itertools
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_notification_dispatcher():
+    """The process-wide dispatcher delivering to the desktop, created on first use"""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = NotificationDispatcher([DesktopChannel()])
+        return _dispatcher
+
+
+class DesktopChannel:
+    """Desktop notifications through plyer"""
+
+    def __init__(self, timeout=10):
+        self.timeout = timeout
+
+    def send(self, user, title, message):
+        from plyer import notification
+
+        notification.notify(
+            title=title,
+            message=message,
+            app_icon=None,
+            timeout=self.timeout  # seconds
+        )
+
+
+class InMemoryChannel:
+    """Records notifications instead of sending them, for tests.
+
+    The first fail_times sends raise, to exercise retries.
+    """
+
+    def __init__(self, fail_times=0):
+        self.sent = []
+        self.fail_times = fail_times
+        self._lock = threading.Lock()
+
+    def send(self, user, title, message):
+        with self._lock:
+            if self.fail_times > 0:
+                self.fail_times -= 1
+                raise RuntimeError("Simulated delivery failure")
+            self.sent.append({'user': user, 'title': title, 'message': message})
+
+
+def format_notification(todos, max_listed=5):
+    """Title and message for one todo, or a summary for several"""
+    if len(todos) == 1:
+        todo = todos[0]
+        return 'Todo Due Soon!', (
+            f"Title: {todo['title']}\nDescription: {todo['description']}\nPriority: {todo['priority']}"
+        )
+
+    lines = [f"- {todo['title']} ({todo['priority']})" for todo in todos[:max_listed]]
+    if len(todos) > max_listed:
+        lines.append(f"...and {len(todos) - max_listed} more")
+    return f'{len(todos)} Todos Due Soon!', '\n'.join(lines)
+
+
+class NotificationDispatcher:
+    """Delivers reminders off the caller's thread.
+
+    Reminders submitted for a user within coalesce_window seconds are merged
+    into one summary notification. Each user gets at most rate_limit
+    notifications per rate_period seconds; reminders arriving while a user
+    is rate limited join the waiting batch. Failed sends are retried with
+    exponential backoff up to max_retries times.
+    """
+
+    def __init__(self, channels, workers=2, coalesce_window=2.0, rate_limit=5, rate_period=60.0,
+                 max_retries=3, backoff=1.0):
+        self.channels = list(channels)
+        self.coalesce_window = coalesce_window
+        self.rate_limit = rate_limit
+        self.rate_period = rate_period
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.stats = {'submitted': 0, 'notifications': 0, 'sent': 0, 'retried': 0, 'failed': 0}
+
+        self._condition = threading.Condition()
+        self._stopping = False
+        # user -> todos waiting to be sent together
+        self._pending = {}
+        # user -> (tokens, last refill time)
+        self._tokens = {}
+        # (run at, tiebreak, kind, payload) for batch flushes and retries
+        self._timers = []
+        self._tiebreak = itertools.count()
+        self._jobs = queue.Queue()
+
+        self._timer_thread = threading.Thread(target=self._run_timers, name='notification-timers', daemon=True)
+        self._timer_thread.start()
+        self._workers = [
+            threading.Thread(target=self._run_worker, name=f'notification-worker-{i}', daemon=True)
+            for i in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, user, todos):
+        """Queue reminders for a user; returns immediately"""
+        if not todos:
+            return
+        with self._condition:
+            self.stats['submitted'] += len(todos)
+            if user not in self._pending:
+                self._pending[user] = []
+                self._push_timer(time.monotonic() + self.coalesce_window, 'flush', user)
+            self._pending[user].extend(todos)
+
+    def _push_timer(self, run_at, kind, payload):
+        heapq.heappush(self._timers, (run_at, next(self._tiebreak), kind, payload))
+        self._condition.notify_all()
+
+    def _take_token(self, user, now):
+        """Take a rate-limit token, or return how long until one is available"""
+        tokens, last = self._tokens.get(user, (self.rate_limit, now))
+        tokens = min(self.rate_limit, tokens + (now - last) * self.rate_limit / self.rate_period)
+        if tokens >= 1:
+            self._tokens[user] = (tokens - 1, now)
+            return 0
+        self._tokens[user] = (tokens, now)
+        return (1 - tokens) * self.rate_period / self.rate_limit
+
+    def _flush_user(self, user, now, ignore_rate_limit=False):
+        if user not in self._pending:
+            return
+        wait = 0 if ignore_rate_limit else self._take_token(user, now)
+        if wait:
+            self._push_timer(now + wait, 'flush', user)
+            return
+        todos = self._pending.pop(user, None)
+        if not todos:
+            return
+        title, message = format_notification(todos)
+        self.stats['notifications'] += 1
+        for channel in self.channels:
+            self._jobs.put({'channel': channel, 'user': user, 'title': title, 'message': message, 'attempt': 0})
+
+    def _run_timers(self):
+        while True:
+            with self._condition:
+                while not self._stopping and (not self._timers or self._timers[0][0] > time.monotonic()):
+                    timeout = self._timers[0][0] - time.monotonic() if self._timers else None
+                    self._condition.wait(timeout)
+                if self._stopping:
+                    return
+                _, _, kind, payload = heapq.heappop(self._timers)
+                if kind == 'flush':
+                    self._flush_user(payload, time.monotonic())
+                else:
+                    self._jobs.put(payload)
+
+    def _run_worker(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            try:
+                job['channel'].send(job['user'], job['title'], job['message'])
+            except Exception:
+                with self._condition:
+                    if job['attempt'] < self.max_retries and not self._stopping:
+                        self.stats['retried'] += 1
+                        delay = self.backoff * 2 ** job['attempt']
+                        self._push_timer(time.monotonic() + delay, 'retry', dict(job, attempt=job['attempt'] + 1))
+                    else:
+                        self.stats['failed'] += 1
+                        logger.exception("Giving up on notification for %s", job['user'])
+            else:
+                with self._condition:
+                    self.stats['sent'] += 1
+            finally:
+                self._jobs.task_done()
+
+    def flush(self):
+        """Send every waiting batch now, ignoring the window and rate limit, and wait for delivery"""
+        with self._condition:
+            now = time.monotonic()
+            for user in list(self._pending):
+                self._flush_user(user, now, ignore_rate_limit=True)
+        self._jobs.join()
+
+    def shutdown(self):
+        """Deliver what is waiting, then stop the threads"""
+        self.flush()
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        for _ in self._workers:
+            self._jobs.put(None)
+        self._timer_thread.join()
+        for worker in self._workers:
+            worker.join()
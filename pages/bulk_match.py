@@ -0,0 +1,193 @@
+import csv
+import functools
+import io
+import os
+import threading
+
+import pandas as pd
+import streamlit as st
+
+from vehicle_match import create_matcher
+
+CHUNK_SIZE = 1000
+PREVIEW_ROWS = 50
+
+
+def count_csv_rows(data):
+    """Data rows of a CSV, not counting the header, blank lines or line breaks inside quoted fields"""
+    reader = csv.reader(io.TextIOWrapper(io.BytesIO(data), encoding='utf-8-sig', errors='replace', newline=''))
+    return max(sum(1 for row in reader if row) - 1, 0)
+
+
+@st.cache_resource
+def get_matcher():
+    """One matcher per process, shared by every session; thresholds are passed per job"""
+    return create_matcher(catalog_path=os.environ.get('VEHICLE_CATALOG'))
+
+
+class BulkMatchJob:
+    """Match a CSV column in chunks on a background thread"""
+
+    def __init__(self, matcher, data, column, accept_threshold=None, reject_threshold=None,
+                 chunk_size=CHUNK_SIZE):
+        self.matcher = matcher
+        self.data = data
+        self.column = column
+        self.accept_threshold = accept_threshold
+        self.reject_threshold = reject_threshold
+        self.chunk_size = chunk_size
+        self.total_rows = None
+        self.processed = 0
+        self.results = []
+        self.unmatched = []
+        self.error = None
+        self.done = False
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        """Start matching in a daemon thread"""
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        """Stop after the current chunk"""
+        self._cancelled.set()
+
+    def _run(self):
+        try:
+            # count rows up front so the progress bar has a denominator
+            self.total_rows = count_csv_rows(self.data)
+            reader = pd.read_csv(
+                io.BytesIO(self.data),
+                usecols=[self.column],
+                dtype=str,
+                chunksize=self.chunk_size,
+                keep_default_na=False
+            )
+            for chunk in reader:
+                if self._cancelled.is_set():
+                    break
+                matched, unmatched = self.matcher.route_matches(
+                    chunk[self.column], self.accept_threshold, self.reject_threshold
+                )
+                rows = [
+                    {'input': value, 'match': best_match, 'confidence': round(confidence, 2)}
+                    for value, best_match, confidence in matched
+                ]
+                with self._lock:
+                    self.results.extend(rows)
+                    self.unmatched.extend({'input': value} for value in unmatched)
+                    self.processed += len(chunk)
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            self.done = True
+
+    @property
+    def progress(self):
+        if self.done:
+            return 1.0
+        if not self.total_rows:
+            return 0.0
+        return min(self.processed / self.total_rows, 1.0)
+
+    def preview(self, rows=PREVIEW_ROWS):
+        """Most recent results, for display while the job runs"""
+        with self._lock:
+            return pd.DataFrame(self.results[-rows:])
+
+    def to_csv(self, unmatched=False):
+        with self._lock:
+            rows = self.unmatched if unmatched else self.results
+            return pd.DataFrame(rows).to_csv(index=False).encode('utf-8')
+
+
+def show_progress(job):
+    st.progress(job.progress, text=f"Processed {job.processed:,} of {job.total_rows or 0:,} rows "
+                                   f"({len(job.unmatched):,} unmatched)")
+    st.dataframe(job.preview(), width='stretch')
+
+
+@st.fragment(run_every=1)
+def poll_running_job():
+    """Progress of the running job, refreshed every second until it finishes"""
+    job = st.session_state.get('bulk_match_job')
+    if job is None:
+        return
+    if job.done:
+        # a full rerun shows the results and stops polling
+        st.rerun()
+    show_progress(job)
+    if st.button("⏹️ Cancel"):
+        job.cancel()
+
+
+def show_job_results(job):
+    show_progress(job)
+    if job.error:
+        st.error(f"Matching failed: {job.error}")
+        return
+    st.success("Matching finished")
+    # CSVs are only built when a download button is clicked
+    st.download_button("⬇️ Download Matches", job.to_csv, file_name="matches.csv", mime="text/csv",
+                       on_click='ignore')
+    if job.unmatched:
+        st.download_button(
+            "⬇️ Download Unmatched for Review",
+            functools.partial(job.to_csv, unmatched=True),
+            file_name="unmatched.csv",
+            mime="text/csv",
+            on_click='ignore'
+        )
+
+
+def main():
+    st.set_page_config(
+        page_title="Bulk Vehicle Matching",
+        page_icon=":mag:",
+        layout="wide"
+    )
+
+    if 'user' not in st.session_state:
+        st.warning("Please log in on the main page first.")
+        return
+
+    st.title("🚗 Bulk Vehicle Matching")
+
+    uploaded = st.file_uploader("Upload a CSV of dealer strings", type="csv")
+    if uploaded is None:
+        return
+
+    data = uploaded.getvalue()
+    columns = list(pd.read_csv(io.BytesIO(data), nrows=0).columns)
+    if not columns:
+        st.error("The uploaded file has no columns")
+        return
+    column = st.selectbox("Column to match", columns)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        accept_threshold = st.slider("Accept threshold", 0, 100, 98,
+                                     help="Stop scanning once a candidate scores at least this much")
+    with col2:
+        reject_threshold = st.slider("Reject threshold", 0, 100, 60,
+                                     help="Rows scoring below this go to the unmatched output")
+
+    job = st.session_state.get('bulk_match_job')
+    running = job is not None and not job.done
+    if st.button("▶️ Start Matching", disabled=running):
+        job = BulkMatchJob(get_matcher(), data, column, accept_threshold, reject_threshold)
+        job.start()
+        st.session_state.bulk_match_job = job
+
+    if job is None:
+        return
+    if job.done:
+        show_job_results(job)
+    else:
+        poll_running_job()
+
+
+main()
@@ -0,0 +1,284 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+import weakref
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_reminder_service():
+    """The process-wide reminder service, created on first use"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = ReminderService()
+        return _service
+
+
+def reminder_timestamp(todo):
+    """Reminder time of a todo as a timestamp, or None"""
+    # naive reminder times are local, as entered in the UI
+    if not todo.get('reminder_datetime'):
+        return None
+    try:
+        return datetime.fromisoformat(todo['reminder_datetime']).timestamp()
+    except ValueError:
+        return None
+
+
+class ReminderService:
+    """One reminder thread and one due-time heap for every todo manager.
+
+    Todo managers are tracked through their change events, and each one can
+    have any number of subscribers that reminders are delivered to, once per
+    subscriber. Subscribers are keyed by owner, a user for the app, so
+    several sessions of one user subscribing get each reminder once; the
+    subscription lasts until all of them unsubscribe. Bound-method delivers
+    are held weakly, so a session that ends without unsubscribing drops out,
+    and the state of a collected todo manager is pruned. The thread sleeps
+    on a condition until the next reminder is due or the schedule changes,
+    so idle cost doesn't grow with sessions.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._thread = None
+        self._stopping = False
+        # (due timestamp, tiebreak, manager key, todo id); dropped lazily
+        self._heap = []
+        self._tiebreak = itertools.count()
+        # (manager key, todo id) -> due timestamp of its live heap entry
+        self._scheduled = {}
+        # (manager key, todo id) pairs whose reminder already fired
+        self._fired = set()
+        self._manager_keys = weakref.WeakKeyDictionary()
+        self._managers = weakref.WeakValueDictionary()
+        self._next_manager_key = itertools.count()
+        # manager key -> {owner: [reference to deliver(todos), one per subscription]}
+        self._subscribers = {}
+        # manager key -> ids of fired reminders nobody was subscribed to yet
+        self._undelivered = {}
+        # keys of collected managers, appended by finalizers and pruned under the lock
+        self._dead_keys = []
+
+    def track(self, todo_manager):
+        """Start following a todo manager's reminders, returning its key"""
+        with self._condition:
+            if todo_manager in self._manager_keys:
+                return self._manager_keys[todo_manager]
+            self._prune_dead_managers()
+            key = next(self._next_manager_key)
+            self._manager_keys[todo_manager] = key
+            self._managers[key] = todo_manager
+            weakref.finalize(todo_manager, self._dead_keys.append, key)
+
+        for todo in todo_manager.todos:
+            self._schedule(key, todo)
+        todo_manager.add_listener(lambda event, todo: self._on_todo_event(key, event, todo))
+        return key
+
+    def subscribe(self, owner, todo_manager, deliver):
+        """Deliver reminders of todo_manager to owner via deliver(todos).
+
+        An owner subscribed several times gets each reminder once, through
+        the deliver of its earliest subscription still alive.
+        """
+        key = self.track(todo_manager)
+        try:
+            # a bound method must not keep its session alive
+            reference = weakref.WeakMethod(deliver)
+        except TypeError:
+            def reference():
+                return deliver
+        with self._condition:
+            self._subscribers.setdefault(key, {}).setdefault(owner, []).append(reference)
+            if key in self._undelivered:
+                self._condition.notify_all()
+        self._ensure_thread()
+
+    def unsubscribe(self, owner, todo_manager, deliver=None):
+        """Drop one subscription of owner, the one made with deliver if given"""
+        with self._condition:
+            key = self._manager_keys.get(todo_manager)
+            references = self._subscribers.get(key, {}).get(owner)
+            if not references:
+                return
+            for index, reference in enumerate(references):
+                if deliver is None or reference() == deliver:
+                    del references[index]
+                    break
+            self._deliver_of(key, owner)
+
+    def is_subscribed(self, owner, todo_manager):
+        with self._condition:
+            key = self._manager_keys.get(todo_manager)
+            return self._deliver_of(key, owner) is not None
+
+    def _deliver_of(self, key, owner):
+        """The live deliver of an owner's subscriptions, dropping dead ones and empty owners"""
+        subscribers = self._subscribers.get(key)
+        if subscribers is None or owner not in subscribers:
+            return None
+        references = subscribers[owner]
+        while references and references[0]() is None:
+            del references[0]
+        if references:
+            return references[0]()
+        del subscribers[owner]
+        if not subscribers:
+            del self._subscribers[key]
+        return None
+
+    def _prune_dead_managers(self):
+        # called with the lock held
+        dead = set()
+        while self._dead_keys:
+            dead.add(self._dead_keys.pop())
+        if not dead:
+            return
+        for key in dead:
+            self._subscribers.pop(key, None)
+            self._undelivered.pop(key, None)
+        # their heap entries are no longer live and get dropped lazily
+        self._scheduled = {entry_key: due for entry_key, due in self._scheduled.items() if entry_key[0] not in dead}
+        self._fired = {entry_key for entry_key in self._fired if entry_key[0] not in dead}
+
+    @property
+    def thread_count(self):
+        return 1 if self._thread is not None and self._thread.is_alive() else 0
+
+    def _schedule(self, key, todo):
+        entry_key = (key, todo['id'])
+        with self._condition:
+            due = None if todo['completed'] or entry_key in self._fired else reminder_timestamp(todo)
+            if due is None:
+                self._scheduled.pop(entry_key, None)
+                return
+            if self._scheduled.get(entry_key) == due:
+                return
+            self._scheduled[entry_key] = due
+            heapq.heappush(self._heap, (due, next(self._tiebreak), key, todo['id']))
+            # wake the thread if this is now the earliest reminder
+            if self._heap[0][3] == todo['id']:
+                self._condition.notify_all()
+
+    def _on_todo_event(self, key, event, todo):
+        # undelivered reminders are filtered when delivered, not here
+        if event == 'deleted':
+            with self._condition:
+                self._scheduled.pop((key, todo['id']), None)
+                self._fired.discard((key, todo['id']))
+        else:
+            self._schedule(key, todo)
+
+    def _is_live(self, entry):
+        due, _, key, todo_id = entry
+        return self._scheduled.get((key, todo_id)) == due
+
+    def _pop_due(self, now):
+        """Pop live reminders due at or before now, grouped by manager key"""
+        due_ids = {}
+        while self._heap and self._heap[0][0] <= now:
+            entry = heapq.heappop(self._heap)
+            if self._is_live(entry):
+                _, _, key, todo_id = entry
+                del self._scheduled[(key, todo_id)]
+                self._fired.add((key, todo_id))
+                due_ids.setdefault(key, []).append(todo_id)
+        return due_ids
+
+    def _next_due(self):
+        """Timestamp of the earliest live reminder, or None"""
+        while self._heap and not self._is_live(self._heap[0]):
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def check_due(self, todo_manager=None, deliver=None, owner=None):
+        """Fire every due reminder to its subscribers.
+
+        Reminders of todo_manager are also passed to deliver, if given and
+        owner is not already subscribed, which backs the manual check button.
+        """
+        with self._condition:
+            self._prune_dead_managers()
+            due_ids = self._pop_due(time.time())
+            requested_key = self._manager_keys.get(todo_manager) if todo_manager is not None else None
+            deliveries = []
+            for key in set(due_ids) | set(self._undelivered):
+                if key not in self._managers:
+                    # collected before its finalizer ran
+                    self._undelivered.pop(key, None)
+                    continue
+                live = {}
+                for subscriber in list(self._subscribers.get(key, {})):
+                    subscriber_deliver = self._deliver_of(key, subscriber)
+                    if subscriber_deliver is not None:
+                        live[subscriber] = subscriber_deliver
+                delivers = list(live.values())
+                if (key == requested_key and deliver is not None
+                        and deliver not in delivers and (owner is None or owner not in live)):
+                    delivers.append(deliver)
+                if not delivers:
+                    # keep them until someone subscribes or checks manually
+                    if key in due_ids:
+                        self._undelivered.setdefault(key, []).extend(due_ids[key])
+                    continue
+                todo_ids = self._undelivered.pop(key, []) + due_ids.get(key, [])
+                deliveries.append((self._managers.get(key), todo_ids, delivers))
+
+        fired = []
+        for manager, todo_ids, delivers in deliveries:
+            if manager is None:
+                continue
+            todos = [todo for todo in map(manager.get_todo, todo_ids) if todo is not None and not todo['completed']]
+            if not todos:
+                continue
+            for deliver_todos in delivers:
+                try:
+                    deliver_todos(todos)
+                except Exception:
+                    # one failing subscriber must not stop the others
+                    logger.exception("Reminder delivery failed")
+            if manager is todo_manager:
+                fired.extend(todos)
+        return fired
+
+    def _ensure_thread(self):
+        with self._condition:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name='reminder-service', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if self._stopping:
+                    return
+                next_due = self._next_due()
+                if any(key in self._subscribers for key in self._undelivered):
+                    # held reminders got a subscriber, possibly before this thread started
+                    pass
+                elif next_due is None:
+                    self._condition.wait()
+                elif next_due > time.time():
+                    self._condition.wait(next_due - time.time())
+                if self._stopping:
+                    return
+            self.check_due()
+
+    def shutdown(self):
+        """Stop the reminder thread"""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -1,204 +1,68 @@
 import streamlit as st
 import uuid
-from graphql import (GraphQLObjectType, GraphQLString, GraphQLSchema, 
-                     GraphQLField, GraphQLList, GraphQLArgument, execute)
-from graphql.language import parse
 from datetime import datetime, timedelta
-import pytz
 import plotly.express as px
 import pandas as pd
-from plyer import notification
-import threading
-import time
+import os
+import io
+import atexit
+import tempfile
+from todo_manager import TodoManager, create_todo_manager
+from todo_io import FORMATS, detect_format, export_todos, import_todos
+from reminder_service import get_reminder_service
+from notification_dispatch import get_notification_dispatcher
+from todo_graphql import execute_operation
 
 class NotificationManager:
-    def __init__(self, todo_manager):
+    """Per-session handle on the process-wide reminder service.
+
+    Starting notifications subscribes the owner, the logged-in user, to the
+    todo manager's reminders; the service runs a single thread for every
+    session and delivers each reminder once per user. The service only holds
+    this object weakly, so the subscription ends with the session.
+    """
+
+    def __init__(self, todo_manager, owner=None, service=None, dispatcher=None):
         self.todo_manager = todo_manager
-        self.notification_thread = None
-        self.stop_notifications = False
+        self.owner = owner or str(uuid.uuid4())
+        self.service = service or get_reminder_service()
+        self.dispatcher = dispatcher or get_notification_dispatcher()
+        self.subscribed = False
+        self.service.track(todo_manager)
 
     def send_todo_notification(self, todos):
-        """Send desktop notifications for due todos"""
-        for todo in todos:
-            notification.notify(
-                title='Todo Due Soon!',
-                message=f"Title: {todo['title']}\nDescription: {todo['description']}\nPriority: {todo['priority']}",
-                app_icon=None,
-                timeout=10  # seconds
-            )
+        """Queue notifications for due todos; the dispatcher coalesces and sends them"""
+        self.dispatcher.submit(self.owner, todos)
 
     def check_due_todos(self):
-        """Check todos with pending reminders and send notifications."""
-        current_time = datetime.now(pytz.UTC)
-        due_reminders = []
-
-        for todo in self.todo_manager.todos:
-            if todo['reminder_datetime']:
-                reminder_time = datetime.fromisoformat(todo['reminder_datetime'])
-                # Trigger notification if it's time for the reminder
-                if reminder_time <= current_time and not todo['completed']:
-                    due_reminders.append(todo)
-
-        if due_reminders:
-            self.send_todo_notification(due_reminders)
-
-    def start_notification_service(self, interval=300):  # Check every 5 minutes
-        """Start background notification service"""
-        def notification_loop():
-            while not self.stop_notifications:
-                self.check_due_todos()
-                time.sleep(interval)
-
-        self.notification_thread = threading.Thread(target=notification_loop, daemon=True)
-        self.notification_thread.start()
-
-    def stop_notification_service(self):
-        """Stop the notification service"""
-        self.stop_notifications = True
-        if self.notification_thread:
-            self.notification_thread.join()
-
-class TodoManager:
-    def __init__(self):
-        self.todos = []
-        self.categories = ['Personal', 'Education', 'Work', 'Shopping', 'Health', 'Other']
-        
-
-    def add_todo(self, title, description, priority, due_date, category, reminder_datetime=None):
-        """Add a new todo with more detailed information"""
-        todo = {
-            'id': str(uuid.uuid4()),  # Use UUID for unique IDs
-            'unique_id': str(uuid.uuid4()), # Use UUID for unique IDs
-            'title': title,
-            'description': description,
-            'priority': priority,
-            'due_date': due_date,
-            'category': category,
-            'created_at': datetime.now(pytz.UTC).isoformat(),
-            'completed': False,
-            'reminder_datetime': reminder_datetime
-        }
-        self.todos.append(todo)
-        return todo
-
-    def get_todos(self, filter_completed=None, sort_by=None, category=None):
-        """Retrieve todos with optional filtering and sorting"""
-        filtered_todos = self.todos
-        
-        if filter_completed is not None:
-            filtered_todos = [todo for todo in filtered_todos if todo['completed'] == filter_completed]
-        
-        if category:
-            filtered_todos = [todo for todo in filtered_todos if todo['category'].lower() == category.lower()]
-
-        if sort_by == 'priority':
-            filtered_todos.sort(key=lambda x: ['low', 'medium', 'high'].index(x['priority']))
-        elif sort_by == 'due_date':
-            filtered_todos.sort(key=lambda x: x['due_date'])
-        
-        return filtered_todos
-
-    def update_todo_status(self, todo_id, completed):
-        """Update the completion status of a todo"""
-        for todo in self.todos:
-            if todo['id'] == todo_id:
-                todo['completed'] = completed
-                return todo
-        return None
-
-    def delete_todo(self, todo_id):
-        """Delete a todo by its ID"""
-        self.todos = [todo for todo in self.todos if todo['id'] != todo_id]
-        return "Deleted"
-
-    def get_todos_data_for_visualization(self):
-        """Prepare todos data for visualization"""
-        completed = len([todo for todo in self.todos if todo['completed']])
-        pending = len([todo for todo in self.todos if not todo['completed']])
-        
-        priority_data = {}
-        for priority in ['low', 'medium', 'high']:
-            priority_data[priority] = {
-                'completed': len([todo for todo in self.todos if todo['completed'] and todo['priority'] == priority]),
-                'pending': len([todo for todo in self.todos if not todo['completed'] and todo['priority'] == priority])
-            }
-
-        return {
-            'status': [
-                {'Status': 'Completed', 'Count': completed},
-                {'Status': 'Pending', 'Count': pending}
-            ],
-            'priority': priority_data
-        }
+        """Send notifications for reminders that are due and have not fired yet."""
+        return self.service.check_due(self.todo_manager, self.send_todo_notification, self.owner)
 
-def get_graphql_schema(todo_manager):
-    TodoType = GraphQLObjectType(
-        name='Todo',
-        fields={
-            'id': GraphQLField(GraphQLString),
-            'title': GraphQLField(GraphQLString),
-            'description': GraphQLField(GraphQLString),
-            'priority': GraphQLField(GraphQLString),
-            'due_date': GraphQLField(GraphQLString),
-            'created_at': GraphQLField(GraphQLString),
-            'completed': GraphQLField(GraphQLString)
-        }
-    )
+    def start_notification_service(self, interval=None):
+        """Subscribe this session's owner to reminder notifications"""
+        if not self.subscribed:
+            self.service.subscribe(self.owner, self.todo_manager, self.send_todo_notification)
+            self.subscribed = True
 
-    QueryType = GraphQLObjectType(
-        name='Query',
-        fields={
-            'getTodos': GraphQLField(
-                GraphQLList(TodoType),
-                resolve=lambda obj, info: todo_manager.todos
-            )
-        }
-    )
+    def stop_notification_service(self):
+        """Drop this session's subscription; the owner's other sessions keep theirs"""
+        if self.subscribed:
+            self.service.unsubscribe(self.owner, self.todo_manager, self.send_todo_notification)
+            self.subscribed = False
 
-    MutationType = GraphQLObjectType(
-        name='Mutation',
-        fields={
-            'addTodo': GraphQLField(
-                TodoType,
-                args={
-                    'title': GraphQLArgument(GraphQLString),
-                    'description': GraphQLArgument(GraphQLString),
-                    'priority': GraphQLArgument(GraphQLString),
-                    'due_date': GraphQLArgument(GraphQLString),
-                },
-                resolve=lambda obj, info, **kwargs: 
-                    todo_manager.add_todo(
-                        kwargs['title'], 
-                        kwargs['description'], 
-                        kwargs.get('priority', 'medium'),
-                        kwargs.get('due_date', datetime.now(pytz.UTC).isoformat())
-                    )
-            ),
-            'deleteTodo': GraphQLField(
-                GraphQLString,
-                args={'id': GraphQLArgument(GraphQLString)},
-                resolve=lambda obj, info, id: todo_manager.delete_todo(id)
-            ),
-            'updateTodoStatus': GraphQLField(
-                TodoType,
-                args={
-                    'id': GraphQLArgument(GraphQLString),
-                    'completed': GraphQLArgument(GraphQLString)
-                },
-                resolve=lambda obj, info, id, completed: 
-                    todo_manager.update_todo_status(id, completed == 'true')
-            )
-        }
-    )
+# analytics figures kept across sessions; each manager only ever needs its
+# latest version, so this bounds memory at a few figures per live manager
+ANALYTICS_CACHE_ENTRIES = 64
 
-    return GraphQLSchema(query=QueryType, mutation=MutationType)
+@st.cache_resource(max_entries=ANALYTICS_CACHE_ENTRIES, show_spinner=False)
+def build_todo_figures(_todo_manager, epoch, version, user):
+    """Status pie and priority bar figures, rebuilt only when the store version changes.
 
-def create_todo_visualizations(todo_manager):
-    """Create visualizations for todo status and priority"""
-    data = todo_manager.get_todos_data_for_visualization()
+    Keyed by the logged-in username as well, so users never share figures.
+    """
+    data = _todo_manager.get_todos_data_for_visualization()
 
     # Status Pie Chart
-    st.subheader("Todo Status Overview")
     status_fig = px.pie(
         data['status'], 
         values='Count', 
@@ -207,10 +71,8 @@ def create_todo_visualizations(todo_manager):
         color='Status',
         color_discrete_map={'Completed': 'green', 'Pending': 'red'}
     )
-    st.plotly_chart(status_fig)
 
     # Priority Bar Chart
-    st.subheader("Todo Priority Breakdown")
     priority_data = []
     for priority, counts in data['priority'].items():
         priority_data.extend([
@@ -227,8 +89,345 @@ def create_todo_visualizations(todo_manager):
         title='Todos by Priority and Status',
         barmode='group'
     )
+    return status_fig, priority_fig
+
+def create_todo_visualizations(todo_manager, user=None):
+    """Create visualizations for todo status and priority"""
+    status_fig, priority_fig = build_todo_figures(todo_manager, todo_manager.epoch, todo_manager.version, user)
+
+    st.subheader("Todo Status Overview")
+    st.plotly_chart(status_fig)
+
+    st.subheader("Todo Priority Breakdown")
     st.plotly_chart(priority_fig)
 
+# Widget callbacks run before the rerun that follows an interaction, so the
+# fragment re-renders with the change already applied and needs no st.rerun()
+def update_todo_status(todo_manager, todo_id, checkbox_key):
+    execute_operation(
+        todo_manager,
+        'UpdateTodoStatus',
+        id=todo_id,
+        completed=str(st.session_state[checkbox_key]).lower()
+    )
+
+def delete_todo(todo_manager, todo_id):
+    execute_operation(todo_manager, 'DeleteTodo', id=todo_id)
+
+def apply_table_edits(todo_manager, todos, editor_key):
+    """Send every edit made to the todo grid as one batch of each mutation"""
+    updates = []
+    deletes = []
+    for row, changes in st.session_state[editor_key]['edited_rows'].items():
+        todo = todos[int(row)]
+        if changes.get('Delete'):
+            deletes.append(todo['id'])
+        elif 'Done' in changes and changes['Done'] != todo['completed']:
+            updates.append({'id': todo['id'], 'completed': changes['Done']})
+    if updates:
+        execute_operation(todo_manager, 'UpdateTodoStatuses', updates=updates)
+    if deletes:
+        execute_operation(todo_manager, 'DeleteTodos', ids=deletes)
+
+def render_todo_cards(todo_manager, filter_option, sort_by, category_filter):
+    """Pending and completed todos as cards, one container per todo"""
+    colA, colB = st.columns(2)
+    with colA:
+        st.write("📝 Pending Todos")
+        pending_todos = [] if filter_option == "Completed" else todo_manager.get_todos(
+            filter_completed=False, sort_by=sort_by, category=category_filter
+        )
+        if pending_todos:
+            for todo_index, todo in enumerate(pending_todos, start=1):
+                # use unique key for each todo
+                unique_key = f"{todo['id']}_{todo_index}"   
+                # Use a unique container for each todo
+                todo_container = st.container()
+                with todo_container:
+                    # Unique keys using a combination of ID, index, and a timestamp
+                    unique_key = f"{todo['id']}_{todo_index}_{hash(todo['created_at'])}"
+                    
+                    st.markdown(f"**{todo['title']}**")
+                    # st.markdown(f"*{todo['description']}*")
+                    col1, col2, col3 = st.columns([0.6, 0.2, 0.2])
+                    
+                    with col1:
+                        st.text(f"Description: {todo['description']}")
+                        st.text(f"Priority: {todo['priority'].capitalize()}")
+                        st.text(f"Due: {todo['due_date']}")
+                
+                    with col2:
+                        # Use unique key for checkbox
+                        st.checkbox(
+                            "Completed", 
+                            value=todo['completed'], 
+                            key=f"complete_{unique_key}",
+                            on_change=update_todo_status,
+                            args=(todo_manager, todo['id'], f"complete_{unique_key}")
+                        )
+                    
+                    with col3:
+                        # Use unique key for delete button
+                        st.button(
+                            f"Delete {todo['title']}",
+                            key=f"delete_{unique_key}",
+                            on_click=delete_todo,
+                            args=(todo_manager, todo['id'])
+                        )
+                    
+                    st.markdown("---")
+        else:
+            st.info("No todos found. Add a new todo to get started!")
+    
+    with colB:
+        st.write("✅ Completed Todos")
+        completed_todos = [] if filter_option == "Active" else todo_manager.get_todos(
+            filter_completed=True, sort_by=sort_by, category=category_filter
+        )
+        if completed_todos:
+            for todo_index, todo in enumerate(completed_todos, start=1):
+                # use unique key for each todo
+                unique_key = f"{todo['id']}_{todo_index}"
+                # Use a unique container for each todo
+                todo_container = st.container()
+                with todo_container:
+                    
+                    st.markdown(f"~~{todo['title']}~~")
+                    st.markdown(f"*{todo['description']}*")
+
+                    col_a, col_b, col_c = st.columns(3)
+                    with col_a:
+                        st.markdown(f"**Priority:** {todo['priority'].capitalize()}")
+                    with col_b:
+                        st.markdown(f"**Category:** {todo['category']}")
+                    with col_c:
+                        st.markdown(f"**Due:** {todo['due_date']}")
+                    
+                    # Use unique key for delete button
+                    st.button(
+                        f"Delete {todo['title']}",
+                        key=f"delete_{unique_key}",
+                        on_click=delete_todo,
+                        args=(todo_manager, todo['id'])
+                    )
+
+                    st.markdown("---")
+        else:
+            st.info("No completed todos yet!")
+
+# rows per page in table view
+TABLE_PAGE_SIZES = [50, 100, 250, 500]
+
+def render_todo_table(todo_manager, filter_option, sort_by, category_filter):
+    """Todos as one editable grid, a page at a time.
+
+    Ticking Done or Delete only edits the grid; the edits of each
+    interaction are sent as a single UpdateTodoStatuses / DeleteTodos batch.
+    """
+    filter_completed = {"Active": False, "Completed": True}.get(filter_option)
+    page_size = st.selectbox("Rows per page", TABLE_PAGE_SIZES, key="todo_table_page_size")
+
+    # start cursors of the pages visited so far; reset whenever the listing changes
+    listing = (filter_option, sort_by, category_filter, page_size)
+    if st.session_state.get('todo_table_listing') != listing:
+        st.session_state.todo_table_listing = listing
+        st.session_state.todo_table_cursors = [None]
+    cursors = st.session_state.todo_table_cursors
+
+    rows, has_next_page = todo_manager.get_todos_page(
+        first=page_size, after=cursors[-1], sort_by=sort_by,
+        filter_completed=filter_completed, category=category_filter
+    )
+    todos = [todo for _, todo in rows]
+
+    table = pd.DataFrame({
+        'Done': [todo['completed'] for todo in todos],
+        'Title': [todo['title'] for todo in todos],
+        'Priority': [todo['priority'].capitalize() for todo in todos],
+        'Category': [todo['category'] for todo in todos],
+        'Due': [todo['due_date'] for todo in todos],
+        'Description': [todo['description'] for todo in todos],
+        'Delete': [False] * len(todos)
+    })
+    # keyed by store version, so edits start afresh once a batch is applied
+    editor_key = f"todo_table_{todo_manager.epoch}_{todo_manager.version}_{len(cursors)}"
+    st.data_editor(
+        table,
+        key=editor_key,
+        hide_index=True,
+        width='stretch',
+        disabled=['Title', 'Priority', 'Category', 'Due', 'Description'],
+        column_config={
+            'Done': st.column_config.CheckboxColumn("Done"),
+            'Delete': st.column_config.CheckboxColumn("Delete")
+        },
+        # only the rows edited, not the whole grid
+        on_change=apply_table_edits,
+        args=(todo_manager, todos, editor_key)
+    )
+
+    col_prev, col_page, col_next = st.columns([0.2, 0.6, 0.2])
+    with col_prev:
+        st.button("⬅️ Previous", disabled=len(cursors) == 1, on_click=cursors.pop)
+    with col_page:
+        st.caption(f"Page {len(cursors)}, {len(todos)} todos")
+    with col_next:
+        st.button("Next ➡️", disabled=not has_next_page, on_click=cursors.append,
+                  args=(rows[-1][0] if rows else None,))
+
+# most search results shown at once
+SEARCH_RESULT_LIMIT = 200
+
+def render_search_results(todo_manager, search_query, filter_option):
+    """Todos matching a search, read off the store's full-text index"""
+    results = todo_manager.search_todos(
+        search_query,
+        filter_completed={"Active": False, "Completed": True}.get(filter_option),
+        limit=SEARCH_RESULT_LIMIT
+    )
+    if not results:
+        st.info("No todos match your search.")
+        return
+    st.caption(f"{len(results)}{'+' if len(results) == SEARCH_RESULT_LIMIT else ''} matching todos")
+    st.dataframe(
+        pd.DataFrame({
+            'Done': [todo['completed'] for todo in results],
+            'Title': [todo['title'] for todo in results],
+            'Priority': [todo['priority'].capitalize() for todo in results],
+            'Category': [todo['category'] for todo in results],
+            'Due': [todo['due_date'] for todo in results],
+            'Description': [todo['description'] for todo in results]
+        }),
+        hide_index=True,
+        width='stretch'
+    )
+
+@st.fragment
+def render_add_todo_form(todo_manager):
+    """Add form; typing in it re-runs only this fragment"""
+    with st.expander("➕ Add New Todo", expanded=True):
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            title = st.text_input("Title")
+        with col2:
+            priority = st.selectbox("Priority", ["low", "medium", "high"])
+        with col3:
+            due_date = st.date_input("Due Date")
+
+        col4, col5 = st.columns(2)
+        with col4:
+            category = st.selectbox("Category", todo_manager.categories)
+        with col5:
+            description = st.text_area("Description")
+
+        col6, col7 = st.columns(2)
+        with col6:
+            reminder_date = st.date_input("Reminder Date")
+        with col7:
+            reminder_time = st.time_input("Reminder Time")
+        
+        if st.button("Add Todo"):
+            if title:
+                reminder_datetime = datetime.combine(reminder_date, reminder_time).isoformat() if reminder_date and reminder_time else None
+                execute_operation(
+                    todo_manager,
+                    'AddTodo',
+                    title=title,
+                    description=description,
+                    priority=priority,
+                    due_date=due_date.isoformat(),
+                    category=category,
+                    reminder_datetime=reminder_datetime
+                )
+                # the todo list and analytics are separate fragments, so refresh the whole page
+                st.session_state.todo_added = title
+                st.rerun()
+
+        if 'todo_added' in st.session_state:
+            st.success(f"Todo '{st.session_state.pop('todo_added')}' added successfully!")
+
+@st.fragment
+def render_todo_list(todo_manager, view_option, filter_option, sort_by, category_filter):
+    """Todo list; completing or deleting a todo re-runs only this fragment"""
+    search_query = st.text_input("🔎 Search todos", placeholder="Words from titles or descriptions")
+    if search_query.strip():
+        render_search_results(todo_manager, search_query, filter_option)
+    elif view_option == "Table":
+        render_todo_table(todo_manager, filter_option, sort_by, category_filter)
+    else:
+        render_todo_cards(todo_manager, filter_option, sort_by, category_filter)
+
+# analytics also follow changes made in the list fragment and other sessions
+ANALYTICS_REFRESH_INTERVAL = timedelta(seconds=10)
+
+@st.fragment(run_every=ANALYTICS_REFRESH_INTERVAL)
+def render_analytics(todo_manager):
+    create_todo_visualizations(todo_manager, st.session_state.user['username'])
+
+# exports larger than this are spooled to disk rather than memory
+EXPORT_SPOOL_BYTES = 8 * 1024 * 1024
+
+def import_uploaded_todos(todo_manager, uploader_key):
+    """Stream the uploaded CSV or JSONL file into the store"""
+    uploaded = st.session_state.get(uploader_key)
+    if uploaded is None:
+        return
+    try:
+        fmt = detect_format(uploaded.name)
+        uploaded.seek(0)
+        lines = io.TextIOWrapper(uploaded, encoding='utf-8-sig', newline='')
+        try:
+            st.session_state.import_report = import_todos(todo_manager, lines, fmt)
+        finally:
+            # keep the upload open for the widget
+            lines.detach()
+    except (ValueError, UnicodeDecodeError) as e:
+        st.session_state.import_report = {'error': str(e)}
+
+def export_file(todo_manager, fmt):
+    """Export written line by line to a spooled temporary file, built only when downloaded"""
+    spool = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_BYTES)
+    for line in export_todos(todo_manager, fmt):
+        spool.write(line.encode('utf-8'))
+    spool.seek(0)
+    return spool
+
+def render_import_export(todo_manager):
+    st.sidebar.header("📦 Import / Export")
+    st.sidebar.file_uploader("Import CSV or JSONL", type=['csv', 'jsonl', 'ndjson', 'json'], key='import_file')
+    st.sidebar.button(
+        "⬆️ Import Todos",
+        on_click=import_uploaded_todos,
+        args=(todo_manager, 'import_file'),
+        disabled=st.session_state.get('import_file') is None
+    )
+
+    report = st.session_state.pop('import_report', None)
+    if report is not None and 'error' in report:
+        st.sidebar.error(f"Import failed: {report['error']}")
+    elif report is not None:
+        st.sidebar.success(f"Imported {report['imported']} todos, skipped {report['skipped']}")
+        for line_number, message in report['errors']:
+            st.sidebar.caption(f"Line {line_number}: {message}" if line_number else message)
+
+    export_format = st.sidebar.radio("Export format", FORMATS, format_func=str.upper, horizontal=True)
+    st.sidebar.download_button(
+        "⬇️ Export Todos",
+        data=lambda: export_file(todo_manager, export_format),
+        file_name=f"todos.{export_format}",
+        mime='text/csv' if export_format == 'csv' else 'application/x-ndjson',
+        on_click='ignore'
+    )
+
+@st.cache_resource
+def get_shared_todo_manager(backend, path):
+    """One persistent todo manager per process, shared by every session"""
+    todo_manager = create_todo_manager(backend, path)
+    # flush the journal or close the database when the app exits
+    atexit.register(todo_manager.store.close)
+    return todo_manager
+
 def authenticate(username, password):
     """Simple authentication"""
     users = {
@@ -239,6 +438,7 @@ def authenticate(username, password):
     if username in users and users[username]['password'] == password:
         return {
             'token': str(uuid.uuid4()),
+            'username': username,
             'role': users[username]['role']
         }
     return None
@@ -257,13 +457,17 @@ def main():
     # # In your main() function, before creating the app layout
     # local_css("custom.css") 
 
-    # Initialize todo manager
+    # Initialize todo manager, shared and persistent when TODO_DB_PATH or
+    # TODO_JOURNAL_DIR is set
     if 'todo_manager' not in st.session_state:
-        st.session_state.todo_manager = TodoManager()
-
-    # Initialize notification manager
-    if 'notification_manager' not in st.session_state:
-        st.session_state.notification_manager = NotificationManager(st.session_state.todo_manager)
+        db_path = os.environ.get('TODO_DB_PATH')
+        journal_dir = os.environ.get('TODO_JOURNAL_DIR')
+        if db_path:
+            st.session_state.todo_manager = get_shared_todo_manager('sqlite', db_path)
+        elif journal_dir:
+            st.session_state.todo_manager = get_shared_todo_manager('journal', journal_dir)
+        else:
+            st.session_state.todo_manager = TodoManager()
 
     # Authentication
     if 'user' not in st.session_state:
@@ -290,6 +494,13 @@ def main():
                         st.error("Invalid credentials")
         return
 
+    # Initialize notification manager; reminders go to the user, so sessions
+    # of one user sharing a todo manager get each reminder once
+    if 'notification_manager' not in st.session_state:
+        st.session_state.notification_manager = NotificationManager(
+            st.session_state.todo_manager, owner=st.session_state.user['username']
+        )
+
     # Notification Controls
     st.sidebar.header("🔔 Notification Settings")
     
@@ -299,7 +510,7 @@ def main():
 
     def toggle_notification_service():
         if not st.session_state.notification_service_running:
-            st.session_state.notification_manager.start_notification_service(interval=60)  # Check every minute
+            st.session_state.notification_manager.start_notification_service()
             st.session_state.notification_service_running = True
             st.sidebar.success("Notification service started")
         else:
@@ -322,9 +533,6 @@ def main():
     # Main Application
     st.title(f"📋 Todo Manager - Welcome, {st.session_state.user.get('role', 'User')}")
 
-    # Create GraphQL schema
-    schema = get_graphql_schema(st.session_state.todo_manager)
-
     # Filtering and Sorting
     st.sidebar.header("🔍 Todo Filters")
     filter_option = st.sidebar.selectbox(
@@ -337,165 +545,32 @@ def main():
         ["Default", "Priority", "Due Date"]
     )
 
-    # Add Todo Form
-    with st.expander("➕ Add New Todo", expanded=True):
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            title = st.text_input("Title")
-        with col2:
-            priority = st.selectbox("Priority", ["low", "medium", "high"])
-        with col3:
-            due_date = st.date_input("Due Date")
+    category_option = st.sidebar.selectbox(
+        "Category",
+        ["All"] + st.session_state.todo_manager.categories
+    )
 
-        col4, col5 = st.columns(2)
-        with col4:
-            category = st.selectbox("Category", st.session_state.todo_manager.categories)
-        with col5:
-            description = st.text_area("Description")
+    # the table view stays fast with thousands of todos
+    view_option = st.sidebar.radio("View", ["Cards", "Table"], horizontal=True)
 
-        col6, col7 = st.columns(2)
-        with col6:
-            reminder_date = st.date_input("Reminder Date")
-        with col7:
-            reminder_time = st.time_input("Reminder Time")
-        
-        if st.button("Add Todo"):
-            if title:
-                reminder_datetime = datetime.combine(reminder_date, reminder_time).isoformat() if reminder_date and reminder_time else None
-                todo = st.session_state.todo_manager.add_todo(
-                    title, 
-                    description, 
-                    priority, 
-                    due_date.isoformat(), 
-                    category,
-                    reminder_datetime
-                )
-                st.success(f"Todo '{title}' added successfully!")
+    # Each piece of the page re-runs on its own when interacted with
+    render_add_todo_form(st.session_state.todo_manager)
 
     # Display Todos
     st.header("📝 My Todos")
     
-    # Apply filters and sorting
-    todos = st.session_state.todo_manager.get_todos()
-    
-    if filter_option == "Active":
-        todos = [todo for todo in todos if not todo['completed']]
-    elif filter_option == "Completed":
-        todos = [todo for todo in todos if todo['completed']]
-    
-    if sort_option == "Priority":
-        todos.sort(key=lambda x: ['low', 'medium', 'high'].index(x['priority']))
-    elif sort_option == "Due Date":
-        todos.sort(key=lambda x: x['due_date'])
-    
+    # Each column is read straight off the store's indexes
+    sort_by = {"Priority": 'priority', "Due Date": 'due_date'}.get(sort_option)
+    category_filter = None if category_option == "All" else category_option
 
-    colA, colB = st.columns(2)
-    with colA:
-        st.write("📝 Pending Todos")
-        pending_todos = [todo for todo in todos if not todo['completed']]
-        if pending_todos:
-            for todo_index, todo in enumerate(pending_todos, start=1):
-                # use unique key for each todo
-                unique_key = f"{todo['id']}_{todo_index}"   
-                # Use a unique container for each todo
-                todo_container = st.container()
-                with todo_container:
-                    # Unique keys using a combination of ID, index, and a timestamp
-                    unique_key = f"{todo['id']}_{todo_index}_{hash(todo['created_at'])}"
-                    
-                    st.markdown(f"**{todo['title']}**")
-                    # st.markdown(f"*{todo['description']}*")
-                    col1, col2, col3 = st.columns([0.6, 0.2, 0.2])
-                    
-                    with col1:
-                        st.text(f"Description: {todo['description']}")
-                        st.text(f"Priority: {todo['priority'].capitalize()}")
-                        st.text(f"Due: {todo['due_date']}")
-                
-                    with col2:
-                        # Use unique key for checkbox
-                        completed = st.checkbox(
-                            "Completed", 
-                            value=todo['completed'], 
-                            key=f"complete_{unique_key}"
-                        )
-                        if completed != todo['completed']:
-                            mutation = parse(f"""
-                            mutation {{
-                                updateTodoStatus(
-                                    id: "{todo['id']}", 
-                                    completed: "{str(completed).lower()}"
-                                ) {{
-                                    id
-                                    completed
-                                }}
-                            }}
-                            """)
-                            execute(schema, mutation)
-                    
-                    with col3:
-                        # Use unique key for delete button
-                        if st.button(f"Delete {todo['title']}", key=f"delete_{unique_key}"):
-                            mutation = parse(f"""
-                            mutation {{
-                                deleteTodo(id: "{todo['id']}")
-                            }}
-                            """)
-                            execute(schema, mutation)
-                            # Use specific Streamlit method to handle rerun
-                            st.rerun()
-                    
-                    st.markdown("---")
-        else:
-            st.info("No todos found. Add a new todo to get started!")
-    
-    with colB:
-        st.write("✅ Completed Todos")
-        completed_todos = [todo for todo in todos if todo['completed']]
-        if completed_todos:
-            for todo_index, todo in enumerate(completed_todos, start=1):
-                # use unique key for each todo
-                unique_key = f"{todo['id']}_{todo_index}"
-                # Use a unique container for each todo
-                todo_container = st.container()
-                with todo_container:
-                    
-                    st.markdown(f"~~{todo['title']}~~")
-                    st.markdown(f"*{todo['description']}*")
+    render_todo_list(st.session_state.todo_manager, view_option, filter_option, sort_by, category_filter)
 
-                    col_a, col_b, col_c = st.columns(3)
-                    with col_a:
-                        st.markdown(f"**Priority:** {todo['priority'].capitalize()}")
-                    with col_b:
-                        st.markdown(f"**Category:** {todo['category']}")
-                    with col_c:
-                        st.markdown(f"**Due:** {todo['due_date']}")
-                    
-                    # Use unique key for delete button
-                    if st.button(f"Delete {todo['title']}", key=f"delete_{unique_key}"):
-                        # Remove todo
-                        # st.session_state.todo_manager.todos = [
-                        #     t for t in st.session_state.todo_manager.todos 
-                        #     if t['id'] != todo['id']
-                        # ]
-                        # st.rerun()
-                        mutation = parse(f"""
-                        mutation {{
-                            deleteTodo(id: "{todo['id']}")
-                        }}
-                        """)
-                        execute(schema, mutation)
-                        st.rerun()
+    render_import_export(st.session_state.todo_manager)
 
-                    st.markdown("---")
-        else:
-            st.info("No completed todos yet!")
-    
     # Visualization Section
     st.sidebar.header("📊 Todo Analytics")
     if st.sidebar.checkbox("Show Todo Analytics"):
-        create_todo_visualizations(st.session_state.todo_manager)
+        render_analytics(st.session_state.todo_manager)
 
     # Logout button
     if st.sidebar.button("🚪 Logout"):
@@ -505,6 +580,8 @@ def main():
         
         # Clear session state
         del st.session_state.user
+        del st.session_state.notification_manager
+        st.session_state.notification_service_running = False
         st.rerun()
 
 if __name__ == "__main__":
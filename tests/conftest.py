@@ -0,0 +1,31 @@
+import os
+import sys
+
+import pytest
+
+# the modules live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from todo_store import InMemoryTodoStore, JournaledTodoStore, SQLiteTodoStore  # noqa: E402
+
+
+def make_todo(todo_id, **fields):
+    todo = {
+        'id': todo_id, 'unique_id': f"u-{todo_id}", 'title': f"todo {todo_id}", 'description': '',
+        'priority': 'medium', 'due_date': '2030-01-01', 'category': 'Work',
+        'created_at': '2026-01-01T00:00:00+00:00', 'completed': False, 'reminder_datetime': None
+    }
+    todo.update(fields)
+    return todo
+
+
+@pytest.fixture(params=['memory', 'sqlite', 'journal'])
+def store(request, tmp_path):
+    if request.param == 'sqlite':
+        store = SQLiteTodoStore(str(tmp_path / 'todos.db'))
+    elif request.param == 'journal':
+        store = JournaledTodoStore(str(tmp_path / 'journal'))
+    else:
+        store = InMemoryTodoStore()
+    yield store
+    store.close()
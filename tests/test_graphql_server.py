@@ -0,0 +1,252 @@
+import asyncio
+import json
+from http import HTTPStatus
+from urllib.parse import urlencode
+
+import pytest
+
+from graphql_cache import ResponseCache
+from graphql_server import (MAX_BODY_SIZE, MAX_CACHED_QUERY_SIZE, GraphQLServer, HTTPError, _cached_parse_and_validate,
+                            parse_and_validate)
+from reminder_service import ReminderService
+from todo_manager import TodoManager
+from todo_store import SQLiteTodoStore
+
+
+def test_only_short_queries_are_cached():
+    _cached_parse_and_validate.cache_clear()
+    short = "{ getTodos { id } }"
+    long = short + " " * MAX_CACHED_QUERY_SIZE
+    for query in (short, short, long, long):
+        document, errors, normalized = parse_and_validate(query)
+        assert document is not None and not errors
+        assert normalized == parse_and_validate(short)[2]
+
+    info = _cached_parse_and_validate.cache_info()
+    assert info.currsize == 1
+    assert info.misses == 1
+
+
+def test_invalid_queries_report_errors():
+    document, errors, _ = parse_and_validate("{ getTodos { nope } }")
+    assert "nope" in errors[0].message
+    document, errors, _ = parse_and_validate("{ getTodos {")
+    assert document is None and errors
+
+
+def _serve(todo_manager, coroutine_function, **options):
+    async def run():
+        server = GraphQLServer(todo_manager, port=0, reminder_service=ReminderService(), **options)
+        try:
+            return await coroutine_function(server)
+        finally:
+            await server.close()
+    return asyncio.run(run())
+
+
+async def _titles(server, query="{ getTodos { title } }"):
+    status, body = await server.respond(query)
+    assert status == HTTPStatus.OK
+    return [todo['title'] for todo in json.loads(body)['data']['getTodos']]
+
+
+def test_response_cache_evicts_least_recently_used():
+    cache = ResponseCache(max_entries=2, max_bytes=10)
+    cache.put('a', b'1234')
+    cache.put('b', b'5678')
+    assert cache.get('a') == b'1234'
+    cache.put('c', b'9')
+    assert cache.get('b') is None
+    # over max_bytes: evicts until it fits
+    cache.put('d', b'123456789')
+    assert cache.get('a') is None and cache.get('d') == b'123456789'
+    # never cached at all
+    cache.put('e', b'x' * 11)
+    assert cache.get('e') is None
+    assert cache.get('c') == b'9'
+    assert cache.stats['hits'] == 3
+    assert cache.stats['bytes'] == 10 and cache.stats['entries'] == 2
+
+
+def test_make_key_ignores_variable_order():
+    key = ResponseCache.make_key('q', None, {'a': 1, 'b': 2}, 'epoch', 3)
+    assert key == ResponseCache.make_key('q', None, {'b': 2, 'a': 1}, 'epoch', 3)
+    assert key != ResponseCache.make_key('q', None, {'a': 1, 'b': 2}, 'epoch', 4)
+
+
+def test_reads_are_cached_until_a_mutation():
+    todo_manager = TodoManager()
+    todo_manager.add_todo('a', '', 'low', '2030-01-01', 'Work')
+
+    async def run(server):
+        first = await _titles(server)
+        # same document, different whitespace
+        second = await _titles(server, "{getTodos{title}}")
+        status, _ = await server.respond('mutation { addTodo(title: "b") { id } }')
+        assert status == HTTPStatus.OK
+        third = await _titles(server)
+        return first, second, third, dict(server.response_cache.stats)
+
+    first, second, third, stats = _serve(todo_manager, run)
+    assert first == second == ['a']
+    assert third == ['a', 'b']
+    assert (stats['hits'], stats['misses']) == (1, 2)
+
+
+def test_failed_reads_are_not_cached():
+    async def run(server):
+        for _ in range(2):
+            status, body = await server.respond('{ getTodos(sort_by: "nope") { id } }')
+            assert json.loads(body)['errors']
+        return dict(server.response_cache.stats)
+
+    stats = _serve(TodoManager(), run)
+    assert stats['hits'] == 0 and stats['entries'] == 0
+
+
+def test_other_processes_writes_invalidate_cached_reads(tmp_path):
+    path = str(tmp_path / 'todos.db')
+    todo_manager = TodoManager(SQLiteTodoStore(path))
+    other = TodoManager(SQLiteTodoStore(path))
+
+    async def run(server):
+        before = await _titles(server)
+        other.add_todo('from elsewhere', '', 'low', '2030-01-01', 'Work')
+        return before, await _titles(server)
+
+    try:
+        before, after = _serve(todo_manager, run)
+    finally:
+        todo_manager.store.close()
+        other.store.close()
+    assert before == []
+    assert after == ['from elsewhere']
+
+
+@pytest.mark.parametrize('query, message', [
+    ("{ getTodos(first: 100) { id title } }", "Query complexity 201 exceeds the limit of 200"),
+    ("{ changesSince(version: 0) { todos { id } } }", "Query depth 3 exceeds the limit of 2"),
+])
+def test_expensive_queries_are_rejected_before_execution(query, message):
+    async def run(server):
+        with pytest.raises(HTTPError) as raised:
+            await server.respond(query)
+        return raised.value
+
+    error = _serve(TodoManager(), run, max_depth=2, max_complexity=200)
+    assert error.status == HTTPStatus.BAD_REQUEST
+    assert str(error) == message
+
+
+def test_cache_hits_are_traced():
+    async def run(server):
+        for _ in range(3):
+            await _titles(server, "query Page { getTodos { title } }")
+        return server.tracer.metrics()['operations']
+
+    operations = _serve(TodoManager(), run)
+    # one execution plus two cache hits; the miss is not counted twice
+    assert operations['Page']['count'] == 3
+
+
+async def _request(reader, writer, method, target, payload=None, headers=''):
+    body = json.dumps(payload).encode('utf-8') if payload is not None else b''
+    writer.write(f"{method} {target} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\n{headers}\r\n"
+                 .encode('latin-1') + body)
+    await writer.drain()
+    head = (await reader.readuntil(b'\r\n\r\n')).decode('latin-1').split('\r\n')
+    response_headers = dict(line.lower().split(': ', 1) for line in head[1:] if line)
+    content = await reader.readexactly(int(response_headers['content-length']))
+    return int(head[0].split(' ')[1]), response_headers, content
+
+
+def _over_http(todo_manager, client, **options):
+    async def run(server):
+        await server.start()
+        reader, writer = await asyncio.open_connection('127.0.0.1', server.port)
+        try:
+            return await client(server, reader, writer)
+        finally:
+            writer.close()
+    return _serve(todo_manager, run, **options)
+
+
+def test_keep_alive_connection_serves_several_requests():
+    async def client(server, reader, writer):
+        status, headers, body = await _request(
+            reader, writer, 'POST', '/graphql',
+            {'query': "mutation Add($title: String!) { addTodo(title: $title) { title } }",
+             'variables': {'title': "over http"}})
+        assert (status, headers['connection']) == (200, 'keep-alive')
+        assert json.loads(body)['data']['addTodo'] == {'title': "over http"}
+
+        query = urlencode({'query': "{ getTodos { title } }"})
+        status, _, body = await _request(reader, writer, 'GET', f"/graphql?{query}")
+        assert json.loads(body)['data']['getTodos'] == [{'title': "over http"}]
+        return dict(server.stats)
+
+    stats = _over_http(TodoManager(), client)
+    assert (stats['connections'], stats['requests']) == (1, 2)
+
+
+@pytest.mark.parametrize('method, target, payload, status', [
+    ('GET', "/graphql?" + urlencode({'query': 'mutation { deleteTodo(id: "x") }'}), None, 405),
+    ('POST', '/graphql', {'variables': {}}, 400),
+    ('POST', '/graphql', [1], 400),
+    ('POST', '/graphql', {'query': "{ getTodos { nope } }"}, 400),
+    ('PUT', '/graphql', {'query': "{ getTodos { id } }"}, 405),
+    ('GET', '/nowhere', None, 404),
+])
+def test_bad_requests_get_an_error_status(method, target, payload, status):
+    async def client(server, reader, writer):
+        response_status, _, body = await _request(reader, writer, method, target, payload)
+        return response_status, json.loads(body)
+
+    response_status, body = _over_http(TodoManager(), client)
+    assert response_status == status
+    assert body['errors']
+
+
+def test_oversized_bodies_are_refused_and_the_connection_closed():
+    async def client(server, reader, writer):
+        writer.write(f"POST /graphql HTTP/1.1\r\nContent-Length: {MAX_BODY_SIZE + 1}\r\n\r\n".encode('latin-1'))
+        head = await reader.readuntil(b'\r\n\r\n')
+        await reader.read()
+        return head
+
+    head = _over_http(TodoManager(), client)
+    assert head.startswith(b"HTTP/1.1 413 ")
+    assert b"Connection: close" in head
+
+
+def test_stats_and_metrics_endpoints():
+    async def client(server, reader, writer):
+        await _request(reader, writer, 'POST', '/graphql', {'query': "query Page { getTodos { id } }"})
+        _, _, stats = await _request(reader, writer, 'GET', '/stats')
+        _, headers, metrics = await _request(reader, writer, 'GET', '/metrics', headers="Connection: close\r\n")
+        return json.loads(stats), headers, metrics.decode('utf-8')
+
+    stats, headers, metrics = _over_http(TodoManager(), client)
+    assert stats['response_cache']['misses'] == 1
+    assert stats['tracing']['operations']['Page']['count'] == 1
+    assert headers['content-type'].startswith('text/plain')
+    assert headers['connection'] == 'close'
+    assert 'graphql_operation_seconds_count{operation="Page"} 1' in metrics
+
+
+def test_event_stream_sends_todo_changes():
+    todo_manager = TodoManager()
+
+    async def client(server, reader, writer):
+        writer.write(b"GET /events HTTP/1.1\r\nHost: localhost\r\n\r\n")
+        head = await reader.readuntil(b'\r\n\r\n')
+        assert b"text/event-stream" in head
+        await reader.readuntil(b'\n\n')
+        while server.events.subscriber_count == 0:
+            await asyncio.sleep(0.01)
+        await server.respond('mutation { addTodo(title: "live") { id } }')
+        return await asyncio.wait_for(reader.readuntil(b'\n\n'), 5)
+
+    event = _over_http(todo_manager, client).decode('utf-8').split('\n')
+    assert event[1] == 'event: added'
+    assert json.loads(event[2][len('data: '):])['todo']['title'] == 'live'
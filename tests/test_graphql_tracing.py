@@ -0,0 +1,85 @@
+import json
+import logging
+
+from graphql import execute, parse
+
+from graphql_tracing import LIST_FIELD_SIZES, Tracer, check_query_cost, query_cost, trace_logger
+from todo_graphql import get_graphql_schema
+from todo_manager import TodoManager
+
+
+def _cost(query, **variables):
+    return query_cost(parse(query), variables=variables)
+
+
+def test_list_fields_multiply_their_selections():
+    assert _cost("{ getTodos(first: 5) { id title } }") == (2, 1 + 5 * 2)
+    assert _cost("{ searchTodos(query: \"a\") { id } }") == (2, 1 + LIST_FIELD_SIZES['searchTodos'])
+    # unpaged, so costed as the largest page
+    assert _cost("{ getTodos { id } }") == (2, 1 + LIST_FIELD_SIZES['getTodos'])
+    assert _cost("query($n: Int) { getTodos(first: $n) { id } }", n=3) == (2, 4)
+
+
+def test_negative_first_costs_nothing_rather_than_less():
+    assert _cost("{ getTodos(first: -100) { id } changesSince(version: 0) { version } }") == (2, 1 + 2)
+
+
+def test_fragments_are_counted_and_cycles_stop():
+    query = """
+    query Page { todos(first: 2) { edges { node { ...Fields } } } }
+    fragment Fields on Todo { id title ...Fields }
+    """
+    assert query_cost(parse(query), 'Page') == (4, 1 + 2 * (1 + (1 + 2)))
+
+
+def test_limits_report_each_exceeded_bound():
+    document = parse("{ getTodos(first: 100) { id title } }")
+    assert check_query_cost(document, max_depth=2, max_complexity=201) == []
+    errors = check_query_cost(document, max_depth=1, max_complexity=200)
+    assert [error.message for error in errors] == [
+        "Query depth 2 exceeds the limit of 1", "Query complexity 201 exceeds the limit of 200"]
+    # a first of the wrong type is left for execution to reject
+    assert check_query_cost(parse('{ getTodos(first: "x") { id } }'), max_complexity=1) == []
+
+
+def _traced(tracer, query, operation_name=None):
+    todo_manager = TodoManager()
+    todo_manager.add_todo('a', '', 'low', '2030-01-01', 'Work')
+    trace = tracer.start(operation_name)
+    result = execute(get_graphql_schema(), parse(query), context_value={'todo_manager': todo_manager, 'trace': trace},
+                     middleware=[tracer.middleware()])
+    tracer.finish(trace, result.errors)
+    return result
+
+
+def test_tracer_times_resolvers_and_operations(caplog):
+    tracer = Tracer()
+    with caplog.at_level(logging.INFO, logger=trace_logger.name):
+        _traced(tracer, "query Page { getTodos { id } }", 'Page')
+        _traced(tracer, '{ getTodos(sort_by: "nope") { id } }')
+
+    metrics = tracer.metrics()
+    assert metrics['operations']['Page']['count'] == 1
+    assert metrics['operations']['anonymous']['errors'] == 1
+    assert sum(metrics['operations']['Page']['latency_buckets_ms'].values()) == 1
+    # only fields with their own resolver are timed by default
+    assert metrics['fields']['Query.getTodos']['count'] == 2
+    assert 'Todo.id' not in metrics['fields']
+
+    logged = [json.loads(record.getMessage()) for record in caplog.records]
+    assert [entry['operation'] for entry in logged] == ['Page', 'anonymous']
+    assert logged[0]['fields'][0]['field'] == 'Query.getTodos'
+
+    text = tracer.metrics_text()
+    assert 'graphql_operation_seconds_count{operation="Page"} 1' in text
+    assert 'graphql_operation_seconds_bucket{operation="Page",le="+Inf"} 1' in text
+    assert 'graphql_resolver_seconds_count{field="Query.getTodos"} 2' in text
+
+
+def test_tracer_bounds_operation_names():
+    tracer = Tracer(max_operations=2)
+    for name in ('a', 'b', 'c', 'd', 'a'):
+        tracer.finish(tracer.start(name))
+    operations = tracer.metrics()['operations']
+    assert {name: stats['count'] for name, stats in operations.items()} == {'a': 2, 'b': 1, 'other': 2}
+
@@ -0,0 +1,118 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import make_todo
+from todo_manager import TodoManager
+from todo_store import JournaledTodoStore
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# adds todos and dies without closing the store or flushing anything
+CRASH_SCRIPT = """
+import os, sys
+from todo_manager import create_todo_manager
+todo_manager = create_todo_manager('journal', sys.argv[1])
+for i in range(5):
+    todo_manager.add_todo(f"todo {i}", '', 'low', '2030-01-01', 'Work')
+todo_manager.update_todo_status(todo_manager.todos[0]['id'], True)
+os._exit(1)
+"""
+
+
+def test_acknowledged_writes_survive_a_crash(tmp_path):
+    directory = str(tmp_path / 'journal')
+    subprocess.run([sys.executable, '-c', CRASH_SCRIPT, directory], cwd=ROOT, check=False)
+
+    store = JournaledTodoStore(directory)
+    todos = store.all()
+    assert [todo['title'] for todo in todos] == [f"todo {i}" for i in range(5)]
+    assert todos[0]['completed'] is True
+    store.close()
+
+
+def test_torn_last_line_is_cut_off(tmp_path):
+    directory = str(tmp_path / 'journal')
+    store = JournaledTodoStore(directory)
+    store.add(make_todo('a'))
+    store.add(make_todo('b'))
+    store.close()
+    with open(os.path.join(directory, 'journal.jsonl'), 'a', encoding='utf-8') as f:
+        f.write('{"op": "add", "todo": {"id": "c"')
+
+    store = JournaledTodoStore(directory)
+    assert [todo['id'] for todo in store.all()] == ['a', 'b']
+    # new entries start on a fresh line rather than after the torn one
+    store.add(make_todo('d'))
+    store.close()
+    with open(os.path.join(directory, 'journal.jsonl'), encoding='utf-8') as f:
+        for line in f:
+            json.loads(line)
+
+    store = JournaledTodoStore(directory)
+    assert [todo['id'] for todo in store.all()] == ['a', 'b', 'd']
+    store.close()
+
+
+
+def test_last_entry_without_newline_is_kept(tmp_path):
+    directory = str(tmp_path / 'journal')
+    store = JournaledTodoStore(directory)
+    for todo_id in ('a0', 'a1', 'a2'):
+        store.add(make_todo(todo_id))
+    store.close()
+    journal_path = os.path.join(directory, 'journal.jsonl')
+    with open(journal_path, 'rb+') as f:
+        f.truncate(os.path.getsize(journal_path) - 1)
+
+    store = JournaledTodoStore(directory)
+    assert [todo['id'] for todo in store.all()] == ['a0', 'a1', 'a2']
+    store.add(make_todo('b0'))
+    store.add(make_todo('b1'))
+    store.close()
+
+    store = JournaledTodoStore(directory)
+    assert [todo['id'] for todo in store.all()] == ['a0', 'a1', 'a2', 'b0', 'b1']
+    store.close()
+
+def test_recovery_replays_the_journal_after_a_snapshot(tmp_path):
+    directory = str(tmp_path / 'journal')
+    store = JournaledTodoStore(directory, snapshot_every=3)
+    for todo_id in 'abcde':
+        store.add(make_todo(todo_id))
+    with store.transaction():
+        store.update('a', completed=True)
+        store.delete('b')
+    store.close()
+
+    store = JournaledTodoStore(directory)
+    assert [todo['id'] for todo in store.all()] == ['a', 'c', 'd', 'e']
+    assert [todo['id'] for todo in store.query(filter_completed=True)] == ['a']
+    store.close()
+
+
+def test_directory_is_locked_while_open(tmp_path):
+    directory = str(tmp_path / 'journal')
+    store = JournaledTodoStore(directory)
+    with pytest.raises(RuntimeError):
+        JournaledTodoStore(directory)
+    store.close()
+
+    JournaledTodoStore(directory).close()
+
+
+def test_snapshot_waits_for_a_bulk_load_to_finish(tmp_path):
+    directory = str(tmp_path / 'journal')
+    todo_manager = TodoManager(JournaledTodoStore(directory, snapshot_every=3))
+    todo_manager.store.add(make_todo('pre'))
+    imported, _ = todo_manager.import_todos([make_todo(f"t{i}") for i in range(10)], batch_size=2)
+    assert imported == 10
+    todo_manager.store.close()
+
+    store = JournaledTodoStore(directory)
+    assert len(store.all()) == 11
+    assert store.get('t9') is not None
+    store.close()
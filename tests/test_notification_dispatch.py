@@ -0,0 +1,82 @@
+import time
+
+from notification_dispatch import InMemoryChannel, NotificationDispatcher, format_notification
+
+
+def _todo(title):
+    return {'title': title, 'description': '', 'priority': 'high'}
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_reminders_in_one_window_are_coalesced():
+    channel = InMemoryChannel()
+    dispatcher = NotificationDispatcher([channel], coalesce_window=0.2)
+    try:
+        for i in range(3):
+            dispatcher.submit('ann', [_todo(f"t{i}")])
+        dispatcher.submit('bob', [_todo('b')])
+        _wait_for(lambda: dispatcher.stats['sent'] == 2)
+    finally:
+        dispatcher.shutdown()
+
+    by_user = {notification['user']: notification for notification in channel.sent}
+    assert by_user['ann']['title'] == '3 Todos Due Soon!'
+    assert by_user['bob']['title'] == 'Todo Due Soon!'
+    assert dispatcher.stats['submitted'] == 4
+    assert dispatcher.stats['notifications'] == 2
+
+
+def test_failed_sends_are_retried():
+    channel = InMemoryChannel(fail_times=2)
+    dispatcher = NotificationDispatcher([channel], coalesce_window=0, backoff=0.01)
+    try:
+        dispatcher.submit('ann', [_todo('t')])
+        _wait_for(lambda: dispatcher.stats['sent'] == 1)
+    finally:
+        dispatcher.shutdown()
+
+    assert len(channel.sent) == 1
+    assert dispatcher.stats['retried'] == 2
+    assert dispatcher.stats['failed'] == 0
+
+
+def test_sends_give_up_after_max_retries():
+    channel = InMemoryChannel(fail_times=10)
+    dispatcher = NotificationDispatcher([channel], coalesce_window=0, max_retries=1, backoff=0.01)
+    try:
+        dispatcher.submit('ann', [_todo('t')])
+        _wait_for(lambda: dispatcher.stats['failed'] == 1)
+    finally:
+        dispatcher.shutdown()
+
+    assert channel.sent == []
+    assert dispatcher.stats['retried'] == 1
+
+
+def test_rate_limited_reminders_wait_for_flush():
+    channel = InMemoryChannel()
+    dispatcher = NotificationDispatcher([channel], coalesce_window=0, rate_limit=1, rate_period=60)
+    try:
+        dispatcher.submit('ann', [_todo('t1')])
+        _wait_for(lambda: dispatcher.stats['sent'] == 1)
+        dispatcher.submit('ann', [_todo('t2')])
+        dispatcher.submit('ann', [_todo('t3')])
+        time.sleep(0.1)
+        assert dispatcher.stats['sent'] == 1
+        dispatcher.flush()
+    finally:
+        dispatcher.shutdown()
+
+    assert [notification['title'] for notification in channel.sent] == ['Todo Due Soon!', '2 Todos Due Soon!']
+
+
+def test_summary_lists_at_most_max_listed():
+    title, message = format_notification([_todo(f"t{i}") for i in range(7)], max_listed=5)
+    assert title == '7 Todos Due Soon!'
+    assert message.splitlines()[-1] == '...and 2 more'
@@ -0,0 +1,219 @@
+import gc
+import threading
+import time
+from datetime import datetime, timedelta
+
+from reminder_service import ReminderService
+from todo_manager import TodoManager
+
+
+class Recorder:
+    def __init__(self):
+        self.delivered = []
+        self.event = threading.Event()
+
+    def deliver(self, todos):
+        self.delivered.append([todo['title'] for todo in todos])
+        self.event.set()
+
+
+def _add(todo_manager, title, seconds):
+    reminder = (datetime.now() + timedelta(seconds=seconds)).isoformat()
+    return todo_manager.add_todo(title, '', 'low', '2030-01-01', 'Work', reminder)
+
+
+def test_sessions_that_end_without_unsubscribing_drop_out():
+    service = ReminderService()
+    todo_manager = TodoManager()
+    recorder = Recorder()
+    service.subscribe('ann', todo_manager, recorder.deliver)
+    assert service.is_subscribed('ann', todo_manager)
+
+    del recorder
+    gc.collect()
+    assert not service.is_subscribed('ann', todo_manager)
+    service.shutdown()
+
+
+def test_an_owner_keeps_its_live_subscription():
+    service = ReminderService()
+    todo_manager = TodoManager()
+    ended, live = Recorder(), Recorder()
+    service.subscribe('ann', todo_manager, ended.deliver)
+    service.subscribe('ann', todo_manager, live.deliver)
+    del ended
+    gc.collect()
+
+    _add(todo_manager, 'due', -1)
+    assert live.event.wait(5)
+    assert live.delivered == [['due']]
+
+    service.unsubscribe('ann', todo_manager, live.deliver)
+    assert not service.is_subscribed('ann', todo_manager)
+    service.shutdown()
+
+
+def test_state_of_collected_managers_is_pruned():
+    service = ReminderService()
+    todo_manager = TodoManager()
+    _add(todo_manager, 'later', 3600)
+    _add(todo_manager, 'due', -1)
+    service.track(todo_manager)
+    # fires with nobody subscribed, so it waits as undelivered
+    assert service.check_due() == []
+    assert service._undelivered and service._fired and service._scheduled
+
+    del todo_manager
+    gc.collect()
+    service.check_due()
+    assert not service._undelivered and not service._fired and not service._scheduled
+    assert service._next_due() is None
+
+
+def test_unsubscribing_one_session_keeps_the_others():
+    service = ReminderService()
+    todo_manager = TodoManager()
+    first, second = Recorder(), Recorder()
+    service.subscribe('ann', todo_manager, first.deliver)
+    service.subscribe('ann', todo_manager, second.deliver)
+
+    service.unsubscribe('ann', todo_manager, first.deliver)
+    assert service.is_subscribed('ann', todo_manager)
+    _add(todo_manager, 'due', -1)
+    assert second.event.wait(5)
+    time.sleep(0.05)
+    assert first.delivered == []
+    assert second.delivered == [['due']]
+    service.shutdown()
+
+
+def test_due_reminders_fire_once_in_due_order():
+    service = ReminderService()
+    todo_manager = TodoManager()
+    _add(todo_manager, 'second', -1)
+    _add(todo_manager, 'first', -2)
+    _add(todo_manager, 'later', 3600)
+    service.track(todo_manager)
+
+    recorder = Recorder()
+    fired = service.check_due(todo_manager, recorder.deliver)
+    assert [todo['title'] for todo in fired] == ['first', 'second']
+    assert service.check_due(todo_manager, recorder.deliver) == []
+    assert recorder.delivered == [['first', 'second']]
+    assert service._next_due() > time.time() + 3000
+
+
+def test_completing_or_deleting_a_todo_unschedules_it():
+    service = ReminderService()
+    todo_manager = TodoManager()
+    done = _add(todo_manager, 'done', 60)
+    deleted = _add(todo_manager, 'deleted', 120)
+    reopened = _add(todo_manager, 'reopened', 30)
+    todo_manager.add_todo('no reminder', '', 'low', '2030-01-01', 'Work')
+    todo_manager.add_todo('bad reminder', '', 'low', '2030-01-01', 'Work', 'soon')
+    key = service.track(todo_manager)
+    assert len(service._scheduled) == 3
+
+    todo_manager.update_todo_status(done['id'], True)
+    todo_manager.delete_todo(deleted['id'])
+    todo_manager.update_todo_status(reopened['id'], True)
+    todo_manager.update_todo_status(reopened['id'], False)
+    assert [todo_id for _, todo_id in service._scheduled] == [reopened['id']]
+    assert service._next_due() == service._scheduled[(key, reopened['id'])]
+
+
+def test_thread_wakes_when_the_next_reminder_is_due():
+    service = ReminderService()
+    todo_manager = TodoManager()
+    recorder = Recorder()
+    service.subscribe('ann', todo_manager, recorder.deliver)
+    start = time.monotonic()
+    _add(todo_manager, 'soon', 0.2)
+
+    assert recorder.event.wait(5)
+    assert time.monotonic() - start >= 0.15
+    assert recorder.delivered == [['soon']]
+    assert service.thread_count == 1
+    service.shutdown()
+    assert service.thread_count == 0
+
+
+def test_each_owner_gets_a_reminder_once():
+    service = ReminderService()
+    todo_manager = TodoManager()
+    ann_tab, ann_other_tab, bob = Recorder(), Recorder(), Recorder()
+    service.subscribe('ann', todo_manager, ann_tab.deliver)
+    service.subscribe('ann', todo_manager, ann_other_tab.deliver)
+    service.subscribe('bob', todo_manager, bob.deliver)
+
+    _add(todo_manager, 'due', -1)
+    assert ann_tab.event.wait(5) and bob.event.wait(5)
+    time.sleep(0.05)
+    assert ann_tab.delivered == bob.delivered == [['due']]
+    assert ann_other_tab.delivered == []
+    service.shutdown()
+
+
+def test_manual_checks_skip_subscribed_owners():
+    service = ReminderService()
+    todo_manager = TodoManager()
+    subscribed, manual = Recorder(), Recorder()
+    service.subscribe('ann', todo_manager, subscribed.deliver)
+    # stop the thread so only the manual check delivers
+    service.shutdown()
+
+    _add(todo_manager, 'due', -1)
+    fired = service.check_due(todo_manager, manual.deliver, owner='ann')
+    assert [todo['title'] for todo in fired] == ['due']
+    assert subscribed.delivered == [['due']]
+    assert manual.delivered == []
+
+    _add(todo_manager, 'again', -1)
+    service.check_due(todo_manager, manual.deliver, owner='bob')
+    assert manual.delivered == [['again']]
+
+
+def test_reminders_fired_before_anyone_subscribed_are_delivered_later():
+    service = ReminderService()
+    todo_manager = TodoManager()
+    _add(todo_manager, 'missed', -1)
+    completed = _add(todo_manager, 'completed since', -1)
+    service.track(todo_manager)
+    assert service.check_due() == []
+    todo_manager.update_todo_status(completed['id'], True)
+
+    recorder = Recorder()
+    service.subscribe('ann', todo_manager, recorder.deliver)
+    assert recorder.event.wait(5)
+    assert recorder.delivered == [['missed']]
+    service.shutdown()
+
+
+def test_a_failing_subscriber_does_not_stop_the_others():
+    service = ReminderService()
+    todo_manager = TodoManager()
+    recorder = Recorder()
+
+    def fail(todos):
+        raise RuntimeError("delivery failed")
+
+    service.subscribe('broken', todo_manager, fail)
+    service.subscribe('ann', todo_manager, recorder.deliver)
+    _add(todo_manager, 'due', -1)
+    assert recorder.event.wait(5)
+    assert recorder.delivered == [['due']]
+    service.shutdown()
+
+
+def test_one_thread_serves_every_manager():
+    service = ReminderService()
+    managers = [TodoManager() for _ in range(20)]
+    recorders = [Recorder() for _ in managers]
+    for i, (todo_manager, recorder) in enumerate(zip(managers, recorders)):
+        service.subscribe(f"user{i}", todo_manager, recorder.deliver)
+        _add(todo_manager, f"due {i}", -1)
+
+    assert all(recorder.event.wait(5) for recorder in recorders)
+    assert [recorder.delivered for recorder in recorders] == [[[f"due {i}"]] for i in range(20)]
+    assert service.thread_count == 1
+    service.shutdown()
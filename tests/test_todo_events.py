@@ -0,0 +1,80 @@
+import asyncio
+import json
+
+from reminder_service import ReminderService
+from todo_events import TodoEventBroker
+from todo_manager import TodoManager
+from todo_store import SQLiteTodoStore
+
+
+async def _next_events(queue, count):
+    events = []
+    for _ in range(count):
+        item = await asyncio.wait_for(queue.get(), 5)
+        if item is None:
+            events.append(None)
+            break
+        _, event, data = item
+        events.append((event, json.loads(data)))
+    return events
+
+
+def test_in_process_changes_are_published():
+    async def run():
+        todo_manager = TodoManager()
+        broker = TodoEventBroker(todo_manager, asyncio.get_running_loop(), ReminderService())
+        queue = broker.subscribe()
+        todo = todo_manager.add_todo('a', '', 'low', '2030-01-01', 'Work')
+        todo_manager.delete_todo(todo['id'])
+        events = await _next_events(queue, 2)
+        broker.close()
+        return todo, events
+
+    todo, events = asyncio.run(run())
+    assert events == [('added', {'todo': todo}), ('deleted', {'id': todo['id']})]
+
+
+def test_other_processes_changes_to_a_shared_store_are_published(tmp_path):
+    path = str(tmp_path / 'todos.db')
+
+    async def run():
+        todo_manager = TodoManager(SQLiteTodoStore(path))
+        other = TodoManager(SQLiteTodoStore(path))
+        broker = TodoEventBroker(todo_manager, asyncio.get_running_loop(), ReminderService(), poll_interval=0.01)
+        queue = broker.subscribe()
+        try:
+            todo = other.add_todo('a', '', 'low', '2030-01-01', 'Work')
+            other.update_todo_status(todo['id'], True)
+            local = todo_manager.add_todo('b', '', 'low', '2030-01-01', 'Work')
+            events = await _next_events(queue, 3)
+        finally:
+            broker.close()
+            todo_manager.store.close()
+            other.store.close()
+        return todo, local, events
+
+    todo, local, events = asyncio.run(run())
+    # each change once, with the todo as it is when polled
+    assert [(event, data['todo']['id']) for event, data in events] == [
+        ('added', todo['id']), ('updated', todo['id']), ('added', local['id'])]
+    assert events[0][1]['todo']['completed']
+
+
+def test_subscribers_behind_the_trimmed_log_are_dropped(tmp_path):
+    path = str(tmp_path / 'todos.db')
+
+    async def run():
+        todo_manager = TodoManager(SQLiteTodoStore(path, change_log_size=1))
+        todo_manager.store.TRIM_CHANGES_EVERY = 1
+        broker = TodoEventBroker(todo_manager, asyncio.get_running_loop(), ReminderService(), poll_interval=0.2)
+        queue = broker.subscribe()
+        try:
+            for title in 'abc':
+                todo_manager.add_todo(title, '', 'low', '2030-01-01', 'Work')
+            events = await _next_events(queue, 1)
+        finally:
+            broker.close()
+            todo_manager.store.close()
+        return events
+
+    assert asyncio.run(run()) == [None]
@@ -0,0 +1,57 @@
+from graphql import graphql_sync
+
+from todo_graphql import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, get_graphql_schema
+from todo_manager import TodoManager
+
+
+def _run(todo_manager, query, **variables):
+    return graphql_sync(get_graphql_schema(), query, variable_values=variables,
+                        context_value={'todo_manager': todo_manager})
+
+
+def _manager(count):
+    todo_manager = TodoManager()
+    todo_manager.add_todos([{'title': f"todo {i}"} for i in range(count)])
+    return todo_manager
+
+
+def test_get_todos_without_first_returns_every_todo():
+    todo_manager = _manager(DEFAULT_PAGE_SIZE + 10)
+    result = _run(todo_manager, "{ getTodos { id } }")
+    assert result.errors is None
+    assert len(result.data['getTodos']) == DEFAULT_PAGE_SIZE + 10
+
+    result = _run(todo_manager, "{ getTodos(first: 5) { id } }")
+    assert len(result.data['getTodos']) == 5
+
+
+def test_todos_connection_pages_by_default():
+    todo_manager = _manager(DEFAULT_PAGE_SIZE + 10)
+    query = """query($after: String) {
+        todos(after: $after) { edges { node { title } } page_info { has_next_page end_cursor } }
+    }"""
+    first = _run(todo_manager, query).data['todos']
+    assert len(first['edges']) == DEFAULT_PAGE_SIZE
+    assert first['page_info']['has_next_page']
+
+    rest = _run(todo_manager, query, after=first['page_info']['end_cursor']).data['todos']
+    assert len(rest['edges']) == 10
+    assert not rest['page_info']['has_next_page']
+
+
+def test_first_is_bounded():
+    todo_manager = _manager(1)
+    for query in (f"{{ getTodos(first: {MAX_PAGE_SIZE + 1}) {{ id }} }}", "{ todos(first: -1) { edges { cursor } } }"):
+        result = _run(todo_manager, query)
+        assert 'first must be between' in result.errors[0].message
+
+
+def test_search_todos_pages_and_filters():
+    todo_manager = _manager(DEFAULT_PAGE_SIZE + 5)
+    todo_manager.update_todo_status(todo_manager.todos[1]['id'], True)
+
+    result = _run(todo_manager, '{ searchTodos(query: "tod") { title } }')
+    assert len(result.data['searchTodos']) == DEFAULT_PAGE_SIZE
+
+    result = _run(todo_manager, '{ searchTodos(query: "todo", completed: true, first: 5) { title } }')
+    assert result.data['searchTodos'] == [{'title': "todo 1"}]
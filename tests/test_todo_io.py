@@ -0,0 +1,136 @@
+import io
+import json
+
+import pytest
+
+from todo_io import FORMATS, MAX_REPORTED_ERRORS, detect_format, export_todos, import_todos, main, todo_from_row
+from todo_manager import TodoManager
+
+
+def _jsonl(*rows):
+    return [json.dumps(row) + '\n' for row in rows]
+
+
+@pytest.mark.parametrize('field, value', [
+    ('title', 123), ('description', 4.5), ('category', ['Work']), ('priority', 1), ('due_date', 20300101)
+])
+def test_non_string_fields_are_row_errors(field, value):
+    row = {'title': 'ok'}
+    row[field] = value
+    with pytest.raises(ValueError, match=field):
+        todo_from_row(row)
+
+
+def test_bad_field_types_are_reported_per_row(store):
+    todo_manager = TodoManager(store)
+    report = import_todos(todo_manager, _jsonl(
+        {'title': 'first report'},
+        {'title': 123},
+        {'title': 'bad category', 'category': 7},
+        {'title': 'bad description', 'description': {'text': 'x'}},
+        {'title': 'second report'},
+    ), 'jsonl', batch_size=2)
+
+    assert report['imported'] == 2
+    assert report['skipped'] == 3
+    assert [line for line, _ in report['errors']] == [2, 3, 4]
+    assert [todo['title'] for todo in todo_manager.search_todos('report')] == ['first report', 'second report']
+
+
+def test_numeric_ids_page_like_string_ids(store):
+    todo_manager = TodoManager(store)
+    rows = _jsonl({'id': 5, 'title': 'a'}, {'id': 6, 'title': 'b'}, {'id': True, 'title': 'c'})
+    report = import_todos(todo_manager, rows, 'jsonl')
+    assert report['imported'] == 2
+    assert todo_manager.get_todo('5')['title'] == 'a'
+
+    lines = list(export_todos(todo_manager, 'jsonl', page_size=1))
+    assert [json.loads(line)['id'] for line in lines] == ['5', '6']
+
+
+def test_rows_with_invalid_values_are_reported_by_line(store):
+    todo_manager = TodoManager(store)
+    lines = _jsonl(
+        {'title': 'ok', 'priority': 'high', 'completed': 'yes', 'reminder_datetime': '2030-01-01T09:00:00'},
+        {'title': 'bad priority', 'priority': 'urgent'},
+        {'title': 'bad date', 'due_date': 'tomorrow'},
+        {'title': 'bad completed', 'completed': 'maybe'},
+        {'description': 'no title'},
+    ) + ['not json\n', '[1, 2]\n', '\n']
+    report = import_todos(todo_manager, lines, 'jsonl')
+
+    assert report['imported'] == 1
+    assert report['skipped'] == 6
+    assert [line for line, _ in report['errors']] == [2, 3, 4, 5, 6, 7]
+    assert 'priority' in report['errors'][0][1]
+    assert 'invalid JSON' in report['errors'][4][1]
+    todo = todo_manager.todos[0]
+    assert (todo['priority'], todo['completed'], todo['category']) == ('high', True, 'Other')
+    assert todo_manager.check_counters()
+
+
+def test_duplicate_ids_are_skipped(store):
+    todo_manager = TodoManager(store)
+    import_todos(todo_manager, _jsonl({'id': 'a', 'title': 'first'}), 'jsonl')
+    report = import_todos(todo_manager, _jsonl({'id': 'a', 'title': 'again'}, {'id': 'b', 'title': 'b'},
+                                               {'id': 'b', 'title': 'b again'}), 'jsonl')
+
+    assert (report['imported'], report['skipped']) == (1, 2)
+    assert [message for _, message in report['errors']] == ["todo a already exists", "todo b already exists"]
+    assert [todo['title'] for todo in todo_manager.todos] == ['first', 'b']
+
+
+def test_reported_errors_are_capped():
+    report = import_todos(TodoManager(), ['{}\n'] * (MAX_REPORTED_ERRORS + 10), 'jsonl')
+    assert report['skipped'] == MAX_REPORTED_ERRORS + 10
+    assert len(report['errors']) == MAX_REPORTED_ERRORS
+
+
+@pytest.mark.parametrize('fmt', FORMATS)
+def test_export_then_import_round_trips(store, fmt):
+    source = TodoManager()
+    source.add_todos([
+        {'title': 'plain'},
+        {'title': 'with, comma', 'description': 'line one\nline "two"', 'priority': 'high', 'category': 'Work',
+         'reminder_datetime': '2030-01-01T09:00:00'},
+    ])
+    source.update_todo_status(source.todos[0]['id'], True)
+    lines = list(export_todos(source, fmt, page_size=1))
+
+    target = TodoManager(store)
+    report = import_todos(target, io.StringIO(''.join(lines), newline=''), fmt, batch_size=1)
+    assert report == {'imported': 2, 'skipped': 0, 'errors': []}
+    assert target.todos == source.todos
+
+
+def test_csv_import_accepts_a_byte_order_mark(tmp_path):
+    path = tmp_path / 'todos.csv'
+    path.write_text("title,priority\nfirst,low\nsecond,\n", encoding='utf-8-sig')
+    todo_manager = TodoManager()
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        report = import_todos(todo_manager, f, 'csv')
+    assert report['imported'] == 2
+    assert [todo['priority'] for todo in todo_manager.todos] == ['low', 'medium']
+
+
+def test_detect_format():
+    assert detect_format('todos.CSV') == 'csv'
+    assert detect_format('todos.ndjson') == 'jsonl'
+    with pytest.raises(ValueError):
+        detect_format('todos.xlsx')
+
+
+def test_command_line_import_and_export(tmp_path, capsys):
+    source = tmp_path / 'todos.jsonl'
+    source.write_text(''.join(_jsonl({'title': 'a'}, {'title': ''}, {'title': 'b'})), encoding='utf-8')
+    database = str(tmp_path / 'todos.db')
+
+    assert main(['import', str(source), '--backend', 'sqlite', '--path', database]) == 0
+    captured = capsys.readouterr()
+    assert "Imported 2 todos, skipped 1" in captured.out
+    assert "line 2: title is required" in captured.err
+
+    exported = tmp_path / 'out.csv'
+    assert main(['export', str(exported), '--backend', 'sqlite', '--path', database]) == 0
+    rows = exported.read_text(encoding='utf-8').splitlines()
+    assert rows[0].startswith('id,') and len(rows) == 3
@@ -0,0 +1,126 @@
+from collections import Counter
+
+from conftest import make_todo
+from todo_manager import TodoManager
+from todo_store import SQLiteTodoStore
+
+
+def _manager(store):
+    todo_manager = TodoManager(store)
+    todo_manager.add_todos([
+        {'title': 'a', 'priority': 'high', 'category': 'Work'},
+        {'title': 'b', 'priority': 'low', 'category': 'Health'},
+        {'title': ''},
+        {'title': 'c', 'priority': 'urgent'},
+        {'title': 'd'},
+    ])
+    return todo_manager
+
+
+def test_counters_follow_bulk_operations(store):
+    todo_manager = _manager(store)
+    assert sum(todo_manager.counters.values()) == 3
+    assert todo_manager.check_counters()
+
+    ids = [todo['id'] for todo in todo_manager.todos]
+    results = todo_manager.update_todo_statuses([
+        {'id': ids[0], 'completed': True}, {'id': 'missing', 'completed': True}
+    ])
+    assert [result['error'] is None for result in results] == [True, False]
+    assert todo_manager.counters[(True, 'high', 'Work')] == 1
+    assert todo_manager.check_counters()
+
+    results = todo_manager.delete_todos([ids[1], 'missing'])
+    assert [result['deleted'] for result in results] == [True, False]
+    assert todo_manager.check_counters()
+
+    imported, skipped = todo_manager.import_todos(
+        [make_todo('x', priority='low'), make_todo('y', completed=True), make_todo('x')], batch_size=2)
+    assert (imported, skipped) == (2, ['x'])
+    assert todo_manager.counters == Counter({
+        (True, 'high', 'Work'): 1, (False, 'medium', 'Other'): 1,
+        (False, 'low', 'Work'): 1, (True, 'medium', 'Work'): 1})
+    assert todo_manager.check_counters()
+
+
+def test_check_counters_reports_drift(store):
+    todo_manager = _manager(store)
+    todo_manager.counters[(False, 'medium', 'Other')] += 1
+    assert not todo_manager.check_counters()
+
+    todo_manager.rebuild_counters()
+    assert todo_manager.check_counters()
+
+    # a negative count is drift, not an empty bucket
+    todo_manager.counters[(True, 'low', 'Other')] -= 1
+    assert not todo_manager.check_counters()
+
+
+def test_failed_bulk_change_recounts(store):
+    todo_manager = _manager(store)
+    todo_id = todo_manager.todos[0]['id']
+    try:
+        todo_manager.update_todo_statuses([{'id': todo_id, 'completed': True}, {}])
+    except KeyError:
+        pass
+    assert not todo_manager.get_todo(todo_id)['completed']
+    todo_manager.get_todos_data_for_visualization()
+    assert todo_manager.check_counters()
+
+
+def test_changes_since_returns_latest_change_per_todo():
+    todo_manager = TodoManager()
+    first = todo_manager.add_todo('a', '', 'low', '2030-01-01', 'Work')
+    second = todo_manager.add_todo('b', '', 'low', '2030-01-01', 'Work')
+    version, epoch = todo_manager.version, todo_manager.epoch
+    todo_manager.update_todo_status(first['id'], True)
+    todo_manager.update_todo_status(first['id'], False)
+    todo_manager.delete_todo(second['id'])
+
+    changes = todo_manager.changes_since(version, epoch)
+    assert not changes['full_resync']
+    assert [todo['id'] for todo in changes['todos']] == [first['id']]
+    assert changes['deleted_ids'] == [second['id']]
+    assert changes['version'] == version + 3
+
+
+def test_changes_since_past_the_truncated_log_resyncs():
+    todo_manager = TodoManager(change_log_size=3)
+    for title in 'abcde':
+        todo_manager.add_todo(title, '', 'low', '2030-01-01', 'Work')
+    epoch = todo_manager.epoch
+
+    assert todo_manager.changes_since(1, epoch)['full_resync']
+    changes = todo_manager.changes_since(2, epoch)
+    assert not changes['full_resync']
+    assert [todo['title'] for todo in changes['todos']] == ['c', 'd', 'e']
+
+
+def test_changes_since_another_or_missing_epoch_resyncs():
+    todo_manager = TodoManager()
+    todo_manager.add_todo('a', '', 'low', '2030-01-01', 'Work')
+
+    assert todo_manager.changes_since(1, 'other')['full_resync']
+    assert todo_manager.changes_since(1)['full_resync']
+    changes = todo_manager.changes_since(0)
+    assert not changes['full_resync']
+    assert [todo['title'] for todo in changes['todos']] == ['a']
+
+
+def test_shared_store_changes_reach_other_managers(tmp_path):
+    path = str(tmp_path / 'todos.db')
+    writer = TodoManager(SQLiteTodoStore(path, change_log_size=2))
+    reader = TodoManager(SQLiteTodoStore(path, change_log_size=2))
+    writer.store.TRIM_CHANGES_EVERY = 1
+    try:
+        assert reader.epoch == writer.epoch
+        for title in 'abcd':
+            writer.add_todo(title, '', 'low', '2030-01-01', 'Work')
+
+        assert reader.version == 4
+        assert reader.changes_since(1, reader.epoch)['full_resync']
+        changes = reader.changes_since(2, reader.epoch)
+        assert [todo['title'] for todo in changes['todos']] == ['c', 'd']
+    finally:
+        writer.store.close()
+        reader.store.close()
@@ -0,0 +1,188 @@
+import random
+
+import pytest
+
+from conftest import make_todo
+from todo_graphql import SORT_OPTIONS
+from todo_store import PRIORITIES, InMemoryTodoStore, SQLiteTodoStore, decode_cursor, encode_cursor
+
+
+def test_transaction_rolls_back_every_change(store):
+    store.add(make_todo('a', priority='low'))
+    store.add(make_todo('b'))
+
+    with pytest.raises(RuntimeError):
+        with store.transaction():
+            store.add(make_todo('c', priority='high'))
+            store.update('a', completed=True, priority='high')
+            store.delete('b')
+            raise RuntimeError("abort")
+
+    assert [todo['id'] for todo in store.all()] == ['a', 'b']
+    assert store.get('a')['completed'] is False
+    assert store.get('a')['priority'] == 'low'
+    assert store.get('c') is None
+    # indexes are rolled back along with the todos
+    assert [todo['id'] for todo in store.query(filter_completed=False, sort_by='priority')] == ['a', 'b']
+    assert store.query(priority='high') == []
+
+
+def test_nested_transactions_join_the_outer_one(store):
+    with pytest.raises(RuntimeError):
+        with store.transaction():
+            store.add(make_todo('a'))
+            with store.transaction():
+                store.add(make_todo('b'))
+            raise RuntimeError("abort")
+
+    assert store.all() == []
+
+
+def test_committed_transaction_keeps_changes(store):
+    with store.transaction():
+        store.add(make_todo('a'))
+        store.add(make_todo('b'))
+        store.delete('a')
+
+    assert [todo['id'] for todo in store.all()] == ['b']
+
+
+def _seed(stores, count=600, seed=7):
+    rng = random.Random(seed)
+    for i in range(count):
+        todo = make_todo(
+            f"id{i}",
+            priority=rng.choice(PRIORITIES),
+            # some todos have no due date, which sorts before every date
+            due_date=f"2030-01-{rng.randint(1, 28):02d}" if rng.random() < 0.9 else None,
+            # one rare category, so some buckets are tiny
+            category=rng.choice(['Work', 'Other', 'Health']) if rng.random() < 0.97 else 'Rare',
+            completed=rng.random() < 0.3
+        )
+        for store in stores:
+            store.add(dict(todo))
+    for _ in range(count // 5):
+        todo_id = f"id{rng.randrange(count)}"
+        complete = rng.random() < 0.5
+        for store in stores:
+            if complete:
+                store.update(todo_id, completed=True)
+            else:
+                store.delete(todo_id)
+
+
+def _walk(store, limit, **filters):
+    ids = []
+    after = None
+    while True:
+        rows = store.page(after=after, limit=limit, **filters)
+        ids.extend(todo['id'] for _, todo in rows)
+        if len(rows) < limit:
+            return ids
+        after = rows[-1][0]
+
+
+def test_in_memory_and_sqlite_pages_match(tmp_path):
+    memory = InMemoryTodoStore()
+    sqlite = SQLiteTodoStore(str(tmp_path / 'todos.db'))
+    _seed([memory, sqlite])
+
+    rng = random.Random(11)
+    for _ in range(200):
+        filters = {'sort_by': rng.choice(SORT_OPTIONS)}
+        if rng.random() < 0.5:
+            filters['filter_completed'] = rng.random() < 0.5
+        if rng.random() < 0.5:
+            filters['category'] = rng.choice(['work', 'Other', 'Rare', 'none'])
+        if rng.random() < 0.5:
+            filters['priority'] = rng.choice(PRIORITIES + ['urgent'])
+        if rng.random() < 0.3:
+            filters['due_from'] = f"2030-01-{rng.randint(1, 28):02d}"
+        if rng.random() < 0.3:
+            filters['due_to'] = f"2030-01-{rng.randint(1, 28):02d}"
+
+        expected = [todo['id'] for todo in sqlite.query(**filters)]
+        assert [todo['id'] for todo in memory.query(**filters)] == expected, filters
+        # paging with cursors visits the same todos in the same order
+        limit = rng.choice([1, 7, 50])
+        assert _walk(memory, limit, **filters) == expected, (filters, limit)
+        assert _walk(sqlite, limit, **filters) == expected, (filters, limit)
+    sqlite.close()
+
+
+def test_page_keys_round_trip_through_cursors(store):
+    for i in range(5):
+        store.add(make_todo(f"id{i}", priority=PRIORITIES[i % 3]))
+
+    rows = store.page(sort_by='priority', limit=2)
+    cursor = encode_cursor('priority', rows[-1][0])
+    rest = store.page(sort_by='priority', after=decode_cursor(cursor, 'priority'))
+
+    ids = [todo['id'] for _, todo in rows + rest]
+    assert ids == [todo['id'] for todo in store.query(sort_by='priority')]
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, 'due_date')
+
+
+def test_due_date_cursors_round_trip_past_missing_dates(store):
+    for i in range(6):
+        store.add(make_todo(f"id{i}", due_date=None if i % 2 else f"2030-01-0{i + 1}"))
+
+    ids = []
+    after = None
+    while True:
+        rows = store.page(sort_by='due_date', after=after, limit=2)
+        ids.extend(todo['id'] for _, todo in rows)
+        if len(rows) < 2:
+            break
+        after = decode_cursor(encode_cursor('due_date', rows[-1][0]), 'due_date')
+    assert ids == ['id1', 'id3', 'id5', 'id0', 'id2', 'id4']
+
+
+def _search(store, query, **kwargs):
+    return [todo['id'] for todo in store.search(query, **kwargs)]
+
+
+def test_search_matches_every_word_and_a_typed_prefix(store):
+    store.add(make_todo('a', title="Buy milk", description="and bread"))
+    store.add(make_todo('b', title="Milky way poster", description=''))
+    store.add(make_todo('c', title="Call the bank", description="about the milk bill"))
+    store.add(make_todo('d', title="Bread maker", description="return it", completed=True))
+
+    assert _search(store, "milk") == ['a', 'b', 'c']
+    # a trailing space ends the prefix
+    assert _search(store, "milk ") == ['a', 'c']
+    assert _search(store, "milk bread") == ['a']
+    assert _search(store, "BREAD") == ['a', 'd']
+    assert _search(store, "bread", filter_completed=True) == ['d']
+    assert _search(store, "bread", filter_completed=False) == ['a']
+    assert _search(store, "the, bi") == ['c']
+    assert _search(store, "nothing") == []
+    assert _search(store, "  ") == []
+
+
+def test_search_returns_the_oldest_matches_first(store):
+    for i in range(40):
+        store.add(make_todo(f"id{i}", title=f"report {i}" if i % 3 else f"note {i}"))
+    expected = [f"id{i}" for i in range(40) if i % 3]
+    assert _search(store, "report") == expected
+    assert _search(store, "rep", limit=5) == expected[:5]
+
+
+def test_search_follows_updates_and_deletes(store):
+    store.add(make_todo('a', title="Draft agenda"))
+    store.add(make_todo('b', title="Draft minutes"))
+    store.update('a', title="Final agenda")
+    store.delete('b')
+
+    assert _search(store, "draft") == []
+    assert _search(store, "final agenda") == ['a']
+
+
+def test_search_index_is_rebuilt_after_a_bulk_load(store):
+    with store.bulk_load():
+        for i in range(10):
+            store.add(make_todo(f"id{i}", title=f"imported {i}", description="batch" if i % 2 else ''))
+    assert _search(store, "batch") == ['id1', 'id3', 'id5', 'id7', 'id9']
+    store.add(make_todo('late', title="batch added later"))
+    assert _search(store, "batch")[-1] == 'late'
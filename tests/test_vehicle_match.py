@@ -0,0 +1,202 @@
+import importlib.util
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from vehicle_match import create_matcher, load_database_names, main, test_cases
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_catalog_skips_blank_lines_and_comments(tmp_path):
+    path = tmp_path / 'catalog.txt'
+    path.write_text("ford_figo\n\n# hatchbacks\n  honda_wr_v  \n", encoding='utf-8')
+    assert load_database_names(str(path)) == ['ford_figo', 'honda_wr_v']
+
+
+@pytest.mark.parametrize('name', ['honda', '_city', 'honda_'])
+def test_catalog_names_need_a_brand_and_model(tmp_path, name):
+    path = tmp_path / 'catalog.txt'
+    path.write_text(f"ford_figo\n{name}\n", encoding='utf-8')
+    with pytest.raises(ValueError, match=f"line 2: '{name}'"):
+        load_database_names(str(path))
+
+
+def test_importing_has_no_side_effects():
+    result = subprocess.run(
+        [sys.executable, '-c', "import sys, vehicle_match; print('fuzzywuzzy' in sys.modules)"],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    # nothing is printed and fuzzywuzzy is not loaded until matching starts
+    assert result.stdout == "False\n"
+
+
+def test_main_reports_a_malformed_catalog(tmp_path, capsys):
+    path = tmp_path / 'catalog.txt'
+    path.write_text("honda\n", encoding='utf-8')
+    with pytest.raises(SystemExit):
+        main(['--catalog', str(path), 'honda city'])
+    assert "line 1: 'honda'" in capsys.readouterr().err
+
+
+@pytest.fixture(scope='module')
+def bulk_match():
+    # the page runs main() on import, which only warns outside `streamlit run`
+    spec = importlib.util.spec_from_file_location('bulk_match', os.path.join(ROOT, 'pages', 'bulk_match.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.mark.parametrize('data, rows', [
+    (b"", 0),
+    (b"dealer\n", 0),
+    (b"dealer\nhonda city\n\nford figo", 2),
+    (b'\xef\xbb\xbfdealer\r\n"honda\r\ncity"\r\nford figo\r\n', 2),
+    (b"dealer\n\xff\xfe broken\n", 1),
+])
+def test_count_csv_rows(bulk_match, data, rows):
+    assert bulk_match.count_csv_rows(data) == rows
+
+
+def _run_job(job):
+    job.start()
+    job._thread.join(5)
+    assert job.done
+
+
+def test_bulk_match_job_routes_rows(bulk_match):
+    data = b'id,dealer\n1,honda city\n2,"ford, figo"\n3,zzzz qqqq\n4,maruti swift\n'
+    job = bulk_match.BulkMatchJob(create_matcher(), data, 'dealer', reject_threshold=60, chunk_size=2)
+    _run_job(job)
+
+    assert job.error is None
+    assert job.total_rows == job.processed == 4
+    assert job.progress == 1.0
+    assert [(row['input'], row['match']) for row in job.results] == [
+        ('honda city', 'honda_city'), ('ford, figo', 'ford_figo'), ('maruti swift', 'maruti_swift')
+    ]
+    assert job.unmatched == [{'input': 'zzzz qqqq'}]
+    assert job.to_csv(unmatched=True) == b"input\nzzzz qqqq\n"
+
+
+def test_bulk_match_job_reports_errors(bulk_match):
+    job = bulk_match.BulkMatchJob(create_matcher(), b"dealer\nhonda city\n", 'missing')
+    _run_job(job)
+    assert job.error
+    assert job.results == []
+
+
+def test_cancelled_bulk_match_job_stops_between_chunks(bulk_match):
+    job = bulk_match.BulkMatchJob(create_matcher(), b"dealer\nhonda city\nford figo\n", 'dealer', chunk_size=1)
+    job.cancel()
+    _run_job(job)
+    assert job.processed == 0
+    assert job.results == []
+
+
+INPUTS = list(test_cases) + [
+    "honda city zx", "Maruti Swift Dzire VXI", "tata nexon ev", "toyota innova", "mahindra xuv 500 w8",
+    "new hyundai i20 asta", "na-thar lx", "zzzz qqqq", "", "honda_city",
+]
+
+
+def test_shared_matcher_gives_the_same_results_on_every_thread():
+    expected = [create_matcher(cache_size=0).get_best_match(input_string) for input_string in INPUTS]
+    # a small cache keeps stripes evicting while threads read them
+    matcher = create_matcher(cache_size=16)
+    results = {}
+
+    def match(thread_index):
+        results[thread_index] = [
+            [matcher.get_best_match(input_string) for input_string in INPUTS] for _ in range(20)
+        ]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(match, range(8)))
+    assert all(rounds == [expected] * 20 for rounds in results.values())
+
+
+
+def test_cached_results_are_keyed_by_thresholds():
+    matcher = create_matcher()
+    best_match, confidence = matcher.get_best_match("honda city zx", reject_threshold=0)
+    assert best_match == 'honda_city'
+    assert matcher.get_best_match("honda city zx", reject_threshold=confidence + 1) == (None, 0)
+    assert matcher.get_best_match("honda city zx", reject_threshold=0) == (best_match, confidence)
+
+
+# catalog words mixed into inputs that match no name exactly, so most candidates get scored or pruned
+SCRAMBLED_INPUTS = [
+    f"{brand} {model} {other}"
+    for brand, model, other in zip(
+        ['honda', 'tata', 'ford', 'hyundai', 'maruti', 'toyota', 'mahindra', 'kia', 'dealer'] * 3,
+        ['city', 'nexon', 'aspire', 'grand i10', 'brezza', 'yaris', 'thar', 'seltos', 'swift'] * 3,
+        ['1.5 vx', 'xz+', 'titanium', 'sportz', 'zxi', 'g', 'lx 4wd', 'htx', 'vxi', 'ev', '', 'at'] * 2
+    )
+]
+
+
+def _exhaustive_match(matcher, input_string):
+    """Best score over every candidate, without bounds or early exits"""
+    text = matcher.preprocess_input(input_string)
+    if text in matcher.exact_name_map:
+        return 100.0
+    brand, _ = matcher.extract_brand_and_model(text)
+    if brand:
+        return max(matcher.calculate_match_score(text, f"{brand}_{model}") for model in matcher.brand_model_map[brand])
+    scores = [matcher.calculate_similarity_score(text, name)
+              for name in matcher.database_names if name.split('_', 1)[0] in text]
+    return max(scores, default=0)
+
+
+@pytest.mark.parametrize('input_string', INPUTS + SCRAMBLED_INPUTS)
+def test_pruned_match_equals_an_exhaustive_scan(input_string):
+    matcher = create_matcher(cache_size=0, accept_threshold=None)
+    best_match, confidence = matcher.get_best_match(input_string)
+    assert confidence == _exhaustive_match(matcher, input_string)
+    if best_match is not None:
+        text = matcher.preprocess_input(input_string)
+        brand, _ = matcher.extract_brand_and_model(text)
+        score = matcher.calculate_match_score if brand else matcher.calculate_similarity_score
+        assert best_match in matcher.exact_name_map.values()
+        assert confidence == 100.0 or score(text, best_match) == confidence
+
+
+@pytest.mark.parametrize('input_string', INPUTS + SCRAMBLED_INPUTS)
+def test_upper_bounds_are_never_below_scores(input_string):
+    matcher = create_matcher()
+    text = matcher.preprocess_input(input_string)
+    for name in matcher.database_names:
+        assert matcher.similarity_score_upper_bound(text, name) >= matcher.calculate_similarity_score(text, name)
+        if text:
+            assert matcher.match_score_upper_bound(text, name) >= matcher.calculate_match_score(text, name) - 1e-9
+
+
+def test_accept_threshold_stops_scanning_early(monkeypatch):
+    matcher = create_matcher(cache_size=0)
+    calls = []
+    score = matcher.calculate_match_score
+    monkeypatch.setattr(matcher, 'calculate_match_score', lambda *args: calls.append(args) or score(*args))
+
+    exhaustive = matcher.get_best_match("maruti swift vxi", accept_threshold=None)
+    scored_exhaustively = len(calls)
+    calls.clear()
+    early = matcher.get_best_match("maruti swift vxi", accept_threshold=50)
+    assert early[1] >= 50
+    assert len(calls) < scored_exhaustively
+    assert exhaustive[1] >= early[1]
+
+
+def test_reject_threshold_routes_weak_matches_for_review():
+    matcher = create_matcher()
+    assert matcher.get_best_match("zzzz qqqq", reject_threshold=0) == (None, 0)
+    best_match, confidence = matcher.get_best_match("honda city zx")
+    assert matcher.get_best_match("honda city zx", reject_threshold=100) == (None, 0)
+
+    matched, unmatched = matcher.route_matches(["honda city zx", "zzzz qqqq", "tata nexon"], reject_threshold=60)
+    assert matched == [("honda city zx", best_match, confidence), ("tata nexon", 'tata_nexon', 100.0)]
+    assert unmatched == ["zzzz qqqq"]
@@ -0,0 +1,143 @@
+import asyncio
+import itertools
+import json
+import logging
+import threading
+
+from reminder_service import get_reminder_service
+
+logger = logging.getLogger(__name__)
+
+
+class TodoEventBroker:
+    """Fans todo changes and due reminders out to asyncio subscribers.
+
+    Events come from the todo manager's listeners and the reminder service,
+    on whichever thread made the change, and are handed to the event loop
+    with call_soon_threadsafe. A shared store (SQLite) is also written by
+    other processes, so its change log is polled every poll_interval seconds
+    instead of listening. Subscribers just await their queue, so idle ones
+    cost nothing. A subscriber that falls max_queued events behind, or
+    behind the shared change log, is dropped and has to resync.
+    """
+
+    def __init__(self, todo_manager, loop, reminder_service=None, max_queued=1000, poll_interval=1.0):
+        self.todo_manager = todo_manager
+        self.loop = loop
+        self.reminder_service = reminder_service
+        self.max_queued = max_queued
+        self.poll_interval = poll_interval
+        self._event_ids = itertools.count(1)
+        self._subscribers = set()
+        # subscribe to reminders only while somebody is listening
+        self._reminder_lock = threading.Lock()
+        self._reminders_subscribed = False
+        self._closed = threading.Event()
+        self._poller = None
+        if getattr(todo_manager.store, 'shared', False):
+            # change log version published up to
+            self._version = todo_manager.store.change_version()
+            self._poller = threading.Thread(target=self._poll_changes, name='todo-events-poll', daemon=True)
+            self._poller.start()
+        else:
+            todo_manager.add_listener(self._on_todo_event)
+
+    def close(self):
+        self._closed.set()
+        if self._poller is not None:
+            self._poller.join()
+        else:
+            self.todo_manager.remove_listener(self._on_todo_event)
+        self._set_reminder_subscription(False)
+        self._drop_all()
+
+    def subscribe(self):
+        """A queue receiving (event id, event type, payload) tuples; None means dropped"""
+        queue = asyncio.Queue()
+        self._subscribers.add(queue)
+        self._set_reminder_subscription(True)
+        return queue
+
+    def unsubscribe(self, queue):
+        self._subscribers.discard(queue)
+        if not self._subscribers:
+            self._set_reminder_subscription(False)
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def _set_reminder_subscription(self, subscribed):
+        with self._reminder_lock:
+            if subscribed == self._reminders_subscribed:
+                return
+            service = self.reminder_service or get_reminder_service()
+            if subscribed:
+                service.subscribe(self, self.todo_manager, self._on_reminders)
+            else:
+                service.unsubscribe(self, self.todo_manager)
+            self._reminders_subscribed = subscribed
+
+    def _on_todo_event(self, event, todo):
+        payload = {'id': todo['id']} if event == 'deleted' else {'todo': todo}
+        self._publish_threadsafe(event, payload)
+
+    def _poll_changes(self):
+        store = self.todo_manager.store
+        while not self._closed.wait(self.poll_interval):
+            try:
+                if not self._subscribers:
+                    # nobody to tell; start from here once somebody subscribes
+                    self._version = store.change_version()
+                    continue
+                current, log_start, changes = store.changes_since(self._version)
+                if log_start > self._version:
+                    # the log was trimmed past what subscribers have seen
+                    self.loop.call_soon_threadsafe(self._drop_all)
+                else:
+                    for _, event, todo_id in changes:
+                        if event == 'deleted':
+                            self._on_todo_event(event, {'id': todo_id})
+                            continue
+                        todo = store.get(todo_id)
+                        # deleted since; its delete event follows
+                        if todo is not None:
+                            self._on_todo_event(event, todo)
+                self._version = current
+            except RuntimeError:
+                # the loop is closed
+                return
+            except Exception:
+                logger.exception("Polling the todo change log failed")
+
+    def _on_reminders(self, todos):
+        self._publish_threadsafe('reminder', {'todos': todos})
+
+    def _publish_threadsafe(self, event, payload):
+        if not self._subscribers:
+            return
+        # serialize now, before the todo dicts can change on another thread
+        data = json.dumps(payload)
+        try:
+            self.loop.call_soon_threadsafe(self._publish, event, data)
+        except RuntimeError:
+            # the loop is closed
+            pass
+
+    def _publish(self, event, data):
+        event_id = next(self._event_ids)
+        for queue in list(self._subscribers):
+            if queue.qsize() >= self.max_queued:
+                self._drop(queue)
+            else:
+                queue.put_nowait((event_id, event, data))
+
+    def _drop_all(self):
+        for queue in list(self._subscribers):
+            self._drop(queue)
+
+    def _drop(self, queue):
+        self.unsubscribe(queue)
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
@@ -0,0 +1,351 @@
+from datetime import datetime
+from functools import lru_cache
+
+import pytz
+from graphql import (GraphQLObjectType, GraphQLString, GraphQLSchema, GraphQLBoolean, GraphQLInt,
+                     GraphQLNonNull, GraphQLField, GraphQLList, GraphQLArgument, GraphQLError,
+                     GraphQLInputObjectType, GraphQLInputField, execute, validate)
+from graphql.language import parse
+
+# Fixed operations used by the app, parsed and validated once per process
+TODO_OPERATIONS = parse("""
+mutation AddTodo(
+    $title: String!, $description: String, $priority: String, $due_date: String,
+    $category: String, $reminder_datetime: String
+) {
+    addTodo(
+        title: $title, description: $description, priority: $priority, due_date: $due_date,
+        category: $category, reminder_datetime: $reminder_datetime
+    ) {
+        id
+        title
+        description
+    }
+}
+
+mutation UpdateTodoStatus($id: String!, $completed: String!) {
+    updateTodoStatus(id: $id, completed: $completed) {
+        id
+        completed
+    }
+}
+
+mutation DeleteTodo($id: String!) {
+    deleteTodo(id: $id)
+}
+
+mutation UpdateTodoStatuses($updates: [TodoStatusInput!]!) {
+    updateTodoStatuses(updates: $updates) {
+        todo {
+            id
+        }
+        error
+    }
+}
+
+mutation DeleteTodos($ids: [String!]!) {
+    deleteTodos(ids: $ids) {
+        id
+        deleted
+        error
+    }
+}
+""")
+
+
+def _todo_manager(info):
+    return info.context['todo_manager']
+
+
+# page size used by the todos connection and searchTodos when first is not
+# given, and the most any single request may ask for
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+SORT_OPTIONS = (None, 'priority', 'due_date')
+
+
+def _todo_filter_args():
+    return {
+        'completed': GraphQLArgument(GraphQLBoolean),
+        'category': GraphQLArgument(GraphQLString),
+        'priority': GraphQLArgument(GraphQLString),
+        'due_from': GraphQLArgument(GraphQLString),
+        'due_to': GraphQLArgument(GraphQLString),
+        'sort_by': GraphQLArgument(GraphQLString),
+        'first': GraphQLArgument(GraphQLInt),
+        'after': GraphQLArgument(GraphQLString),
+    }
+
+
+def _resolve_todos_page(info, first, completed=None, category=None, priority=None,
+                        due_from=None, due_to=None, sort_by=None, after=None):
+    # first is None only for an unpaged getTodos
+    if sort_by not in SORT_OPTIONS:
+        raise GraphQLError(f"sort_by must be one of: {', '.join(option for option in SORT_OPTIONS if option)}")
+    if first is not None and not 0 <= first <= MAX_PAGE_SIZE:
+        raise GraphQLError(f"first must be between 0 and {MAX_PAGE_SIZE}")
+    try:
+        return _todo_manager(info).get_todos_page(
+            first=first, after=after, sort_by=sort_by, filter_completed=completed,
+            category=category, priority=priority, due_from=due_from, due_to=due_to
+        )
+    except ValueError as e:
+        raise GraphQLError(str(e))
+
+
+def _resolve_get_todos(obj, info, first=None, **kwargs):
+    rows, _ = _resolve_todos_page(info, first, **kwargs)
+    return [todo for _, todo in rows]
+
+
+def _resolve_todos_connection(obj, info, first=None, **kwargs):
+    first = DEFAULT_PAGE_SIZE if first is None else first
+    rows, has_next_page = _resolve_todos_page(info, first, **kwargs)
+    return {
+        'edges': [{'cursor': cursor, 'node': todo} for cursor, todo in rows],
+        'page_info': {
+            'has_next_page': has_next_page,
+            'end_cursor': rows[-1][0] if rows else None
+        }
+    }
+
+
+def _resolve_search_todos(obj, info, query, completed=None, first=None):
+    first = DEFAULT_PAGE_SIZE if first is None else first
+    if not 0 <= first <= MAX_PAGE_SIZE:
+        raise GraphQLError(f"first must be between 0 and {MAX_PAGE_SIZE}")
+    return _todo_manager(info).search_todos(query, filter_completed=completed, limit=first)
+
+
+def _resolve_changes_since(obj, info, version, epoch=None):
+    return _todo_manager(info).changes_since(version, epoch)
+
+
+def _add_todo(obj, info, **kwargs):
+    return _todo_manager(info).add_todo(
+        kwargs['title'],
+        kwargs.get('description') or '',
+        kwargs.get('priority') or 'medium',
+        kwargs.get('due_date') or datetime.now(pytz.UTC).isoformat(),
+        kwargs.get('category') or 'Other',
+        kwargs.get('reminder_datetime')
+    )
+
+
+def _add_todos(obj, info, todos):
+    return _todo_manager(info).add_todos(todos)
+
+
+def _update_todo_statuses(obj, info, updates):
+    return _todo_manager(info).update_todo_statuses(updates)
+
+
+def _delete_todos(obj, info, ids):
+    return _todo_manager(info).delete_todos(ids)
+
+
+def build_graphql_schema():
+    """Build the todo schema; resolvers find the todo manager in the execution context"""
+    TodoType = GraphQLObjectType(
+        name='Todo',
+        fields={
+            'id': GraphQLField(GraphQLString),
+            'title': GraphQLField(GraphQLString),
+            'description': GraphQLField(GraphQLString),
+            'priority': GraphQLField(GraphQLString),
+            'due_date': GraphQLField(GraphQLString),
+            'category': GraphQLField(GraphQLString),
+            'created_at': GraphQLField(GraphQLString),
+            'completed': GraphQLField(GraphQLString),
+            'reminder_datetime': GraphQLField(GraphQLString)
+        }
+    )
+
+    PageInfoType = GraphQLObjectType(
+        name='PageInfo',
+        fields={
+            'has_next_page': GraphQLField(GraphQLNonNull(GraphQLBoolean)),
+            'end_cursor': GraphQLField(GraphQLString)
+        }
+    )
+
+    TodoEdgeType = GraphQLObjectType(
+        name='TodoEdge',
+        fields={
+            'cursor': GraphQLField(GraphQLNonNull(GraphQLString)),
+            'node': GraphQLField(TodoType)
+        }
+    )
+
+    TodoConnectionType = GraphQLObjectType(
+        name='TodoConnection',
+        fields={
+            'edges': GraphQLField(GraphQLList(TodoEdgeType)),
+            'page_info': GraphQLField(GraphQLNonNull(PageInfoType))
+        }
+    )
+
+    TodoChangesType = GraphQLObjectType(
+        name='TodoChanges',
+        fields={
+            'version': GraphQLField(GraphQLNonNull(GraphQLInt)),
+            'epoch': GraphQLField(GraphQLNonNull(GraphQLString)),
+            # set when the changes can't be listed; reload everything instead
+            'full_resync': GraphQLField(GraphQLNonNull(GraphQLBoolean)),
+            'todos': GraphQLField(GraphQLList(TodoType)),
+            'deleted_ids': GraphQLField(GraphQLList(GraphQLString))
+        }
+    )
+
+    # bulk mutations report a result per item instead of failing the whole batch
+    TodoResultType = GraphQLObjectType(
+        name='TodoResult',
+        fields={
+            'todo': GraphQLField(TodoType),
+            'error': GraphQLField(GraphQLString)
+        }
+    )
+
+    DeleteTodoResultType = GraphQLObjectType(
+        name='DeleteTodoResult',
+        fields={
+            'id': GraphQLField(GraphQLString),
+            'deleted': GraphQLField(GraphQLNonNull(GraphQLBoolean)),
+            'error': GraphQLField(GraphQLString)
+        }
+    )
+
+    TodoInputType = GraphQLInputObjectType(
+        name='TodoInput',
+        fields={
+            'title': GraphQLInputField(GraphQLNonNull(GraphQLString)),
+            'description': GraphQLInputField(GraphQLString),
+            'priority': GraphQLInputField(GraphQLString),
+            'due_date': GraphQLInputField(GraphQLString),
+            'category': GraphQLInputField(GraphQLString),
+            'reminder_datetime': GraphQLInputField(GraphQLString)
+        }
+    )
+
+    TodoStatusInputType = GraphQLInputObjectType(
+        name='TodoStatusInput',
+        fields={
+            'id': GraphQLInputField(GraphQLNonNull(GraphQLString)),
+            'completed': GraphQLInputField(GraphQLNonNull(GraphQLBoolean))
+        }
+    )
+
+    QueryType = GraphQLObjectType(
+        name='Query',
+        fields={
+            # plain list of the first page, DEFAULT_PAGE_SIZE todos unless first is given
+            # every matching todo unless first is given, as before paging was
+            # added; clients that page should use todos for its page info
+            'getTodos': GraphQLField(
+                GraphQLList(TodoType),
+                args=_todo_filter_args(),
+                resolve=_resolve_get_todos
+            ),
+            # Relay-style connection, paged by first/after
+            'todos': GraphQLField(
+                TodoConnectionType,
+                args=_todo_filter_args(),
+                resolve=_resolve_todos_connection
+            ),
+            # full-text search over titles and descriptions, oldest first
+            'searchTodos': GraphQLField(
+                GraphQLList(TodoType),
+                args={
+                    'query': GraphQLArgument(GraphQLNonNull(GraphQLString)),
+                    'completed': GraphQLArgument(GraphQLBoolean),
+                    'first': GraphQLArgument(GraphQLInt)
+                },
+                resolve=_resolve_search_todos
+            ),
+            # todos created, updated or deleted after version, for incremental sync
+            'changesSince': GraphQLField(
+                GraphQLNonNull(TodoChangesType),
+                args={
+                    'version': GraphQLArgument(GraphQLNonNull(GraphQLInt)),
+                    # required with any version past 0, else a full resync is returned
+                    'epoch': GraphQLArgument(GraphQLString)
+                },
+                resolve=_resolve_changes_since
+            )
+        }
+    )
+
+    MutationType = GraphQLObjectType(
+        name='Mutation',
+        fields={
+            'addTodo': GraphQLField(
+                TodoType,
+                args={
+                    'title': GraphQLArgument(GraphQLString),
+                    'description': GraphQLArgument(GraphQLString),
+                    'priority': GraphQLArgument(GraphQLString),
+                    'due_date': GraphQLArgument(GraphQLString),
+                    'category': GraphQLArgument(GraphQLString),
+                    'reminder_datetime': GraphQLArgument(GraphQLString),
+                },
+                resolve=_add_todo
+            ),
+            'deleteTodo': GraphQLField(
+                GraphQLString,
+                args={'id': GraphQLArgument(GraphQLString)},
+                resolve=lambda obj, info, id: _todo_manager(info).delete_todo(id)
+            ),
+            'updateTodoStatus': GraphQLField(
+                TodoType,
+                args={
+                    'id': GraphQLArgument(GraphQLString),
+                    'completed': GraphQLArgument(GraphQLString)
+                },
+                resolve=lambda obj, info, id, completed:
+                    _todo_manager(info).update_todo_status(id, completed == 'true')
+            ),
+            # bulk variants, each applied in a single store transaction
+            'addTodos': GraphQLField(
+                GraphQLList(TodoResultType),
+                args={'todos': GraphQLArgument(GraphQLNonNull(GraphQLList(GraphQLNonNull(TodoInputType))))},
+                resolve=_add_todos
+            ),
+            'updateTodoStatuses': GraphQLField(
+                GraphQLList(TodoResultType),
+                args={'updates': GraphQLArgument(GraphQLNonNull(GraphQLList(GraphQLNonNull(TodoStatusInputType))))},
+                resolve=_update_todo_statuses
+            ),
+            'deleteTodos': GraphQLField(
+                GraphQLList(DeleteTodoResultType),
+                args={'ids': GraphQLArgument(GraphQLNonNull(GraphQLList(GraphQLNonNull(GraphQLString))))},
+                resolve=_delete_todos
+            )
+        }
+    )
+
+    return GraphQLSchema(query=QueryType, mutation=MutationType)
+
+
+@lru_cache(maxsize=None)
+def get_graphql_schema():
+    """The process-wide todo schema, with TODO_OPERATIONS validated against it"""
+    schema = build_graphql_schema()
+    errors = validate(schema, TODO_OPERATIONS)
+    if errors:
+        raise ValueError(f"Invalid todo operations: {errors}")
+    return schema
+
+
+def execute_operation(todo_manager, operation_name, **variables):
+    """Run one of TODO_OPERATIONS against todo_manager, skipping parse and validation"""
+    result = execute(
+        get_graphql_schema(),
+        TODO_OPERATIONS,
+        operation_name=operation_name,
+        variable_values=variables,
+        context_value={'todo_manager': todo_manager}
+    )
+    if result.errors:
+        raise result.errors[0]
+    return result.data
@@ -0,0 +1,237 @@
+"""Streaming CSV and JSONL import and export of todos.
+
+    python todo_io.py export --backend sqlite --path todos.db todos.csv
+    python todo_io.py import --backend sqlite --path todos.db todos.jsonl
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import uuid
+from datetime import datetime
+
+import pytz
+
+from todo_manager import IMPORT_BATCH_SIZE, create_todo_manager
+from todo_store import PRIORITIES, TODO_FIELDS
+
+FORMATS = ('csv', 'jsonl')
+
+# todos read from the store per page while exporting
+EXPORT_PAGE_SIZE = 1000
+
+# row errors kept in an import report; the rest are only counted
+MAX_REPORTED_ERRORS = 100
+
+TRUE_VALUES = {'true', '1', 'yes', 'y'}
+FALSE_VALUES = {'false', '0', 'no', 'n', ''}
+
+
+def detect_format(filename):
+    """'csv' or 'jsonl' from a file name's extension"""
+    extension = os.path.splitext(filename)[1].lower().lstrip('.')
+    if extension in ('jsonl', 'ndjson', 'json'):
+        return 'jsonl'
+    if extension == 'csv':
+        return 'csv'
+    raise ValueError(f"Unknown file format '{extension}', expected one of: {', '.join(FORMATS)}")
+
+
+def read_rows(lines, fmt):
+    """(line number, raw row dict) pairs read lazily from a text file or iterable of lines.
+
+    A JSONL line that doesn't parse to an object is yielded as its error message.
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(lines)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_number, f"invalid JSON: {e}"
+            continue
+        if not isinstance(row, dict):
+            yield line_number, "expected a JSON object"
+            continue
+        yield line_number, row
+
+
+def _string(row, field):
+    value = row.get(field)
+    if value is not None and not isinstance(value, str):
+        raise ValueError(f"{field} must be a string, not {type(value).__name__}")
+    return value
+
+
+def _text(row, field):
+    value = _string(row, field)
+    return value.strip() if value is not None else None
+
+
+def _identifier(row, field):
+    # JSONL ids may be numbers; cursors and lookups need the string form
+    value = row.get(field)
+    if isinstance(value, int) and not isinstance(value, bool):
+        return str(value)
+    return _text(row, field)
+
+
+def _parse_completed(value):
+    if isinstance(value, bool):
+        return value
+    if value is None:
+        return False
+    text = str(value).strip().lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise ValueError(f"completed must be true or false, not '{value}'")
+
+
+def _parse_datetime(value, field):
+    try:
+        datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{field} must be an ISO date or datetime, not '{value}'")
+    return value
+
+
+def todo_from_row(row, now=None):
+    """A complete todo from an imported row, filling in defaults; raises ValueError if it is invalid.
+
+    now, an ISO timestamp, defaults the missing due and creation dates.
+    """
+    title = _text(row, 'title')
+    if not title:
+        raise ValueError("title is required")
+    priority = _text(row, 'priority') or 'medium'
+    if priority not in PRIORITIES:
+        raise ValueError(f"priority must be one of: {', '.join(PRIORITIES)}")
+    now = now or datetime.now(pytz.UTC).isoformat()
+    due_date = _text(row, 'due_date')
+    created_at = _text(row, 'created_at')
+    reminder_datetime = _text(row, 'reminder_datetime')
+    return {
+        'id': _identifier(row, 'id') or str(uuid.uuid4()),
+        'unique_id': _identifier(row, 'unique_id') or str(uuid.uuid4()),
+        'title': title,
+        'description': _string(row, 'description') or '',
+        'priority': priority,
+        'due_date': _parse_datetime(due_date, 'due_date') if due_date else now,
+        'category': _text(row, 'category') or 'Other',
+        'created_at': _parse_datetime(created_at, 'created_at') if created_at else now,
+        'completed': _parse_completed(row.get('completed')),
+        'reminder_datetime': _parse_datetime(reminder_datetime, 'reminder_datetime') if reminder_datetime else None
+    }
+
+
+def import_todos(todo_manager, lines, fmt, batch_size=IMPORT_BATCH_SIZE):
+    """Import todos from a CSV or JSONL text file, streaming it batch_size rows at a time.
+
+    Invalid rows are skipped. Returns {'imported', 'skipped', 'errors'},
+    errors being up to MAX_REPORTED_ERRORS (line number, message) pairs.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown file format '{fmt}', expected one of: {', '.join(FORMATS)}")
+    errors = []
+    invalid = 0
+    now = datetime.now(pytz.UTC).isoformat()
+
+    def valid_todos():
+        nonlocal invalid
+        for line_number, row in read_rows(lines, fmt):
+            try:
+                if isinstance(row, str):
+                    raise ValueError(row)
+                yield todo_from_row(row, now)
+            except ValueError as e:
+                invalid += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append((line_number, str(e)))
+
+    imported, duplicates = todo_manager.import_todos(valid_todos(), batch_size=batch_size)
+    for todo_id in duplicates[:MAX_REPORTED_ERRORS - len(errors)]:
+        errors.append((None, f"todo {todo_id} already exists"))
+    return {'imported': imported, 'skipped': invalid + len(duplicates), 'errors': errors}
+
+
+def _csv_line(values):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(values)
+    return buffer.getvalue()
+
+
+def export_todos(todo_manager, fmt, page_size=EXPORT_PAGE_SIZE):
+    """Every todo in insertion order as lines of CSV (with a header) or JSONL.
+
+    A generator reading the store a page at a time, so only one page of
+    todos is held at once.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown file format '{fmt}', expected one of: {', '.join(FORMATS)}")
+    if fmt == 'csv':
+        yield _csv_line(TODO_FIELDS)
+    after = None
+    while True:
+        rows, has_next_page = todo_manager.get_todos_page(first=page_size, after=after)
+        for _, todo in rows:
+            if fmt == 'csv':
+                yield _csv_line(['' if todo.get(field) is None else todo.get(field) for field in TODO_FIELDS])
+            else:
+                yield json.dumps({field: todo.get(field) for field in TODO_FIELDS}) + '\n'
+        if not has_next_page:
+            return
+        after = rows[-1][0]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('command', choices=['import', 'export'])
+    parser.add_argument('file', help="file to read or write, '-' for stdin or stdout")
+    parser.add_argument('--backend', choices=['sqlite', 'journal'], required=True)
+    parser.add_argument('--path', required=True, help="SQLite database file or journal directory")
+    parser.add_argument('--format', choices=FORMATS, help="defaults to the file's extension")
+    parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE, help="todos per import transaction")
+    args = parser.parse_args(argv)
+
+    if args.format is None and args.file == '-':
+        parser.error("--format is required when reading or writing stdin or stdout")
+    try:
+        fmt = args.format or detect_format(args.file)
+    except ValueError as e:
+        parser.error(str(e))
+
+    todo_manager = create_todo_manager(args.backend, args.path)
+    try:
+        if args.command == 'export':
+            if args.file == '-':
+                sys.stdout.writelines(export_todos(todo_manager, fmt))
+            else:
+                with open(args.file, 'w', encoding='utf-8', newline='') as f:
+                    f.writelines(export_todos(todo_manager, fmt))
+            return 0
+
+        if args.file == '-':
+            report = import_todos(todo_manager, sys.stdin, fmt, args.batch_size)
+        else:
+            with open(args.file, encoding='utf-8-sig', newline='') as f:
+                report = import_todos(todo_manager, f, fmt, args.batch_size)
+    finally:
+        todo_manager.store.close()
+
+    for line_number, message in report['errors']:
+        print(f"line {line_number}: {message}" if line_number else message, file=sys.stderr)
+    print(f"Imported {report['imported']} todos, skipped {report['skipped']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,404 @@
+import contextlib
+import threading
+import uuid
+from collections import Counter, deque
+from datetime import datetime
+
+import pytz
+
+from todo_store import (CHANGE_LOG_SIZE, PRIORITIES, InMemoryTodoStore, JournaledTodoStore, SQLiteTodoStore,
+                        decode_cursor, encode_cursor)
+
+
+# todos inserted per store transaction by import_todos
+IMPORT_BATCH_SIZE = 1000
+
+
+class TodoManager:
+    def __init__(self, store=None, change_log_size=CHANGE_LOG_SIZE):
+        # storage backend, in-memory unless a persistent store is given
+        self.store = store if store is not None else InMemoryTodoStore()
+        self.categories = ['Personal', 'Education', 'Work', 'Shopping', 'Health', 'Other']
+        self._lock = threading.RLock()
+        # callbacks run as callback(event, todo) after each change
+        self._listeners = []
+        # a store other processes write to (SQLite) keeps the version, change
+        # log and epoch itself; otherwise this manager is the only writer and
+        # keeps them here. Versions are only comparable within one epoch,
+        # which for a private store changes whenever the manager is recreated
+        self._shared = getattr(self.store, 'shared', False)
+        self._version = 0
+        self.epoch = self.store.epoch if self._shared else uuid.uuid4().hex
+        # (version, event, todo id), oldest first
+        self._changes = deque(maxlen=change_log_size)
+        # running todo counts keyed by (completed, priority, category), as of
+        # _counters_version; None means they must be recounted
+        self.counters = Counter()
+        self._counters_version = None
+        self.rebuild_counters()
+
+    @property
+    def version(self):
+        """Bumped by every change, including other processes' changes to a shared store"""
+        return self.store.change_version() if self._shared else self._version
+
+    @contextlib.contextmanager
+    def _writing(self):
+        """Lock and store transaction for a change.
+
+        Counters are first recounted if another process changed the store
+        since they were last in step, and are recounted on next use if the
+        change fails.
+        """
+        with self._lock:
+            try:
+                with self.store.transaction():
+                    self._sync_counters()
+                    yield
+                    self._counters_version = self.version
+            except BaseException:
+                self._counters_version = None
+                raise
+
+    @staticmethod
+    def _new_todo(title, description, priority, due_date, category, reminder_datetime=None):
+        return {
+            'id': str(uuid.uuid4()),  # Use UUID for unique IDs
+            'unique_id': str(uuid.uuid4()), # Use UUID for unique IDs
+            'title': title,
+            'description': description,
+            'priority': priority,
+            'due_date': due_date,
+            'category': category,
+            'created_at': datetime.now(pytz.UTC).isoformat(),
+            'completed': False,
+            'reminder_datetime': reminder_datetime
+        }
+
+    def add_todo(self, title, description, priority, due_date, category, reminder_datetime=None):
+        """Add a new todo with more detailed information"""
+        todo = self._new_todo(title, description, priority, due_date, category, reminder_datetime)
+        with self._writing():
+            self.store.add(todo)
+            self.counters[self._counter_key(todo)] += 1
+            self._record_changes('added', [todo['id']])
+        self._emit('added', todo)
+        return todo
+
+    @property
+    def todos(self):
+        """All todos in insertion order"""
+        return self.store.all()
+
+    def get_todo(self, todo_id):
+        """Look up a todo by its ID"""
+        return self.store.get(todo_id)
+
+    def get_todos(self, filter_completed=None, sort_by=None, category=None):
+        """Retrieve todos with optional filtering and sorting"""
+        with self._lock:
+            return self.store.query(filter_completed=filter_completed, category=category, sort_by=sort_by)
+
+    def get_todos_page(self, first=None, after=None, sort_by=None, **filters):
+        """Retrieve up to first todos after a cursor, as ([(cursor, todo)], has_next_page)
+
+        filters are passed to the store: filter_completed, category, priority,
+        due_from and due_to.
+        """
+        after_key = decode_cursor(after, sort_by) if after else None
+        limit = first + 1 if first is not None else None
+        with self._lock:
+            rows = self.store.page(sort_by=sort_by, after=after_key, limit=limit, **filters)
+        has_next_page = first is not None and len(rows) > first
+        rows = rows[:first] if first is not None else rows
+        return [(encode_cursor(sort_by, key), todo) for key, todo in rows], has_next_page
+
+    def search_todos(self, query, filter_completed=None, limit=None):
+        """Todos matching every word of query, the last word as a prefix, oldest first"""
+        with self._lock:
+            return self.store.search(query, filter_completed=filter_completed, limit=limit)
+
+    def update_todo_status(self, todo_id, completed):
+        """Update the completion status of a todo"""
+        with self._writing():
+            todo = self.store.get(todo_id)
+            if todo is None:
+                return None
+            old_key = self._counter_key(todo)
+            todo = self.store.update(todo_id, completed=completed)
+            self._move_counter(old_key, self._counter_key(todo))
+            self._record_changes('updated', [todo_id])
+        self._emit('updated', todo)
+        return todo
+
+    def delete_todo(self, todo_id):
+        """Delete a todo by its ID"""
+        with self._writing():
+            todo = self.store.get(todo_id)
+            deleted = todo is not None and self.store.delete(todo_id)
+            if deleted:
+                self._move_counter(self._counter_key(todo), None)
+                self._record_changes('deleted', [todo_id])
+        if deleted:
+            self._emit('deleted', todo)
+        return "Deleted"
+
+    def add_todos(self, items):
+        """Add many todos in one store transaction.
+
+        items are dicts of add_todo arguments. Returns one
+        {'todo': ..., 'error': ...} result per item; invalid items are skipped.
+        """
+        results = []
+        added = []
+        for item in items:
+            if not item.get('title'):
+                results.append({'todo': None, 'error': "title is required"})
+                continue
+            if item.get('priority') and item['priority'] not in PRIORITIES:
+                results.append({'todo': None, 'error': f"priority must be one of: {', '.join(PRIORITIES)}"})
+                continue
+            todo = self._new_todo(
+                item['title'],
+                item.get('description') or '',
+                item.get('priority') or 'medium',
+                item.get('due_date') or datetime.now(pytz.UTC).isoformat(),
+                item.get('category') or 'Other',
+                item.get('reminder_datetime')
+            )
+            results.append({'todo': todo, 'error': None})
+            added.append(todo)
+
+        with self._writing():
+            for todo in added:
+                self.store.add(todo)
+            self._apply_counter_delta(Counter(self._counter_key(todo) for todo in added))
+            self._record_changes('added', [todo['id'] for todo in added])
+        for todo in added:
+            self._emit('added', todo)
+        return results
+
+    def update_todo_statuses(self, updates):
+        """Update many completion statuses in one store transaction.
+
+        updates are {'id': ..., 'completed': ...} dicts. Returns one
+        {'todo': ..., 'error': ...} result per update.
+        """
+        results = []
+        updated = []
+        delta = Counter()
+        with self._writing():
+            for update in updates:
+                todo = self.store.get(update['id'])
+                if todo is None:
+                    results.append({'todo': None, 'error': f"todo {update['id']} not found"})
+                    continue
+                old_key = self._counter_key(todo)
+                todo = self.store.update(update['id'], completed=bool(update['completed']))
+                delta[old_key] -= 1
+                delta[self._counter_key(todo)] += 1
+                results.append({'todo': todo, 'error': None})
+                updated.append(todo)
+            self._apply_counter_delta(delta)
+            self._record_changes('updated', [todo['id'] for todo in updated])
+        for todo in updated:
+            self._emit('updated', todo)
+        return results
+
+    def delete_todos(self, todo_ids):
+        """Delete many todos in one store transaction.
+
+        Returns one {'id': ..., 'deleted': ..., 'error': ...} result per id.
+        """
+        results = []
+        deleted = []
+        with self._writing():
+            for todo_id in todo_ids:
+                todo = self.store.get(todo_id)
+                if todo is None or not self.store.delete(todo_id):
+                    results.append({'id': todo_id, 'deleted': False, 'error': f"todo {todo_id} not found"})
+                    continue
+                results.append({'id': todo_id, 'deleted': True, 'error': None})
+                deleted.append(todo)
+            self._apply_counter_delta(Counter(self._counter_key(todo) for todo in deleted), sign=-1)
+            self._record_changes('deleted', [todo['id'] for todo in deleted])
+        for todo in deleted:
+            self._emit('deleted', todo)
+        return results
+
+    def import_todos(self, todos, batch_size=IMPORT_BATCH_SIZE):
+        """Insert complete todo dicts from an iterable, batch_size per store transaction.
+
+        The iterable is consumed lazily, so it can stream from a file. The
+        store's indexes and the counters are rebuilt once at the end; other
+        callers wait on the lock until then. Todos whose id already exists
+        are skipped. Returns (number imported, skipped ids).
+        """
+        imported = 0
+        skipped = []
+        with self._lock:
+            try:
+                with self.store.bulk_load():
+                    batch = []
+                    for todo in todos:
+                        batch.append(todo)
+                        if len(batch) >= batch_size:
+                            imported += self._import_batch(batch, skipped)
+                            batch = []
+                    if batch:
+                        imported += self._import_batch(batch, skipped)
+            finally:
+                self.rebuild_counters()
+        return imported, skipped
+
+    def _import_batch(self, batch, skipped):
+        added = []
+        batch_ids = set()
+        with self.store.transaction():
+            for todo in batch:
+                if todo['id'] in batch_ids or self.store.get(todo['id']) is not None:
+                    skipped.append(todo['id'])
+                    continue
+                batch_ids.add(todo['id'])
+                self.store.add(todo)
+                added.append(todo)
+            self._record_changes('added', [todo['id'] for todo in added])
+        for todo in added:
+            self._emit('added', todo)
+        return len(added)
+
+    def _apply_counter_delta(self, delta, sign=1):
+        for key, count in delta.items():
+            self.counters[key] += sign * count
+            if not self.counters[key]:
+                del self.counters[key]
+
+    def _record_changes(self, event, todo_ids):
+        # called with the lock held, inside the change's store transaction;
+        # a shared store's triggers have logged the change already
+        if self._shared:
+            return
+        for todo_id in todo_ids:
+            self._version += 1
+            self._changes.append((self._version, event, todo_id))
+
+    def changes_since(self, version, epoch=None):
+        """Todos changed after version, for clients syncing incrementally.
+
+        Returns {'version', 'epoch', 'full_resync', 'todos', 'deleted_ids'}.
+        full_resync is set, with no changes, when the change log no longer
+        reaches back to version, or version comes from another epoch or
+        from an unknown one (a version past 0 without its epoch); the client
+        must then reload everything and continue from the returned version
+        and epoch.
+        """
+        with self._lock:
+            if self._shared:
+                current, log_start, changes = self.store.changes_since(version)
+            else:
+                # the log covers every change after log_start
+                current, changes = self._version, self._changes
+                log_start = changes[0][0] - 1 if changes else current
+            result = {'version': current, 'epoch': self.epoch, 'full_resync': False,
+                      'todos': [], 'deleted_ids': []}
+            other_epoch = epoch != self.epoch if epoch is not None else version > 0
+            if other_epoch or not log_start <= version <= current:
+                result['full_resync'] = True
+                return result
+
+            # latest event per todo, in the order of that event
+            latest = {}
+            for change_version, event, todo_id in reversed(changes):
+                if change_version <= version:
+                    break
+                latest.setdefault(todo_id, change_version)
+            for todo_id in sorted(latest, key=latest.get):
+                todo = self.store.get(todo_id)
+                if todo is None:
+                    result['deleted_ids'].append(todo_id)
+                else:
+                    result['todos'].append(todo)
+            return result
+
+    def add_listener(self, callback):
+        """Register callback(event, todo) for 'added', 'updated' and 'deleted' events"""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _emit(self, event, todo):
+        for callback in list(self._listeners):
+            callback(event, todo)
+
+    @staticmethod
+    def _counter_key(todo):
+        return (bool(todo['completed']), todo.get('priority'), todo.get('category'))
+
+    def _move_counter(self, old_key, new_key):
+        if old_key == new_key:
+            return
+        self.counters[old_key] -= 1
+        if not self.counters[old_key]:
+            del self.counters[old_key]
+        if new_key is not None:
+            self.counters[new_key] += 1
+
+    def rebuild_counters(self):
+        """Recompute the running counters from the store"""
+        with self._lock:
+            # version first: a change landing in between only causes another recount
+            version = self.version
+            self.counters = self.store.group_counts()
+            self._counters_version = version
+
+    def _sync_counters(self):
+        # called with the lock held
+        if self._counters_version is None or self._counters_version != self.version:
+            self.rebuild_counters()
+
+    def check_counters(self):
+        """Return True if the running counters match a fresh count of the store"""
+        with self._lock:
+            # catch up with other processes' changes, which are not drift
+            if self._counters_version != self.version:
+                self.rebuild_counters()
+            # drop zero counts, but keep negative ones: they are drift too
+            counters = {key: count for key, count in self.counters.items() if count}
+            return counters == dict(self.store.group_counts())
+
+    def get_todos_data_for_visualization(self):
+        """Prepare todos data for visualization from the running counters"""
+        completed = 0
+        pending = 0
+        priority_data = {priority: {'completed': 0, 'pending': 0} for priority in ['low', 'medium', 'high']}
+
+        with self._lock:
+            self._sync_counters()
+            counts = list(self.counters.items())
+        for (is_completed, priority, category), count in counts:
+            status = 'completed' if is_completed else 'pending'
+            if is_completed:
+                completed += count
+            else:
+                pending += count
+            if priority in priority_data:
+                priority_data[priority][status] += count
+
+        return {
+            'status': [
+                {'Status': 'Completed', 'Count': completed},
+                {'Status': 'Pending', 'Count': pending}
+            ],
+            'priority': priority_data
+        }
+
+
+def create_todo_manager(backend=None, path=None):
+    """Todo manager over a SQLite ('sqlite') or journaled ('journal') store at path, else in memory"""
+    if backend == 'journal':
+        return TodoManager(JournaledTodoStore(path))
+    if backend == 'sqlite':
+        return TodoManager(SQLiteTodoStore(path))
+    return TodoManager()
@@ -0,0 +1,1088 @@
+import base64
+import bisect
+import contextlib
+import heapq
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from collections import Counter
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: journal directories are not locked
+    fcntl = None
+
+PRIORITIES = ['low', 'medium', 'high']
+
+# changes kept for changes_since; older clients have to resync in full
+CHANGE_LOG_SIZE = 10000
+
+TODO_FIELDS = [
+    'id', 'unique_id', 'title', 'description', 'priority', 'due_date',
+    'category', 'created_at', 'completed', 'reminder_datetime'
+]
+
+
+def priority_rank(priority):
+    """Sort position of a priority, unknown priorities last"""
+    return PRIORITIES.index(priority) if priority in PRIORITIES else len(PRIORITIES)
+
+
+def encode_cursor(sort_by, key):
+    """Opaque pagination cursor for a sort order key"""
+    return base64.urlsafe_b64encode(json.dumps([sort_by, *key]).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor, sort_by):
+    """Sort order key from a cursor, checking it belongs to the same sort order"""
+    try:
+        cursor_sort_by, *key = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if cursor_sort_by != sort_by or len(key) != len(SORT_KEY_TYPES[sort_by]) or not all(
+        isinstance(value, value_type) for value, value_type in zip(key, SORT_KEY_TYPES[sort_by])
+    ):
+        raise ValueError("Cursor does not match the sort order")
+    return tuple(key)
+
+
+# letters and digits, split like SQLite's unicode61 FTS tokenizer
+TOKEN_PATTERN = re.compile(r'[^\W_]+')
+
+
+def tokenize(text):
+    """Lowercased words of a piece of text"""
+    return TOKEN_PATTERN.findall((text or '').lower())
+
+
+def search_terms(query):
+    """(whole words, prefix or None) of a search query.
+
+    The last word is matched as a prefix, as it may still be being typed,
+    unless the query ends with a space.
+    """
+    words = tokenize(query)
+    if words and not query[-1:].isspace():
+        return words[:-1], words[-1]
+    return words, None
+
+
+# element types of each sort order's keys, which end in (seq, id)
+SORT_KEY_TYPES = {
+    None: (int, str),
+    'due_date': (str, int, str),
+    'priority': (int, int, str),
+}
+
+
+class _SortedIndex:
+    """Sorted (key..., id) entries with bisect seeks.
+
+    Removals are lazy: _current holds each todo's live entry, so an entry in
+    the list is live only if it is that exact object, and the list is
+    compacted once stale entries outnumber live ones.
+    """
+
+    def __init__(self):
+        self._entries = []
+        self._current = {}
+        self._stale = 0
+
+    def __len__(self):
+        return len(self._current)
+
+    def entry(self, todo_id):
+        return self._current.get(todo_id)
+
+    def add(self, todo_id, key):
+        entry = key + (todo_id,)
+        self._current[todo_id] = entry
+        if not self._entries or entry > self._entries[-1]:
+            self._entries.append(entry)
+        else:
+            bisect.insort(self._entries, entry)
+
+    def discard(self, todo_id):
+        if self._current.pop(todo_id, None) is not None:
+            self._stale += 1
+            if self._stale > len(self._current):
+                self._entries = [entry for entry in self._entries if self._current.get(entry[-1]) is entry]
+                self._stale = 0
+
+    def rebuild(self, entries):
+        """Replace every entry at once, sorting them in one go rather than inserting one by one"""
+        self._entries = sorted(entries)
+        self._current = {entry[-1]: entry for entry in self._entries}
+        self._stale = 0
+
+    def iter_from(self, lower=None, after=None):
+        """Live entries from lower (inclusive) and after (exclusive) onwards"""
+        entries = self._entries
+        position = bisect.bisect_left(entries, lower) if lower is not None else 0
+        if after is not None:
+            position = max(position, bisect.bisect_right(entries, after))
+        for index in range(position, len(entries)):
+            entry = entries[index]
+            if self._current.get(entry[-1]) is entry:
+                yield entry
+
+
+class _TextIndex:
+    """Inverted index from words of todo titles and descriptions to todo ids.
+
+    The vocabulary is kept sorted, so prefix lookups bisect to the first
+    matching word and stop at the first one that doesn't match.
+    """
+
+    def __init__(self):
+        self._postings = {}
+        self._words = []
+
+    @staticmethod
+    def words_of(todo):
+        return set(tokenize(todo.get('title'))) | set(tokenize(todo.get('description')))
+
+    def add(self, todo_id, words):
+        for word in words:
+            postings = self._postings.get(word)
+            if postings is None:
+                postings = self._postings[word] = set()
+                bisect.insort(self._words, word)
+            postings.add(todo_id)
+
+    def discard(self, todo_id, words):
+        for word in words:
+            postings = self._postings.get(word)
+            if postings is None:
+                continue
+            postings.discard(todo_id)
+            if not postings:
+                del self._postings[word]
+                del self._words[bisect.bisect_left(self._words, word)]
+
+    def rebuild(self, words_by_id):
+        """Replace the index from (todo id, words) pairs, sorting the vocabulary once"""
+        self._postings = {}
+        for todo_id, words in words_by_id:
+            for word in words:
+                self._postings.setdefault(word, set()).add(todo_id)
+        self._words = sorted(self._postings)
+
+    def postings(self, word):
+        return self._postings.get(word, ())
+
+    def prefix_postings(self, prefix):
+        """Ids of todos with a word starting with prefix"""
+        matches = []
+        for index in range(bisect.bisect_left(self._words, prefix), len(self._words)):
+            word = self._words[index]
+            if not word.startswith(prefix):
+                break
+            matches.append(self._postings[word])
+        if len(matches) == 1:
+            return matches[0]
+        return set().union(*matches)
+
+
+class InMemoryTodoStore:
+    """Todos kept in a dict, for tests and single-session use.
+
+    Secondary indexes (status, category and priority buckets, sorted
+    insertion, due-date and priority orders, and a word index for search)
+    are updated on every mutation, so filtered, sorted, paginated and
+    searched views are read straight off them.
+    """
+
+    INDEXED_FIELDS = ('completed', 'category', 'priority', 'due_date', 'title', 'description')
+
+    def __init__(self):
+        # id -> todo, kept in insertion order
+        self._todos = {}
+        # id -> insertion sequence number, breaks ties in every sort order
+        self._seqs = {}
+        self._next_seq = 0
+        # dicts are used as insertion-ordered sets of ids
+        self._by_status = {False: {}, True: {}}
+        self._by_category = {}
+        self._by_priority = {}
+        # sort order -> index of sort keys
+        self._orders = {None: _SortedIndex(), 'due_date': _SortedIndex(), 'priority': _SortedIndex()}
+        self._text = _TextIndex()
+        # undo actions of the open transaction, None outside one
+        self._undo = None
+        # set inside bulk_load, while the secondary indexes are left stale
+        self._bulk_loading = False
+
+    def __len__(self):
+        return len(self._todos)
+
+    @staticmethod
+    def _due_key(todo):
+        return todo.get('due_date') or ''
+
+    def _index(self, todo, fields=INDEXED_FIELDS):
+        todo_id = todo['id']
+        seq = self._seqs[todo_id]
+        if 'completed' in fields:
+            self._by_status[bool(todo['completed'])][todo_id] = None
+        if 'category' in fields:
+            self._by_category.setdefault((todo.get('category') or '').lower(), {})[todo_id] = None
+        if 'priority' in fields:
+            self._by_priority.setdefault(todo.get('priority'), {})[todo_id] = None
+            self._orders['priority'].add(todo_id, (priority_rank(todo.get('priority')), seq))
+        if 'due_date' in fields:
+            self._orders['due_date'].add(todo_id, (self._due_key(todo), seq))
+        if 'title' in fields or 'description' in fields:
+            self._text.add(todo_id, self._text.words_of(todo))
+
+    def _unindex(self, todo, fields=INDEXED_FIELDS):
+        todo_id = todo['id']
+        if 'completed' in fields:
+            self._by_status[bool(todo['completed'])].pop(todo_id, None)
+        if 'category' in fields:
+            self._discard_from_bucket(self._by_category, (todo.get('category') or '').lower(), todo_id)
+        if 'priority' in fields:
+            self._discard_from_bucket(self._by_priority, todo.get('priority'), todo_id)
+            self._orders['priority'].discard(todo_id)
+        if 'due_date' in fields:
+            self._orders['due_date'].discard(todo_id)
+        if 'title' in fields or 'description' in fields:
+            self._text.discard(todo_id, self._text.words_of(todo))
+
+    @staticmethod
+    def _discard_from_bucket(buckets, key, todo_id):
+        bucket = buckets.get(key)
+        if bucket is not None:
+            bucket.pop(todo_id, None)
+            if not bucket:
+                del buckets[key]
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """Apply a group of mutations atomically, undoing them all on error"""
+        if self._undo is not None:
+            # nested transactions join the outer one
+            yield
+            return
+        self._undo = []
+        try:
+            yield
+        except BaseException:
+            undo, self._undo = self._undo, None
+            for action in reversed(undo):
+                action()
+            raise
+        self._undo = None
+
+    @contextlib.contextmanager
+    def bulk_load(self):
+        """Add many todos without maintaining the secondary indexes, rebuilding them once at the end.
+
+        Indexed reads inside the block may miss todos, so callers keep other
+        readers out until it exits.
+        """
+        if self._bulk_loading:
+            yield
+            return
+        self._bulk_loading = True
+        try:
+            yield
+        finally:
+            self._bulk_loading = False
+            self._rebuild_indexes()
+
+    def _rebuild_indexes(self):
+        ids = sorted(self._todos, key=self._seqs.__getitem__)
+        self._by_status = {False: {}, True: {}}
+        self._by_category = {}
+        self._by_priority = {}
+        for todo_id in ids:
+            todo = self._todos[todo_id]
+            self._by_status[bool(todo['completed'])][todo_id] = None
+            self._by_category.setdefault((todo.get('category') or '').lower(), {})[todo_id] = None
+            self._by_priority.setdefault(todo.get('priority'), {})[todo_id] = None
+        self._orders[None].rebuild((self._seqs[todo_id], todo_id) for todo_id in ids)
+        self._orders['due_date'].rebuild(
+            (self._due_key(self._todos[todo_id]), self._seqs[todo_id], todo_id) for todo_id in ids
+        )
+        self._orders['priority'].rebuild(
+            (priority_rank(self._todos[todo_id].get('priority')), self._seqs[todo_id], todo_id) for todo_id in ids
+        )
+        self._text.rebuild((todo_id, self._text.words_of(self._todos[todo_id])) for todo_id in ids)
+
+    def add(self, todo, seq=None):
+        if todo['id'] in self._todos:
+            self.delete(todo['id'])
+        if seq is None:
+            seq = self._next_seq
+            self._next_seq += 1
+        self._todos[todo['id']] = todo
+        self._seqs[todo['id']] = seq
+        if not self._bulk_loading:
+            self._orders[None].add(todo['id'], (seq,))
+            self._index(todo)
+        if self._undo is not None:
+            self._undo.append(lambda: self.delete(todo['id']))
+        return todo
+
+    def get(self, todo_id):
+        return self._todos.get(todo_id)
+
+    def update(self, todo_id, **fields):
+        todo = self._todos.get(todo_id)
+        if todo is None:
+            return None
+        if self._undo is not None:
+            previous = {field: todo.get(field) for field in fields}
+            self._undo.append(lambda: self.update(todo_id, **previous))
+        changed = {field for field in self.INDEXED_FIELDS if field in fields and fields[field] != todo.get(field)}
+        self._unindex(todo, changed)
+        todo.update(fields)
+        self._index(todo, changed)
+        return todo
+
+    def delete(self, todo_id):
+        todo = self._todos.pop(todo_id, None)
+        if todo is None:
+            return False
+        self._unindex(todo)
+        self._orders[None].discard(todo_id)
+        seq = self._seqs.pop(todo_id)
+        if self._undo is not None:
+            # restore with the original seq so it keeps its place in every order
+            self._undo.append(lambda: self.add(todo, seq=seq))
+        return True
+
+    def all(self):
+        return [self._todos[entry[-1]] for entry in self._orders[None].iter_from()]
+
+    def _iter_entries(self, filters, gaps, sort_by, lower, after, limit):
+        index = self._orders[sort_by]
+        # sort the smallest bucket when that is cheaper than walking the index
+        # until limit matches turn up, which takes about limit / selectivity
+        # entries if the gap-leaving filters are independent
+        if filters:
+            smallest = min(filters, key=len)
+            total = len(self._todos)
+            walk = total
+            if limit is not None and total:
+                selectivity = 1.0
+                for bucket in gaps:
+                    selectivity *= len(bucket) / total
+                walk = min(total, limit / selectivity) if selectivity else 0
+            if len(smallest) * 2 < walk or not smallest:
+                entries = sorted(index.entry(todo_id) for todo_id in smallest)
+                position = bisect.bisect_left(entries, lower) if lower is not None else 0
+                if after is not None:
+                    position = max(position, bisect.bisect_right(entries, after))
+                return iter(entries[position:])
+        return index.iter_from(lower, after)
+
+    def page(self, filter_completed=None, category=None, sort_by=None, priority=None,
+             due_from=None, due_to=None, after=None, limit=None):
+        """(sort key, todo) pairs in sort order, starting after the given key"""
+        filters = []
+        if filter_completed is not None:
+            filters.append(self._by_status[bool(filter_completed)])
+        if category:
+            filters.append(self._by_category.get(category.lower(), {}))
+        # filters that leave gaps in the walk over the sort order; the sort
+        # order's own filter is a seek to one contiguous range instead
+        gaps = list(filters)
+        if priority:
+            filters.append(self._by_priority.get(priority, {}))
+            if sort_by != 'priority':
+                gaps.append(filters[-1])
+
+        lower = None
+        if sort_by == 'due_date' and due_from:
+            lower = (due_from,)
+        elif sort_by == 'priority' and priority:
+            lower = (priority_rank(priority),)
+        results = []
+        for entry in self._iter_entries(filters, gaps, sort_by, lower, after, limit):
+            if sort_by == 'priority' and priority and entry[0] != lower[0]:
+                break
+            todo_id = entry[-1]
+            if not all(todo_id in bucket for bucket in filters):
+                continue
+            todo = self._todos[todo_id]
+            due_key = self._due_key(todo)
+            if due_from and due_key < due_from:
+                continue
+            if due_to and due_key > due_to:
+                # nothing later in due-date order can match either
+                if sort_by == 'due_date':
+                    break
+                continue
+            results.append((entry, todo))
+            if limit is not None and len(results) >= limit:
+                break
+        return results
+
+    def query(self, filter_completed=None, category=None, sort_by=None, **filters):
+        return [todo for _, todo in self.page(filter_completed, category, sort_by, **filters)]
+
+    def search(self, query, filter_completed=None, limit=None):
+        """Todos whose title or description has every word of query, in insertion order"""
+        words, prefix = search_terms(query)
+        if not words and prefix is None:
+            return []
+        candidates = [self._text.postings(word) for word in words]
+        if prefix is not None:
+            candidates.append(self._text.prefix_postings(prefix))
+        if filter_completed is not None:
+            candidates.append(self._by_status[bool(filter_completed)])
+        candidates.sort(key=len)
+        matches = set(candidates[0]).intersection(*candidates[1:])
+
+        if limit is not None and len(matches) > 16 * limit:
+            # dense matches: walking insertion order finds the first ones sooner than sorting them all
+            ids = []
+            for entry in self._orders[None].iter_from():
+                if entry[-1] in matches:
+                    ids.append(entry[-1])
+                    if len(ids) >= limit:
+                        break
+        elif limit is not None:
+            ids = heapq.nsmallest(limit, matches, key=self._seqs.__getitem__)
+        else:
+            ids = sorted(matches, key=self._seqs.__getitem__)
+        return [self._todos[todo_id] for todo_id in ids]
+
+    def group_counts(self):
+        """Todo counts keyed by (completed, priority, category)"""
+        return Counter(
+            (bool(todo['completed']), todo.get('priority'), todo.get('category'))
+            for todo in self._todos.values()
+        )
+
+    def close(self):
+        pass
+
+
+class SQLiteTodoStore:
+    """Todos persisted in SQLite (WAL mode), shared by every session.
+
+    Other processes may write to the same file, so changes are versioned in
+    the database itself: triggers log every insert, update and delete to
+    todo_changes, whose last version numbers the store's state for every
+    process, and the epoch is stored alongside.
+    """
+
+    # other processes can change the todos, so versions come from the store
+    shared = True
+
+    SCHEMA = [
+        """
+        CREATE TABLE IF NOT EXISTS todos (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            id TEXT NOT NULL UNIQUE,
+            unique_id TEXT,
+            title TEXT,
+            description TEXT,
+            priority TEXT,
+            due_date TEXT,
+            category TEXT,
+            created_at TEXT,
+            completed INTEGER NOT NULL DEFAULT 0,
+            reminder_datetime TEXT
+        )
+        """,
+    ]
+
+    # change log, filled by triggers so writes from every process are versioned
+    CHANGES_SCHEMA = [
+        """
+        CREATE TABLE IF NOT EXISTS todo_changes (
+            version INTEGER PRIMARY KEY AUTOINCREMENT,
+            event TEXT NOT NULL,
+            todo_id TEXT NOT NULL
+        )
+        """,
+        "CREATE TABLE IF NOT EXISTS todo_meta (key TEXT PRIMARY KEY, value TEXT)",
+        """
+        CREATE TRIGGER IF NOT EXISTS todo_changes_insert AFTER INSERT ON todos BEGIN
+            INSERT INTO todo_changes(event, todo_id) VALUES ('added', new.id);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS todo_changes_update AFTER UPDATE ON todos BEGIN
+            INSERT INTO todo_changes(event, todo_id) VALUES ('updated', new.id);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS todo_changes_delete AFTER DELETE ON todos BEGIN
+            INSERT INTO todo_changes(event, todo_id) VALUES ('deleted', old.id);
+        END
+        """,
+    ]
+
+    # writes between trims of the change log
+    TRIM_CHANGES_EVERY = 1000
+
+    # due date sort key; a missing due date sorts first, as in the in-memory store
+    DUE_KEY = "COALESCE(due_date, '')"
+
+    # secondary index name -> indexed columns; dropped during bulk_load
+    INDEXES = {
+        'idx_todos_completed_due': f'completed, {DUE_KEY}',
+        'idx_todos_due': DUE_KEY,
+        'idx_todos_category': 'category COLLATE NOCASE',
+        'idx_todos_priority': 'priority',
+    }
+    # indexes on the raw due_date the above replace, dropped from older databases
+    RETIRED_INDEXES = ('idx_todos_completed', 'idx_todos_due_date')
+
+    # full-text index over title and description, kept in sync by triggers
+    FTS_SCHEMA = [
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS todos_fts USING fts5(
+            title, description, content='todos', content_rowid='seq'
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS todos_fts_insert AFTER INSERT ON todos BEGIN
+            INSERT INTO todos_fts(rowid, title, description) VALUES (new.seq, new.title, new.description);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS todos_fts_delete AFTER DELETE ON todos BEGIN
+            INSERT INTO todos_fts(todos_fts, rowid, title, description)
+            VALUES ('delete', old.seq, old.title, old.description);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS todos_fts_update AFTER UPDATE OF title, description ON todos BEGIN
+            INSERT INTO todos_fts(todos_fts, rowid, title, description)
+            VALUES ('delete', old.seq, old.title, old.description);
+            INSERT INTO todos_fts(rowid, title, description) VALUES (new.seq, new.title, new.description);
+        END
+        """,
+    ]
+
+    # same order as priority_rank
+    PRIORITY_ORDER = "CASE priority WHEN 'low' THEN 0 WHEN 'medium' THEN 1 WHEN 'high' THEN 2 ELSE 3 END"
+
+    # sort order -> ORDER BY columns, matching the in-memory sort keys
+    SORT_ORDERS = {
+        None: ('seq',),
+        'due_date': (DUE_KEY, 'seq'),
+        'priority': (PRIORITY_ORDER, 'seq'),
+    }
+
+    def __init__(self, path, change_log_size=CHANGE_LOG_SIZE):
+        self.path = path
+        self.change_log_size = change_log_size
+        self._untrimmed = 0
+        self._lock = threading.RLock()
+        # Streamlit runs each session on its own thread, so the connection
+        # is shared and every access goes through the lock
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            for statement in self.SCHEMA + self.CHANGES_SCHEMA:
+                self._conn.execute(statement)
+            self._conn.execute("INSERT OR IGNORE INTO todo_meta VALUES ('epoch', ?)", (uuid.uuid4().hex,))
+            self.epoch = self._conn.execute("SELECT value FROM todo_meta WHERE key = 'epoch'").fetchone()[0]
+            self._create_indexes()
+            self.full_text_search = self._create_fts()
+
+    def _create_indexes(self):
+        for name in self.RETIRED_INDEXES:
+            self._conn.execute(f"DROP INDEX IF EXISTS {name}")
+        for name, columns in self.INDEXES.items():
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON todos({columns})")
+
+    def _create_fts(self):
+        """Set up the FTS5 index, or return False when SQLite was built without FTS5"""
+        existed = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'todos_fts'"
+        ).fetchone() is not None
+        try:
+            for statement in self.FTS_SCHEMA:
+                self._conn.execute(statement)
+        except sqlite3.OperationalError:
+            return False
+        if not existed:
+            # index todos stored before search existed
+            self._conn.execute("INSERT INTO todos_fts(todos_fts) VALUES ('rebuild')")
+        return True
+
+    def _row_to_todo(self, row):
+        todo = {field: row[field] for field in TODO_FIELDS}
+        todo['completed'] = bool(todo['completed'])
+        return todo
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM todos").fetchone()[0]
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """Apply a group of mutations in one SQLite transaction"""
+        with self._lock:
+            if self._conn.in_transaction:
+                # nested transactions join the outer one
+                yield
+                return
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            self._trim_changes()
+
+    def _wrote(self, count=1):
+        self._untrimmed += count
+        if not self._conn.in_transaction:
+            self._trim_changes()
+
+    def _trim_changes(self):
+        # called with the lock held, outside a transaction
+        if self._untrimmed < self.TRIM_CHANGES_EVERY:
+            return
+        self._conn.execute("DELETE FROM todo_changes WHERE version <= ?",
+                           (self.change_version() - self.change_log_size,))
+        self._untrimmed = 0
+
+    def change_version(self):
+        """Version of the last change made by any process, 0 before the first"""
+        with self._lock:
+            row = self._conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'todo_changes'").fetchone()
+        return row[0] if row else 0
+
+    def changes_since(self, version):
+        """(current version, version the log starts after, [(version, event, todo id)] after version)"""
+        with self._lock:
+            # one read transaction, so the log and the version agree
+            in_transaction = self._conn.in_transaction
+            if not in_transaction:
+                self._conn.execute("BEGIN")
+            try:
+                current = self.change_version()
+                first = self._conn.execute("SELECT MIN(version) FROM todo_changes").fetchone()[0]
+                changes = [tuple(row) for row in self._conn.execute(
+                    "SELECT version, event, todo_id FROM todo_changes WHERE version > ? ORDER BY version",
+                    (version,)
+                )]
+            finally:
+                if not in_transaction:
+                    self._conn.execute("COMMIT")
+        return current, first - 1 if first is not None else current, changes
+
+    @contextlib.contextmanager
+    def bulk_load(self):
+        """Add many todos with the secondary and full-text indexes dropped, rebuilding them once at the end.
+
+        Holds the store lock throughout, so other threads wait rather than
+        query without indexes.
+        """
+        with self._lock:
+            if self._conn.in_transaction:
+                raise RuntimeError("bulk_load can't start inside a transaction")
+            for name in self.INDEXES:
+                self._conn.execute(f"DROP INDEX IF EXISTS {name}")
+            if self.full_text_search:
+                for trigger in ('todos_fts_insert', 'todos_fts_delete', 'todos_fts_update'):
+                    self._conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+            try:
+                yield
+            finally:
+                self._create_indexes()
+                if self.full_text_search:
+                    for statement in self.FTS_SCHEMA:
+                        self._conn.execute(statement)
+                    self._conn.execute("INSERT INTO todos_fts(todos_fts) VALUES ('rebuild')")
+
+    def add(self, todo):
+        values = [todo.get(field) for field in TODO_FIELDS]
+        values[TODO_FIELDS.index('completed')] = int(bool(todo.get('completed')))
+        with self._lock:
+            self._conn.execute(
+                f"INSERT INTO todos ({', '.join(TODO_FIELDS)}) VALUES ({', '.join('?' * len(TODO_FIELDS))})",
+                values
+            )
+            self._wrote()
+        return todo
+
+    def get(self, todo_id):
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(TODO_FIELDS)} FROM todos WHERE id = ?", (todo_id,)
+            ).fetchone()
+        return self._row_to_todo(row) if row else None
+
+    def update(self, todo_id, **fields):
+        fields = {field: value for field, value in fields.items() if field in TODO_FIELDS and field != 'id'}
+        if 'completed' in fields:
+            fields['completed'] = int(bool(fields['completed']))
+        with self._lock:
+            if fields:
+                self._conn.execute(
+                    f"UPDATE todos SET {', '.join(f'{field} = ?' for field in fields)} WHERE id = ?",
+                    [*fields.values(), todo_id]
+                )
+                self._wrote()
+            return self.get(todo_id)
+
+    def delete(self, todo_id):
+        with self._lock:
+            deleted = self._conn.execute("DELETE FROM todos WHERE id = ?", (todo_id,)).rowcount > 0
+            self._wrote()
+        return deleted
+
+    def all(self):
+        return self.query()
+
+    def page(self, filter_completed=None, category=None, sort_by=None, priority=None,
+             due_from=None, due_to=None, after=None, limit=None):
+        """(sort key, todo) pairs in sort order, starting after the given key"""
+        clauses = []
+        params = []
+
+        if filter_completed is not None:
+            clauses.append("completed = ?")
+            params.append(int(bool(filter_completed)))
+
+        if category:
+            clauses.append("category = ? COLLATE NOCASE")
+            params.append(category)
+
+        if priority:
+            clauses.append("priority = ?")
+            params.append(priority)
+
+        if due_from:
+            clauses.append(f"{self.DUE_KEY} >= ?")
+            params.append(due_from)
+
+        if due_to:
+            clauses.append(f"{self.DUE_KEY} <= ?")
+            params.append(due_to)
+
+        # seq breaks ties so the order matches the in-memory store
+        order = self.SORT_ORDERS[sort_by]
+        if after is not None:
+            # keyset pagination on the sort columns, without the trailing id;
+            # the bound on the first column alone lets SQLite seek an
+            # expression index, which it can't with the row value
+            if len(order) > 1:
+                clauses.append(f"{order[0]} >= ?")
+                params.append(after[0])
+            clauses.append(f"({', '.join(order)}) > ({', '.join('?' * len(order))})")
+            params.extend(after[:-1])
+
+        sql = f"SELECT {', '.join(order)}, {', '.join(TODO_FIELDS)} FROM todos"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += f" ORDER BY {', '.join(order)}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [(tuple(row[:len(order)]) + (row['id'],), self._row_to_todo(row)) for row in rows]
+
+    def query(self, filter_completed=None, category=None, sort_by=None, **filters):
+        return [todo for _, todo in self.page(filter_completed, category, sort_by, **filters)]
+
+    def search(self, query, filter_completed=None, limit=None):
+        """Todos whose title or description has every word of query, in insertion order"""
+        words, prefix = search_terms(query)
+        if not words and prefix is None:
+            return []
+
+        clauses = []
+        params = []
+        if self.full_text_search:
+            match = [f'"{word}"' for word in words]
+            if prefix is not None:
+                match.append(f'"{prefix}"*')
+            clauses.append("seq IN (SELECT rowid FROM todos_fts WHERE todos_fts MATCH ?)")
+            params.append(' '.join(match))
+        else:
+            # substring matching, close enough without FTS5
+            for term in words + ([prefix] if prefix is not None else []):
+                clauses.append("(title LIKE ? OR description LIKE ?)")
+                params.extend([f'%{term}%'] * 2)
+        if filter_completed is not None:
+            clauses.append("completed = ?")
+            params.append(int(bool(filter_completed)))
+
+        sql = f"SELECT {', '.join(TODO_FIELDS)} FROM todos WHERE {' AND '.join(clauses)} ORDER BY seq"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [self._row_to_todo(row) for row in rows]
+
+    def group_counts(self):
+        """Todo counts keyed by (completed, priority, category)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT completed, priority, category, COUNT(*) FROM todos GROUP BY completed, priority, category"
+            ).fetchall()
+        return Counter({(bool(completed), priority, category): count for completed, priority, category, count in rows})
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class JournaledTodoStore:
+    """In-memory todos made durable by an append-only JSONL journal.
+
+    Every mutation is written through to journal.jsonl as it happens, so it
+    survives the process dying; fsyncs, which it needs to survive the machine
+    going down, are batched every fsync_batch entries and otherwise done by a
+    background thread every fsync_interval seconds. Every snapshot_every
+    entries the whole store is written to snapshot.jsonl and the journal is
+    started again, so a restart loads the snapshot and only replays the
+    journal tail.
+    """
+
+    def __init__(self, directory, fsync_batch=64, fsync_interval=1.0, snapshot_every=100000):
+        self.directory = directory
+        self.fsync_batch = fsync_batch
+        self.fsync_interval = fsync_interval
+        self.snapshot_every = snapshot_every
+        self.snapshot_path = os.path.join(directory, 'snapshot.jsonl')
+        self.journal_path = os.path.join(directory, 'journal.jsonl')
+        self._memory = InMemoryTodoStore()
+        self._lock = threading.RLock()
+        # sequence number of the last journaled mutation
+        self.seq = 0
+        self._journal_entries = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        # entries of the open transaction, written as one line on commit
+        self._batch = None
+        self._bulk_loading = False
+
+        os.makedirs(directory, exist_ok=True)
+        self._lock_file = self._acquire_directory_lock()
+        try:
+            self._recover()
+            self._journal = open(self.journal_path, 'a', encoding='utf-8')
+        except BaseException:
+            self._lock_file.close()
+            raise
+        self._closed = threading.Event()
+        self._sync_thread = threading.Thread(target=self._sync_periodically, name='journal-sync', daemon=True)
+        self._sync_thread.start()
+
+    def _acquire_directory_lock(self):
+        """Lock the directory for this store, failing if another process already has it open.
+
+        A second writer would interleave seq numbers, and its snapshots would
+        drop this process's writes.
+        """
+        lock_file = open(os.path.join(self.directory, 'lock'), 'a')
+        if fcntl is None:
+            return lock_file
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            raise RuntimeError(f"Journal directory {self.directory} is in use by another process")
+        return lock_file
+
+    def _recover(self):
+        """Load the latest snapshot, then replay the journal written after it"""
+        with self._memory.bulk_load():
+            self._load()
+
+    def _load(self):
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, encoding='utf-8') as f:
+                header = json.loads(f.readline())
+                self.seq = header['seq']
+                for line in f:
+                    self._memory.add(json.loads(line))
+
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, 'rb+') as f:
+                good_offset = 0
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # torn write at the end of the journal, cut it off so
+                        # new entries don't get appended to a partial line
+                        f.truncate(good_offset)
+                        break
+                    good_offset += len(line)
+                    if not line.endswith(b'\n'):
+                        # a whole entry that lost its newline: end the line,
+                        # or the next entry would be appended onto it
+                        f.seek(good_offset)
+                        f.write(b'\n')
+                    # entries already covered by the snapshot
+                    if entry['seq'] <= self.seq:
+                        continue
+                    self._apply(entry)
+                    self.seq = entry['seq']
+                    self._journal_entries += 1
+
+    def _apply(self, entry):
+        op = entry['op']
+        if op == 'add':
+            self._memory.add(entry['todo'])
+        elif op == 'update':
+            self._memory.update(entry['id'], **entry['fields'])
+        elif op == 'delete':
+            self._memory.delete(entry['id'])
+        elif op == 'batch':
+            for batch_entry in entry['entries']:
+                self._apply(batch_entry)
+
+    def _append(self, entry):
+        if self._batch is not None:
+            self._batch.append(entry)
+            return
+        self.seq += 1
+        entry['seq'] = self.seq
+        self._journal.write(json.dumps(entry) + '\n')
+        # hand every entry to the OS right away; only the fsync is batched
+        self._journal.flush()
+        self._journal_entries += 1
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_batch or time.monotonic() - self._last_sync >= self.fsync_interval:
+            self.flush()
+        if self._journal_entries >= self.snapshot_every and not self._bulk_loading:
+            self.snapshot()
+
+    def _sync_periodically(self):
+        while not self._closed.wait(self.fsync_interval):
+            with self._lock:
+                if self._unsynced and not self._closed.is_set():
+                    self.flush()
+
+    def flush(self):
+        """Write buffered journal entries and fsync them"""
+        with self._lock:
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+            self._unsynced = 0
+            self._last_sync = time.monotonic()
+
+    def snapshot(self):
+        """Write a compacted snapshot and start a fresh journal"""
+        with self._lock:
+            self.flush()
+            tmp_path = self.snapshot_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(json.dumps({'seq': self.seq}) + '\n')
+                for todo in self._memory.all():
+                    f.write(json.dumps(todo) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+
+            # a crash before this point just replays entries the snapshot skips
+            self._journal.close()
+            self._journal = open(self.journal_path, 'w', encoding='utf-8')
+            self._journal_entries = 0
+
+    def __len__(self):
+        return len(self._memory)
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """Apply a group of mutations atomically, journaled as a single line"""
+        with self._lock:
+            if self._batch is not None:
+                # nested transactions join the outer one
+                yield
+                return
+            self._batch = []
+            try:
+                with self._memory.transaction():
+                    yield
+            except BaseException:
+                self._batch = None
+                raise
+            batch, self._batch = self._batch, None
+            if batch:
+                self._append({'op': 'batch', 'entries': batch})
+
+    @contextlib.contextmanager
+    def bulk_load(self):
+        """Add many todos, rebuilding the in-memory indexes once at the end.
+
+        Snapshots are put off until then, as they read the todos through
+        the order index.
+        """
+        with self._lock:
+            if self._bulk_loading:
+                yield
+                return
+            self._bulk_loading = True
+            try:
+                with self._memory.bulk_load():
+                    yield
+            finally:
+                self._bulk_loading = False
+            if self._journal_entries >= self.snapshot_every:
+                self.snapshot()
+
+    def add(self, todo):
+        with self._lock:
+            self._memory.add(todo)
+            self._append({'op': 'add', 'todo': todo})
+        return todo
+
+    def get(self, todo_id):
+        return self._memory.get(todo_id)
+
+    def update(self, todo_id, **fields):
+        with self._lock:
+            todo = self._memory.update(todo_id, **fields)
+            if todo is not None:
+                self._append({'op': 'update', 'id': todo_id, 'fields': fields})
+        return todo
+
+    def delete(self, todo_id):
+        with self._lock:
+            deleted = self._memory.delete(todo_id)
+            if deleted:
+                self._append({'op': 'delete', 'id': todo_id})
+        return deleted
+
+    def all(self):
+        return self._memory.all()
+
+    def page(self, *args, **kwargs):
+        return self._memory.page(*args, **kwargs)
+
+    def query(self, *args, **kwargs):
+        return self._memory.query(*args, **kwargs)
+
+    def search(self, *args, **kwargs):
+        return self._memory.search(*args, **kwargs)
+
+    def group_counts(self):
+        return self._memory.group_counts()
+
+    def close(self):
+        with self._lock:
+            if self._closed.is_set():
+                return
+            self._closed.set()
+            self.flush()
+            self._journal.close()
+            # closing the file releases the directory lock
+            self._lock_file.close()
+        self._sync_thread.join()
@@ -1,14 +1,79 @@
 import re
-from difflib import SequenceMatcher
-from typing import final
-from fuzzywuzzy import fuzz
+import threading
+from collections import OrderedDict
+from types import MappingProxyType
+
+# fuzzywuzzy (and difflib behind it) is only needed once matching starts, so it
+# is imported on first use instead of at import time
+_fuzz = None
+_SequenceMatcher = None
+
+
+def _get_fuzz():
+    global _fuzz
+    if _fuzz is None:
+        from fuzzywuzzy import fuzz
+        _fuzz = fuzz
+    return _fuzz
+
+
+def _get_sequence_matcher():
+    global _SequenceMatcher
+    if _SequenceMatcher is None:
+        from difflib import SequenceMatcher
+        _SequenceMatcher = SequenceMatcher
+    return _SequenceMatcher
+
+
+class _StripedCache:
+    """Bounded LRU cache split into stripes, each guarded by its own lock"""
+
+    def __init__(self, maxsize, stripes=16):
+        self.stripes = [OrderedDict() for _ in range(stripes)]
+        self.locks = [threading.Lock() for _ in range(stripes)]
+        self.stripe_maxsize = max(1, maxsize // stripes)
+
+    def _stripe(self, key):
+        return hash(key) % len(self.stripes)
+
+    def get(self, key):
+        index = self._stripe(key)
+        with self.locks[index]:
+            stripe = self.stripes[index]
+            if key in stripe:
+                stripe.move_to_end(key)
+                return stripe[key]
+        return None
+
+    def put(self, key, value):
+        index = self._stripe(key)
+        with self.locks[index]:
+            stripe = self.stripes[index]
+            stripe[key] = value
+            stripe.move_to_end(key)
+            if len(stripe) > self.stripe_maxsize:
+                stripe.popitem(last=False)
+
 
 class VehicleModelMatcher:
-    def __init__(self,database_names):
-        self.database_names= database_names
+    """Matches dealer strings to catalog names.
+
+    The catalog indexes are built once and never mutated afterwards, and the
+    result cache is lock-striped, so one instance can be shared by all threads.
+    """
+
+    def __init__(self,database_names, cache_size=10000, accept_threshold=98, reject_threshold=0):
+        self.database_names= tuple(database_names)
         self.brand_model_map=self._create_brand_model_map()
+        # catalog names as they look after preprocessing, for exact hits
+        self.exact_name_map=MappingProxyType({name.replace('_',' '): name for name in self.database_names})
+        # stop scanning once a candidate scores at least this much
+        self.accept_threshold=accept_threshold
+        # report no match when the best score stays below this
+        self.reject_threshold=reject_threshold
+        self._cache=_StripedCache(cache_size) if cache_size else None
 
-    # create a map of brand to models
+    # create a read-only map of brand to models
     def _create_brand_model_map(self):
         brand_model_map={}
         for db_name in self.database_names:
@@ -16,7 +81,7 @@ class VehicleModelMatcher:
             if brand not in brand_model_map:
                 brand_model_map[brand]=[]
             brand_model_map[brand].append(model)
-        return brand_model_map
+        return MappingProxyType({brand: tuple(models) for brand, models in brand_model_map.items()})
 
     def preprocess_input(self, input_string):
         # remove special charcters and convert to lowercase
@@ -31,38 +96,95 @@ class VehicleModelMatcher:
             if potential_brand in self.brand_model_map:
                 return potential_brand, ' '.join(words[i+1:])
             return None, input_string
+        return None, input_string
 
-
-    def get_best_match(self, input_string):
+    def get_best_match(self, input_string, accept_threshold=None, reject_threshold=None):
+        # thresholds default to the matcher's own, so one shared matcher serves any pair
+        if accept_threshold is None:
+            accept_threshold=self.accept_threshold
+        if reject_threshold is None:
+            reject_threshold=self.reject_threshold
         preprocessed_input=self.preprocess_input(input_string)
+        if self._cache is None:
+            return self._find_best_match(preprocessed_input, accept_threshold, reject_threshold)
+
+        # results depend on the thresholds, so they are part of the key
+        key=(preprocessed_input, accept_threshold, reject_threshold)
+        result=self._cache.get(key)
+        if result is None:
+            result=self._find_best_match(preprocessed_input, accept_threshold, reject_threshold)
+            self._cache.put(key, result)
+        return result
+
+    def route_matches(self, input_strings, accept_threshold=None, reject_threshold=None):
+        """Split inputs into matched rows and rejected inputs for review"""
+        matched=[]
+        unmatched=[]
+        for input_string in input_strings:
+            best_match, confidence=self.get_best_match(input_string, accept_threshold, reject_threshold)
+            if best_match is None:
+                unmatched.append(input_string)
+            else:
+                matched.append((input_string, best_match, confidence))
+        return matched, unmatched
+
+    def _find_best_match(self, preprocessed_input, accept_threshold, reject_threshold):
+        if preprocessed_input in self.exact_name_map:
+            return self.exact_name_map[preprocessed_input], 100.0
+
         extracted_brand, extracted_model=self.extract_brand_and_model(preprocessed_input)
-        best_match=None
-        best_score=0
 
         if extracted_brand:
-            for model in self.brand_model_map[extracted_brand]:
-                db_name=f"{extracted_brand}_{model}"
-                score=self.calculate_match_score(preprocessed_input, db_name)
-
-                if score>best_score:
-                    best_score=score
-                    best_match=db_name
+            candidates=[f"{extracted_brand}_{model}" for model in self.brand_model_map[extracted_brand]]
+            score_fn=self.calculate_match_score
+            bound_fn=self.match_score_upper_bound
         else:
-            for db_name in self.database_names:
-                # split the databse name into brand and model
-                brand,model=db_name.split('_',1)
-
-                # check if the brand is present or not
-                if brand in preprocessed_input:
-                # claculate the similarity retio
-                    ratio=SequenceMatcher(None, preprocessed_input, db_name.replace('_',' ')).ratio()
-                    if ratio>best_ratio:
-                        best_ratio=ratio
-                        best_match=db_name
+            # only names whose brand is present somewhere in the input
+            candidates=[db_name for db_name in self.database_names if db_name.split('_',1)[0] in preprocessed_input]
+            score_fn=self.calculate_similarity_score
+            bound_fn=self.similarity_score_upper_bound
 
+        # cheap upper bounds let us skip candidates that cannot win, and give
+        # up early when nothing can reach the reject threshold
+        bounded=sorted(((bound_fn(preprocessed_input, db_name), db_name) for db_name in candidates),
+                       key=lambda item: item[0], reverse=True)
+        if not bounded or bounded[0][0]<reject_threshold:
+            return None, 0
+
+        best_match=None
+        best_score=0
+        for bound, db_name in bounded:
+            if bound<=best_score:
+                break
+            score=score_fn(preprocessed_input, db_name)
+            if score>best_score:
+                best_score=score
+                best_match=db_name
+                if accept_threshold is not None and best_score>=accept_threshold:
+                    break
+
+        if best_score<reject_threshold:
+            return None, 0
         return best_match, best_score
-    
+
+    def calculate_similarity_score(self, input_string, db_name):
+        # claculate the similarity retio
+        return _get_sequence_matcher()(None, input_string, db_name.replace('_',' ')).ratio()*100
+
+    def similarity_score_upper_bound(self, input_string, db_name):
+        # same bound as SequenceMatcher.real_quick_ratio, from lengths alone
+        total=len(input_string)+len(db_name)
+        return 2*min(len(input_string), len(db_name))/total*100 if total else 0
+
+    def match_score_upper_bound(self, input_string, db_name):
+        # exact brand score, with the model and sequence parts at their best
+        db_brand=db_name.split('_',1)[0]
+        brand_score=_get_fuzz().ratio(db_brand, input_string.split()[0])/100
+        seq_bound=self.similarity_score_upper_bound(input_string, db_name)/100
+        return (brand_score*0.3 + 0.5 + seq_bound*0.2)*100
+
     def calculate_match_score(self, input_string, db_name,extracted_model=None):
+        fuzz=_get_fuzz()
         db_brand, db_model=db_name.split('_',1)
         # brand match
         brand_score=fuzz.ratio(db_brand, input_string.split()[0])/100
@@ -73,14 +195,14 @@ class VehicleModelMatcher:
         else:
             model_score=fuzz.partial_ratio(db_model, input_string)/100
 
-        seq_score=SequenceMatcher(None, input_string, db_name.replace('_',' ')).ratio()
+        seq_score=_get_sequence_matcher()(None, input_string, db_name.replace('_',' ')).ratio()
 
         final_score=(brand_score *0.3 +model_score * 0.5 + seq_score * 0.2) *100
 
         return final_score
 
-# Database names
-database_names = [
+# Default catalog, used when no catalog file is given
+DEFAULT_DATABASE_NAMES = [
     "ford_aspire", "ford_ecosport", "ford_endeavour", "ford_figo",
     "honda_amaze", "honda_city", "honda_wr_v",
     "hyundai_aura", "hyundai_grand_i10", "hyundai_i10",
@@ -94,9 +216,9 @@ database_names = [
     "toyota_fortuner", "toyota_glanza", "toyota_innova_crysta",
     "toyota_yaris"
 ]
+database_names = DEFAULT_DATABASE_NAMES
 
-matcher=VehicleModelMatcher(database_names)
-
+# Sample dealer strings for the demo
 test_cases = [
     "FORD INDIA PVT LTD-FIGOASPIRE 1.2 PETROL TREND+MT",
     "FORD INDIA PVT LTD-FORD FIGO ASPIRE 1.5 TDCI DIES",
@@ -108,11 +230,67 @@ test_cases = [
     "HYUNDAI MOTOR INDIA LTD-AURA 1.2AMT KAPPA SX+"
 ]
 
-# run test cases
-for case in test_cases:
-    best_match, confidence = matcher.get_best_match(case)
 
-    print(f"Input: {case}")
-    print(f"Best Match: {best_match}")
-    print(f"Confidence: {confidence}")
-    print("\n")
\ No newline at end of file
+def load_database_names(path):
+    """Load catalog names (brand_model, one per line) from a file; raises ValueError on a malformed line"""
+    database_names = []
+    with open(path, encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            name = line.strip()
+            # skip blank lines and comments
+            if not name or name.startswith('#'):
+                continue
+            brand, _, model = name.partition('_')
+            if not brand or not model:
+                raise ValueError(f"{path}, line {line_number}: '{name}' is not a brand_model catalog name")
+            database_names.append(name)
+    return database_names
+
+
+def create_matcher(database_names=None, catalog_path=None, **matcher_options):
+    """Build a matcher from a list of names, a catalog file or the default catalog"""
+    if database_names is None:
+        if catalog_path:
+            database_names = load_database_names(catalog_path)
+        else:
+            database_names = DEFAULT_DATABASE_NAMES
+    return VehicleModelMatcher(database_names, **matcher_options)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Match dealer vehicle strings to catalog names")
+    parser.add_argument('inputs', nargs='*', help="strings to match (defaults to the sample test cases)")
+    parser.add_argument('--catalog', help="catalog file with one brand_model name per line")
+    parser.add_argument('--accept-threshold', type=float, default=98,
+                        help="stop scanning once a candidate scores at least this much")
+    parser.add_argument('--reject-threshold', type=float, default=0,
+                        help="report no match when the best score is below this")
+    args = parser.parse_args(argv)
+
+    try:
+        matcher = create_matcher(
+            catalog_path=args.catalog,
+            accept_threshold=args.accept_threshold,
+            reject_threshold=args.reject_threshold
+        )
+    except ValueError as e:
+        parser.error(str(e))
+
+    # run test cases
+    matched, unmatched = matcher.route_matches(args.inputs or test_cases)
+    for case, best_match, confidence in matched:
+        print(f"Input: {case}")
+        print(f"Best Match: {best_match}")
+        print(f"Confidence: {confidence}")
+        print("\n")
+
+    if unmatched:
+        print("Unmatched (for review):")
+        for case in unmatched:
+            print(f"  {case}")
+
+
+if __name__ == "__main__":
+    main()